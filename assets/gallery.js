@@ -0,0 +1,325 @@
+// ============================================
+// GALÉRIA + LIGHTBOX - Nagy Botond Cycling Website
+// ============================================
+// Shared by index.html and the generated album pages (album-*.html):
+// paging of #gallery-rest from its JSON shards and the .gallery-img lightbox.
+// Tiles rendered here use the same classes as build_site.py's gallery markup.
+
+// ============================================
+// 1. GALÉRIA LAPOZÁS - további képek JSON lapokból
+// ============================================
+// Only the first page of the gallery is in the HTML. The rest comes
+// from JSON shards (see build_site.py), fetched one at a time when the
+// end of the grid scrolls into view or the lightbox runs past the
+// last loaded photo.
+const galleryPager = (function initGalleryPager() {
+    const grid = document.getElementById('gallery-rest');
+    const sentinel = document.getElementById('gallery-sentinel');
+    const shards = grid && grid.dataset.shards ? grid.dataset.shards.split(' ') : [];
+    const sizes = grid ? grid.dataset.sizes : '';
+    let loading = null;
+    let observer = null;
+
+    function renderTile(entry) {
+        const tile = document.createElement('div');
+        tile.className = 'gallery-img h-48 sm:h-56';
+        const picture = document.createElement('picture');
+        ['avif', 'webp'].forEach(fmt => {
+            if (!entry.srcset[fmt]) return;
+            const source = document.createElement('source');
+            source.type = 'image/' + fmt;
+            source.srcset = entry.srcset[fmt];
+            source.sizes = sizes;
+            picture.appendChild(source);
+        });
+        const img = document.createElement('img');
+        // loading/sizes before src, or the browser fetches eagerly
+        img.loading = 'lazy';
+        img.sizes = sizes;
+        img.srcset = entry.srcset.jpeg;
+        img.src = entry.src;
+        img.width = entry.width;
+        img.height = entry.height;
+        img.alt = entry.alt;
+        img.dataset.fullJpeg = entry.full;
+        Object.keys(entry.fullSrcset || {}).forEach(fmt => {
+            img.setAttribute('data-full-srcset-' + fmt, entry.fullSrcset[fmt]);
+        });
+        if (entry.fullWidth) {
+            img.dataset.fullWidth = entry.fullWidth;
+            img.dataset.fullHeight = entry.fullHeight;
+        }
+        if (entry.placeholder) {
+            img.style.background = 'url("' + entry.placeholder + '") center / cover no-repeat';
+        }
+        picture.appendChild(img);
+        tile.appendChild(picture);
+        return tile;
+    }
+
+    // Resolves to true if a shard was appended
+    function loadNext() {
+        if (loading) return loading;
+        if (!shards.length) return Promise.resolve(false);
+        const url = shards.shift();
+        loading = fetch(url)
+            .then(res => res.ok ? res.json() : Promise.reject(new Error(res.status)))
+            .then(shard => {
+                shard.images.forEach(entry => grid.appendChild(renderTile(entry)));
+                // Lets the lightbox pick up the new photos, whoever asked for them
+                grid.dispatchEvent(new CustomEvent('gallery:loaded', { bubbles: true }));
+                return true;
+            })
+            .catch(() => {
+                shards.unshift(url);  // retried on the next trigger
+                return false;
+            })
+            .finally(() => {
+                loading = null;
+                if (observer && !shards.length) observer.disconnect();
+            });
+        return loading;
+    }
+
+    if (sentinel && shards.length) {
+        if ('IntersectionObserver' in window) {
+            observer = new IntersectionObserver(entries => {
+                if (!entries.some(e => e.isIntersecting)) return;
+                loadNext().then(loaded => {
+                    // Re-observing re-reports the sentinel if it is still in view
+                    if (loaded && shards.length) {
+                        observer.unobserve(sentinel);
+                        observer.observe(sentinel);
+                    }
+                });
+            }, { rootMargin: '600px 0px' });
+            observer.observe(sentinel);
+        } else {
+            (function loadAll() {
+                loadNext().then(loaded => { if (loaded) loadAll(); });
+            })();
+        }
+    }
+
+    return {
+        loadNext,
+        hasMore: () => shards.length > 0,
+        // The shard being fetched (null if none)
+        pending: () => loading,
+        // Whether scope holds the paged grid
+        pages: scope => !!grid && scope.contains(grid),
+    };
+})();
+
+// ============================================
+// 2. LIGHTBOX - KÉPNAGYÍTÓ
+// ============================================
+(function initLightbox() {
+    const overlay = document.getElementById('lightbox');
+    const lightboxImg = document.getElementById('lightbox-img');
+    const closeBtn = document.getElementById('lightbox-close');
+    const prevBtn = document.getElementById('lightbox-prev');
+    const nextBtn = document.getElementById('lightbox-next');
+    const counterEl = document.getElementById('lightbox-counter');
+    if (!overlay || !lightboxImg) return;
+
+    // Összegyűjtjük a kattintott kép szekciójának képeit (src-ket): the
+    // gallery pages through its own photos only, not the bike or motivation ones
+    let images = [];
+    let currentIndex = 0;
+    let scope = document;
+
+    // Best format this browser decodes; JPEG until the probes have answered
+    // (they are tiny data: URIs, so that is long before the first click)
+    const FORMAT_PROBES = {
+        avif: 'data:image/avif;base64,AAAAIGZ0eXBhdmlmAAAAAGF2aWZtaWYxbWlhZk1BMUIAAADrbWV0YQAAAAAAAAAhaGRscgAAAAAAAAAAcGljdAAAAAAAAAAAAAAAAAAAAAAOcGl0bQAAAAAAAQAAAB5pbG9jAAAAAEQAAAEAAQAAAAEAAAETAAAAIAAAAChpaW5mAAAAAAABAAAAGmluZmUCAAAAAAEAAGF2MDFDb2xvcgAAAABqaXBycAAAAEtpcGNvAAAAFGlzcGUAAAAAAAAAAQAAAAEAAAAQcGl4aQAAAAADCAgIAAAADGF2MUOBAAwAAAAAE2NvbHJuY2x4AAEADQAGgAAAABdpcG1hAAAAAAAAAAEAAQQBAoMEAAAAKG1kYXQSAAoIGAAGiAhoNCAyEh7Hh4VZ3///4sAAAJA1jjx+rQ==',
+        webp: 'data:image/webp;base64,UklGRiQAAABXRUJQVlA4IBgAAAAwAQCdASoBAAEAB0CWJaQAA3AA/u+5AAA=',
+    };
+    const supported = { jpeg: true };
+    Object.keys(FORMAT_PROBES).forEach(fmt => {
+        const probe = new Image();
+        probe.onload = () => { supported[fmt] = probe.width > 0; };
+        probe.src = FORMAT_PROBES[fmt];
+    });
+
+    function collectImages() {
+        images = [];
+        scope.querySelectorAll('.gallery-img img').forEach(img => {
+            // Use optimized medium version for lightbox if available
+            const fullSrc = img.dataset.fullJpeg || img.src;
+            const srcsets = {};
+            ['avif', 'webp', 'jpeg'].forEach(fmt => {
+                const value = img.getAttribute('data-full-srcset-' + fmt);
+                if (value) srcsets[fmt] = value;
+            });
+            images.push({
+                src: fullSrc,
+                alt: img.alt,
+                thumbSrc: img.src,
+                srcsets,
+                width: Number(img.dataset.fullWidth) || 0,
+                height: Number(img.dataset.fullHeight) || 0,
+            });
+        });
+    }
+
+    // The image is shown at most 90vw x 85vh (see .lightbox-content img),
+    // so its CSS width follows from the aspect ratio; srcset then picks the
+    // smallest candidate covering that at the screen's pixel density
+    function displayedWidth(item) {
+        const maxW = window.innerWidth * (window.innerWidth <= 768 ? 0.95 : 0.9);
+        const maxH = window.innerHeight * (window.innerWidth <= 768 ? 0.75 : 0.85);
+        if (!item.width || !item.height) return Math.round(maxW);
+        return Math.round(Math.min(maxW, maxH * item.width / item.height, item.width));
+    }
+
+    function bestSrcset(item) {
+        const fmt = ['avif', 'webp', 'jpeg'].find(f => supported[f] && item.srcsets[f]);
+        return fmt ? item.srcsets[fmt] : '';
+    }
+
+    // sizes before srcset/src, so the first request already uses them
+    function applySource(img, item) {
+        img.sizes = displayedWidth(item) + 'px';
+        img.srcset = bestSrcset(item);
+        img.src = item.src;
+    }
+
+    // Fetch the neighbours of the current photo, so paging is instant
+    const preloaded = new Map();
+    function preload(index) {
+        const item = images[(index + images.length) % images.length];
+        if (!item || preloaded.has(item.src)) return;
+        const img = new Image();
+        img.decoding = 'async';
+        applySource(img, item);
+        preloaded.set(item.src, img);
+    }
+
+    function show(index) {
+        currentIndex = index;
+        const item = images[currentIndex];
+        applySource(lightboxImg, item);
+        lightboxImg.alt = item.alt;
+        counterEl.textContent = (currentIndex + 1) + ' / ' + images.length;
+        if (images.length > 1) {
+            preload(currentIndex + 1);
+            preload(currentIndex - 1);
+        }
+    }
+
+    // A shard was appended (by scrolling or by the lightbox): re-collect and
+    // find the photo on screen again by its src, as tiles may have moved
+    document.addEventListener('gallery:loaded', () => {
+        if (!galleryPager.pages(scope) || !images.length) return;
+        const current = images[currentIndex].src;
+        collectImages();
+        currentIndex = Math.max(0, images.findIndex(i => i.src === current));
+        counterEl.textContent = (currentIndex + 1) + ' / ' + images.length;
+        if (images.length > 1) preload(currentIndex + 1);
+    });
+
+    // The next page of this scope's photos, if it has more: a promise, or null
+    function morePhotos() {
+        if (!galleryPager.pages(scope)) return null;
+        return galleryPager.pending() || (galleryPager.hasMore() ? galleryPager.loadNext() : null);
+    }
+
+    function openLightbox(index) {
+        if (index < 0 || index >= images.length) return;
+        show(index);
+        overlay.classList.add('active');
+        document.body.style.overflow = 'hidden';
+        // Fetch the next gallery page while the user is browsing
+        morePhotos();
+    }
+
+    function closeLightbox() {
+        overlay.classList.remove('active');
+        document.body.style.overflow = '';
+    }
+
+    function showPrev() {
+        show((currentIndex - 1 + images.length) % images.length);
+    }
+
+    function showNext() {
+        const more = currentIndex === images.length - 1 ? morePhotos() : null;
+        if (more) {
+            // Past the last loaded photo: wait for the next page instead of
+            // wrapping, then step from the photo this click was made on (so
+            // clicks made while waiting do not add up)
+            const from = images[currentIndex].src;
+            more.then(() => show((images.findIndex(i => i.src === from) + 1) % images.length));
+            return;
+        }
+        show((currentIndex + 1) % images.length);
+    }
+
+    // Kattintás a galéria képekre
+    document.addEventListener('click', (e) => {
+        const galleryImg = e.target.closest('.gallery-img');
+        if (galleryImg) {
+            const img = galleryImg.querySelector('img');
+            if (!img) return;
+            scope = galleryImg.closest('section, main') || document;
+            collectImages();
+            // Match by thumbnail src since that's what <img> has
+            const thumbSrc = img.src;
+            const fullSrc = img.dataset.fullJpeg || img.src;
+            const idx = images.findIndex(i => i.thumbSrc === thumbSrc || i.src === fullSrc);
+            if (idx !== -1) {
+                openLightbox(idx);
+            }
+        }
+    });
+
+    // Bezárás
+    closeBtn.addEventListener('click', (e) => {
+        e.stopPropagation();
+        closeLightbox();
+    });
+
+    // Overlay kattintás bezár (de a képre nem)
+    overlay.addEventListener('click', (e) => {
+        if (e.target === overlay) {
+            closeLightbox();
+        }
+    });
+
+    // Navigáció
+    prevBtn.addEventListener('click', (e) => {
+        e.stopPropagation();
+        showPrev();
+    });
+
+    nextBtn.addEventListener('click', (e) => {
+        e.stopPropagation();
+        showNext();
+    });
+
+    // Billentyűzet: Escape, bal/jobb nyíl
+    document.addEventListener('keydown', (e) => {
+        if (!overlay.classList.contains('active')) return;
+        if (e.key === 'Escape') closeLightbox();
+        if (e.key === 'ArrowLeft') showPrev();
+        if (e.key === 'ArrowRight') showNext();
+    });
+
+    // Swipe támogatás mobilon
+    let touchStartX = 0;
+    let touchEndX = 0;
+
+    overlay.addEventListener('touchstart', (e) => {
+        touchStartX = e.changedTouches[0].screenX;
+    }, { passive: true });
+
+    overlay.addEventListener('touchend', (e) => {
+        touchEndX = e.changedTouches[0].screenX;
+        const diff = touchStartX - touchEndX;
+        if (Math.abs(diff) > 50) {
+            if (diff > 0) showNext();
+            else showPrev();
+        }
+    }, { passive: true });
+})();
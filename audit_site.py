@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+audit_site.py - Page-weight budgets for the deployable site in dist/.
+Parses every page in dist/ and adds up what a first visit downloads:
+
+- eager: the page itself, its stylesheets, scripts and fonts, and every
+  image not marked loading="lazy" (the hero picture, logos, the favicon),
+- lazy: images marked loading="lazy" and the gallery shards loaded on scroll
+  (a lazy image that happens to be in the first viewport still counts as lazy),
+- inline: the bytes of inline <style>/<script> (already part of the page),
+- external: requests to other hosts (Google Fonts, analytics), counted but
+  not sized,
+- DOM nodes: the elements of the page.
+
+For a <picture>/srcset the file counted is the one a browser with
+VIEWPORT_WIDTH css px at DEVICE_PIXEL_RATIO (budgets.json "viewport")
+picks: the first <source> whose media matches, then the smallest candidate
+covering the slot width of sizes. Text assets count with their precompressed
+size (.br, else .gz, as minify_site.py wrote them).
+
+The totals are checked against budgets.json and compared with the last
+report that stayed within budget (.build-cache/page-weight.json); any budget
+exceeded fails the build.
+Run AFTER minify_site.py in the build pipeline.
+
+Usage: python3 audit_site.py [--budgets budgets.json] [--report OUT.json]
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import posixpath
+import re
+import sys
+from html.parser import HTMLParser
+
+from package_site import CSS_URL_RE, DIST_DIR, local_path, srcset_urls
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BUDGETS_PATH = os.path.join(SCRIPT_DIR, 'budgets.json')
+# The baseline of the next run's diff; .build-cache/ is restored between CI runs
+LAST_REPORT_PATH = os.path.join(SCRIPT_DIR, '.build-cache', 'page-weight.json')
+
+# Reference device when budgets.json does not name one (a common phone)
+VIEWPORT_WIDTH = 412
+DEVICE_PIXEL_RATIO = 2
+
+ROOT_FONT_PX = 16
+FONT_EXTENSIONS = {'.woff2', '.woff', '.ttf', '.otf'}
+
+# Budget keys in budgets.json -> (report metric, bytes per unit)
+BUDGET_METRICS = {
+    'eagerKB': ('eager_bytes', 1024),
+    'imagesKB': ('image_bytes', 1024),
+    'cssKB': ('css_bytes', 1024),
+    'jsKB': ('js_bytes', 1024),
+    'fontsKB': ('font_bytes', 1024),
+    'inlineKB': ('inline_bytes', 1024),
+    'lazyKB': ('lazy_bytes', 1024),
+    'requests': ('requests', 1),
+    'externalRequests': ('external_requests', 1),
+    'domNodes': ('dom_nodes', 1),
+}
+
+# Content-hashed names (name.<10 hex>.ext) compare by their logical name
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{10}(?=\.[^./]+$)')
+LENGTH_TERM_RE = re.compile(r'([+-]?)\s*(\d+(?:\.\d+)?)(px|vw|rem|em)\b')
+SIZES_ENTRY_RE = re.compile(r'^(.*?)\s*(calc\(.*\)|\d+(?:\.\d+)?(?:px|vw|rem|em))$')
+MEDIA_FEATURE_RE = re.compile(r'\(\s*(min|max)-width\s*:\s*([^)]+)\)')
+
+
+# ============================================
+# VIEWPORT MODEL
+# ============================================
+
+def css_length(value, viewport):
+    """'631px', '50vw', 'calc(100vw - 2rem)' -> css px (None if unsupported)."""
+    value = value.strip()
+    if value.startswith('calc(') and value.endswith(')'):
+        value = value[5:-1]
+    terms = LENGTH_TERM_RE.findall(value)
+    if not terms:
+        return None
+    units = {'px': 1, 'vw': viewport['width'] / 100, 'rem': ROOT_FONT_PX, 'em': ROOT_FONT_PX}
+    return sum((-1 if sign == '-' else 1) * float(number) * units[unit] for sign, number, unit in terms)
+
+
+def media_matches(query, viewport):
+    """Evaluate a min-/max-width media condition ('' matches); other features never match."""
+    query = query.strip()
+    if not query or query == 'all':
+        return True
+    for part in re.split(r'\s+and\s+', query):
+        feature = MEDIA_FEATURE_RE.fullmatch(part.strip())
+        if not feature:
+            return False
+        limit = css_length(feature.group(2), viewport)
+        if limit is None:
+            return False
+        if feature.group(1) == 'min' and viewport['width'] < limit:
+            return False
+        if feature.group(1) == 'max' and viewport['width'] > limit:
+            return False
+    return True
+
+
+def slot_width(sizes, viewport):
+    """Width (css px) of the image slot the sizes attribute gives for the viewport."""
+    for entry in (sizes or '').split(','):
+        match = SIZES_ENTRY_RE.match(entry.strip())
+        if match and media_matches(match.group(1), viewport):
+            width = css_length(match.group(2), viewport)
+            if width is not None:
+                return width
+    return viewport['width']  # no sizes (or sizes="auto"): 100vw
+
+
+def pick_candidate(srcset, sizes, viewport):
+    """The srcset URL a browser fetches: the smallest w/x candidate that
+    covers the slot at the device pixel ratio, else the largest.
+    """
+    candidates = []
+    for candidate in srcset.split(','):
+        parts = candidate.split()
+        if not parts:
+            continue
+        descriptor = parts[1] if len(parts) > 1 else '1x'
+        try:
+            candidates.append((float(descriptor[:-1]), descriptor[-1], parts[0]))
+        except ValueError:
+            continue
+    if not candidates:
+        urls = srcset_urls(srcset)
+        return urls[0] if urls else None
+    dpr = viewport['dpr']
+    needed = {'w': slot_width(sizes, viewport) * dpr, 'x': dpr}
+    candidates.sort()
+    for value, kind, url in candidates:
+        if value >= needed.get(kind, 0):
+            return url
+    return candidates[-1][2]
+
+
+# ============================================
+# PAGE PARSING
+# ============================================
+
+class PageWeightParser(HTMLParser):
+    """Collects the requests of one page: [(url, kind, eager)] with kind one of
+    image/css/js/data, plus the inline style/script bytes and the element count.
+    """
+
+    def __init__(self, viewport):
+        super().__init__(convert_charrefs=True)
+        self.viewport = viewport
+        self.requests = []
+        self.inline_bytes = 0
+        self.dom_nodes = 0
+        self._sources = None  # <source>s of the open <picture>
+        self._inline = False
+
+    def add(self, url, kind, eager=True):
+        if url and not url.startswith(('data:', '#')):
+            self.requests.append((url, kind, eager))
+
+    def handle_starttag(self, tag, attrs):
+        self.dom_nodes += 1
+        attrs = dict(attrs)
+        if tag == 'picture':
+            self._sources = []
+        elif tag == 'source' and self._sources is not None:
+            if media_matches(attrs.get('media') or '', self.viewport):
+                self._sources.append(attrs)
+        elif tag == 'img':
+            self.add_image(attrs)
+        elif tag == 'link':
+            self.add_link(attrs)
+        elif tag == 'script' and attrs.get('src'):
+            self.add(attrs['src'], 'js')
+        for url in CSS_URL_RE.findall(attrs.get('style') or ''):
+            self.add(url, 'image')
+        for url in (attrs.get('data-shards') or '').split():
+            self.add(url, 'data', eager=False)
+        self._inline = tag in ('style', 'script') and not attrs.get('src')
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        self._inline = False
+
+    def handle_endtag(self, tag):
+        if tag == 'picture':
+            self._sources = None
+        self._inline = False
+
+    def handle_data(self, data):
+        if self._inline:
+            self.inline_bytes += len(data.encode('utf-8'))
+
+    def add_image(self, attrs):
+        eager = (attrs.get('loading') or '').lower() != 'lazy'
+        chosen = (self._sources or [None])[0] or attrs
+        srcset = chosen.get('srcset')
+        if srcset:
+            url = pick_candidate(srcset, chosen.get('sizes') or attrs.get('sizes'), self.viewport)
+        else:
+            url = attrs.get('src')
+        self.add(url, 'image', eager)
+
+    def add_link(self, attrs):
+        rel = set((attrs.get('rel') or '').lower().split())
+        href = attrs.get('href')
+        if 'stylesheet' in rel:
+            self.add(href, 'css')
+        elif rel & {'icon', 'apple-touch-icon'}:
+            self.add(href, 'image')
+        elif 'preload' in rel:
+            kind = {'style': 'css', 'script': 'js', 'font': 'font'}.get(attrs.get('as'), 'image')
+            if attrs.get('imagesrcset'):
+                href = pick_candidate(attrs['imagesrcset'], attrs.get('imagesizes'), self.viewport)
+            self.add(href, kind)
+
+
+# ============================================
+# MEASURING
+# ============================================
+
+def transfer_size(rel_path):
+    """Bytes sent for a dist/ file: the .br, else .gz sibling, else the file (None if missing)."""
+    path = os.path.join(DIST_DIR, rel_path)
+    for candidate in (path + '.br', path + '.gz', path):
+        if os.path.isfile(candidate):
+            return os.path.getsize(candidate)
+    return None
+
+
+def stylesheet_requests(rel_path):
+    """[(url, kind)] of the fonts and images a local stylesheet references, relative to dist/."""
+    path = os.path.join(DIST_DIR, rel_path)
+    if not os.path.isfile(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        css = f.read()
+    found = []
+    for url in CSS_URL_RE.findall(css):
+        target = local_path(url)
+        if target:
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(rel_path), target))
+            ext = os.path.splitext(target)[1].lower()
+            found.append((target, 'font' if ext in FONT_EXTENSIONS else 'image'))
+    return found
+
+
+def logical_name(rel_path):
+    return HASHED_NAME_RE.sub('', rel_path)
+
+
+def audit_page(rel_path, viewport):
+    """Measure one dist/ page; returns its report entry."""
+    with open(os.path.join(DIST_DIR, rel_path), 'r', encoding='utf-8') as f:
+        html = f.read()
+    parser = PageWeightParser(viewport)
+    parser.feed(html)
+    parser.close()
+
+    metrics = {key: 0 for key in ('html_bytes', 'css_bytes', 'js_bytes', 'font_bytes', 'image_bytes',
+                                  'lazy_bytes', 'requests', 'external_requests')}
+    metrics['html_bytes'] = transfer_size(rel_path)
+    metrics['inline_bytes'] = parser.inline_bytes
+    metrics['dom_nodes'] = parser.dom_nodes
+    assets, external, missing = {}, [], []
+    seen = set()
+    # Eager requests first: a file both eager and lazy is fetched up front
+    queue = sorted(parser.requests, key=lambda request: not request[2])
+    while queue:
+        url, kind, eager = queue.pop(0)
+        target = local_path(url)
+        if target is None:
+            if url not in seen and '://' in url:
+                seen.add(url)
+                external.append(url)
+            continue
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(rel_path), target))
+        if target in seen:
+            continue
+        seen.add(target)
+        size = transfer_size(target)
+        if size is None:
+            missing.append(target)
+            continue
+        if not eager:
+            metrics['lazy_bytes'] += size
+            continue
+        assets[logical_name(target)] = {'path': target, 'kind': kind, 'bytes': size}
+        metrics[f'{kind}_bytes'] += size
+        if kind == 'css':
+            queue.extend((url, found_kind, True) for url, found_kind in stylesheet_requests(target))
+
+    metrics['external_requests'] = len(external)
+    metrics['requests'] = 1 + len(assets) + len(external)
+    metrics['eager_bytes'] = metrics['html_bytes'] + sum(a['bytes'] for a in assets.values())
+    return {'metrics': metrics, 'assets': assets, 'external': external, 'missing': missing}
+
+
+def list_pages():
+    """The .html pages in dist/, index.html first."""
+    pages = sorted(f for f in os.listdir(DIST_DIR) if f.endswith('.html'))
+    return sorted(pages, key=lambda p: p != 'index.html')
+
+
+# ============================================
+# BUDGETS AND REPORT
+# ============================================
+
+def load_json_file(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def page_budget(budgets, rel_path):
+    """The budgets of the first pattern under "pages" that matches rel_path ({} if none)."""
+    for pattern, budget in budgets.get('pages', {}).items():
+        if fnmatch.fnmatch(rel_path, pattern):
+            return budget
+    return {}
+
+
+def _kb(size):
+    return f'{size / 1024:.1f} KB'
+
+
+def _value(metric, value):
+    return _kb(value) if metric.endswith('_bytes') else str(value)
+
+
+def _delta(metric, value, previous):
+    if previous is None:
+        return 'new'
+    diff = value - previous
+    if not diff:
+        return '='
+    text = f'{diff / 1024:+.1f} KB' if metric.endswith('_bytes') else f'{diff:+d}'
+    return text + (f' ({diff / previous:+.0%})' if previous else '')
+
+
+def check_page(rel_path, page, budget, last_page):
+    """Print one page's metrics against its budget and the last report;
+    returns the exceeded budgets as messages.
+    """
+    metrics = page['metrics']
+    last_metrics = (last_page or {}).get('metrics', {})
+    limits = {metric: budget[key] * unit for key, (metric, unit) in BUDGET_METRICS.items() if key in budget}
+    failures = []
+    print(f'  📄 {rel_path}')
+    print(f'     {"metric":<20} {"value":>10} {"budget":>10}   {"vs last report":<20}')
+    for metric in ['html_bytes'] + [m for m, _ in BUDGET_METRICS.values()]:
+        value = metrics[metric]
+        limit = limits.get(metric)
+        over = limit is not None and value > limit
+        mark = '❌' if over else '  '
+        budget_text = _value(metric, limit) if limit is not None else '-'
+        delta = _delta(metric, value, last_metrics.get(metric)) if last_page else ''
+        print(f'  {mark} {metric:<20} {_value(metric, value):>10} {budget_text:>10}   {delta}')
+        if over:
+            failures.append(f'{rel_path}: {metric} {_value(metric, value)} > {budget_text}')
+
+    if last_page:
+        last_assets = last_page.get('assets', {})
+        for name, asset in sorted(page['assets'].items(), key=lambda a: -a[1]['bytes']):
+            before = last_assets.get(name)
+            if before is None:
+                print(f'     ➕ {name} ({asset["kind"]}, {_kb(asset["bytes"])})')
+            elif before['bytes'] != asset['bytes']:
+                diff = asset['bytes'] - before['bytes']
+                print(f'     {"📈" if diff > 0 else "📉"} {name} {_kb(before["bytes"])} → '
+                      f'{_kb(asset["bytes"])} ({diff:+d} B)')
+        for name in sorted(last_assets.keys() - page['assets'].keys()):
+            print(f'     ➖ {name} ({_kb(last_assets[name]["bytes"])})')
+    for url in page['external']:
+        print(f'     🌐 {url} (external, not sized)')
+    for target in page['missing']:
+        print(f'     ⚠️  {target} is referenced but not in dist/')
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the first-visit weight of dist/ pages against budgets.')
+    parser.add_argument('--budgets', default=BUDGETS_PATH,
+                        help='budget file (default: budgets.json)')
+    parser.add_argument('--report', metavar='OUT.json', help='also write the measurements as JSON')
+    args = parser.parse_args(argv)
+
+    print('⚖️  Auditing page weight of dist/...')
+    if not os.path.isdir(DIST_DIR):
+        print(f'  ❌ Error: {DIST_DIR} not found! Run package_site.py first.')
+        return 1
+    budgets = load_json_file(args.budgets)
+    if budgets is None:
+        print(f'  ❌ Error: cannot read budgets from {args.budgets}')
+        return 1
+    viewport = {'width': VIEWPORT_WIDTH, 'dpr': DEVICE_PIXEL_RATIO, **budgets.get('viewport', {})}
+    print(f'  📱 Viewport {viewport["width"]}px @{viewport["dpr"]}x')
+
+    last = load_json_file(LAST_REPORT_PATH) or {}
+    if last.get('viewport') != viewport:
+        last = {}  # measured for another device: nothing to compare
+    report = {'viewport': viewport, 'pages': {}}
+    failures = []
+    for rel_path in list_pages():
+        page = audit_page(rel_path, viewport)
+        report['pages'][rel_path] = page
+        failures += check_page(rel_path, page, page_budget(budgets, rel_path),
+                               last.get('pages', {}).get(rel_path))
+    if not last:
+        print('  ℹ️  No earlier report to compare with')
+
+    if args.report:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(dict(report, failures=failures), f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f'  🧾 Page-weight report → {args.report}')
+
+    if failures:
+        for message in failures:
+            print(f'  ❌ Over budget: {message}')
+        print(f'  ❌ {len(failures)} budget(s) exceeded - raise them in '
+              f'{os.path.relpath(args.budgets, SCRIPT_DIR)} if the growth is intended')
+        return 1
+    # Only a passing build becomes the baseline, so a regression stays visible until fixed
+    os.makedirs(os.path.dirname(LAST_REPORT_PATH), exist_ok=True)
+    with open(LAST_REPORT_PATH, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    print(f'  ✅ {len(report["pages"])} page(s) within budget')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
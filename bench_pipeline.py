@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+bench_pipeline.py - Benchmark optimize_images.py and build_site.py on synthetic corpora.
+For each corpus size (--corpora, default 20, 500 and 5,000 photos) a
+throwaway copy of the site is assembled in .bench/run/:
+
+- the pipeline scripts, templates/ and assets/,
+- Pictures/ with that many synthetic photos (--photo-size, gradients,
+  shapes and grain so the encoders do realistic work; the first
+  LOOSE_PHOTOS are loose, the rest in albums of ALBUM_SIZE). Photos are
+  generated once into .bench/corpus/ and hard-linked from there,
+- data/content.json: the real one, with --achievements results and its
+  photo references pointed at the synthetic photos.
+
+Every step runs in a fresh worker process of that copy and is timed cold
+(empty catalog / manifest / build cache, cleared in-process caches) and
+warm (straight after), recording wall time, peak RSS during the step (on
+Linux; elsewhere the worker's peak so far) and bytes written under the
+site copy:
+
+- refresh_catalog,
+- optimize_image over the first --optimize-sample photos (encoding every
+  photo of a 5,000 corpus would take hours; the other photos still get
+  manifest entries, so write_metadata and build_site see the full corpus),
+- write_metadata, replace_sections and each build_* section builder, the
+  gallery shards and the album pages.
+
+Results go to .bench/results/<time>-<commit>.json; --compare prints the
+change against an earlier result file.
+
+Usage: python3 bench_pipeline.py [--corpora 20,500,5000] [--photo-size 2048x1536]
+                                 [--optimize-sample 20] [--achievements 300]
+                                 [--compare .bench/results/OLD.json]
+"""
+
+import argparse
+import contextlib
+import copy
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR = os.path.join(SCRIPT_DIR, '.bench')
+CORPUS_DIR = os.path.join(BENCH_DIR, 'corpus')
+RUN_DIR = os.path.join(BENCH_DIR, 'run')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+JSON_PATH = os.path.join(SCRIPT_DIR, 'data', 'content.json')
+
+# Copied into the site copy the benchmarks run in
+PIPELINE_FILES = ['build_profile.py', 'image_catalog.py', 'image_dedupe.py', 'image_metrics.py',
+                  'optimize_images.py', 'build_site.py', 'bench_pipeline.py']
+PIPELINE_DIRS = ['templates', 'assets']
+
+DEFAULT_CORPORA = [20, 500, 5000]
+DEFAULT_PHOTO_SIZE = (2048, 1536)
+DEFAULT_OPTIMIZE_SAMPLE = 20
+DEFAULT_ACHIEVEMENTS = 300
+
+# Corpus layout: the first LOOSE_PHOTOS in Pictures/, the rest in albums
+LOOSE_PHOTOS = 60
+ALBUM_SIZE = 100
+
+# Synthetic photos: distinct grain backgrounds shared round-robin, unique shapes on top
+BACKGROUNDS = 8
+SHAPES_PER_PHOTO = 40
+PHOTO_QUALITY = 90
+
+# --compare flags steps that got this much slower (relative and absolute,
+# so millisecond-level noise is not reported)
+REGRESSION_RATIO = 0.1
+REGRESSION_MIN_S = 0.005
+
+
+# ============================================
+# Corpus
+# ============================================
+
+def corpus_photo_path(size, index):
+    return os.path.join(CORPUS_DIR, f'{size[0]}x{size[1]}', f'photo-{index:05d}.jpeg')
+
+
+def synthetic_backgrounds(size):
+    """BACKGROUNDS coloured gradients with film-like grain."""
+    from PIL import Image, ImageOps
+
+    rng = random.Random(0)
+    w, h = size
+    backgrounds = []
+    for _ in range(BACKGROUNDS):
+        gradient = Image.linear_gradient('L').resize(size).rotate(rng.uniform(0, 360), Image.BILINEAR)
+        colors = [tuple(rng.randrange(256) for _ in range(3)) for _ in range(2)]
+        grain = Image.effect_noise((w // 2, h // 2), 24).resize(size).convert('RGB')
+        backgrounds.append(Image.blend(ImageOps.colorize(gradient, *colors), grain, 0.15))
+    return backgrounds
+
+
+def ensure_corpus(count, size):
+    """Generate the missing photos 1..count of the cached corpus."""
+    missing = [i for i in range(1, count + 1) if not os.path.isfile(corpus_photo_path(size, i))]
+    if not missing:
+        return
+    from PIL import ImageDraw
+
+    print(f'  🎨 Generating {len(missing)} synthetic {size[0]}x{size[1]} photos → '
+          f'{os.path.relpath(os.path.dirname(corpus_photo_path(size, 1)), SCRIPT_DIR)}/')
+    os.makedirs(os.path.dirname(corpus_photo_path(size, 1)), exist_ok=True)
+    backgrounds = synthetic_backgrounds(size)
+    w, h = size
+    for i in missing:
+        rng = random.Random(i)
+        img = backgrounds[i % BACKGROUNDS].copy()
+        draw = ImageDraw.Draw(img)
+        for _ in range(SHAPES_PER_PHOTO):
+            x, y, s = rng.randrange(w), rng.randrange(h), rng.randrange(w // 40, w // 5)
+            draw.ellipse((x, y, x + s, y + s * rng.uniform(0.3, 1)),
+                         fill=tuple(rng.randrange(256) for _ in range(3)))
+        img.save(corpus_photo_path(size, i), 'JPEG', quality=PHOTO_QUALITY)
+
+
+def corpus_keys(count):
+    """Catalog keys of a corpus: loose photos first, then albums of ALBUM_SIZE."""
+    keys = []
+    for i in range(1, count + 1):
+        if i <= LOOSE_PHOTOS:
+            keys.append(f'photo-{i:05d}.jpeg')
+        else:
+            keys.append(f'album-{(i - LOOSE_PHOTOS - 1) // ALBUM_SIZE + 1:03d}/photo-{i:05d}.jpeg')
+    return keys
+
+
+def synthetic_content(keys, achievements):
+    """The real content.json with achievements results and photos from the corpus."""
+    with open(JSON_PATH, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    data = copy.deepcopy(data)
+    photos = [f'Pictures/{key}' for key in keys]
+    data['hero']['heroImage'] = photos[0]
+    data['bike']['image'] = photos[min(1, len(photos) - 1)]
+    data['motivation']['photos'] = photos[2:4]
+
+    categories = data['achievements']['categories']
+    templates = [(c, r) for c in categories for r in c['results']]
+    for c in categories:
+        c['results'] = []
+    for n in range(achievements):
+        category, result = templates[n % len(templates)]
+        category['results'].append(dict(result, title=f'{result["title"]} #{n + 1}'))
+    return data
+
+
+def prepare_site(count, size, achievements):
+    """Assemble .bench/run/ for a corpus of count photos; returns its path."""
+    if os.path.isdir(RUN_DIR):
+        shutil.rmtree(RUN_DIR)
+    os.makedirs(RUN_DIR)
+    for name in PIPELINE_FILES:
+        shutil.copy2(os.path.join(SCRIPT_DIR, name), os.path.join(RUN_DIR, name))
+    for name in PIPELINE_DIRS:
+        shutil.copytree(os.path.join(SCRIPT_DIR, name), os.path.join(RUN_DIR, name))
+
+    keys = corpus_keys(count)
+    for i, key in enumerate(keys, start=1):
+        dst = os.path.join(RUN_DIR, 'Pictures', key)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        try:
+            os.link(corpus_photo_path(size, i), dst)
+        except OSError:
+            shutil.copy2(corpus_photo_path(size, i), dst)
+
+    os.makedirs(os.path.join(RUN_DIR, 'data'))
+    with open(os.path.join(RUN_DIR, 'data', 'content.json'), 'w', encoding='utf-8') as f:
+        json.dump(synthetic_content(keys, achievements), f, ensure_ascii=False, indent=2)
+    return RUN_DIR
+
+
+# ============================================
+# Worker (runs inside the site copy)
+# ============================================
+
+def tree_state(root):
+    """{path: (size, mtime_ns)} of every file under root."""
+    state = {}
+    for dirpath, _, files in os.walk(root):
+        for fname in files:
+            path = os.path.join(dirpath, fname)
+            st = os.stat(path)
+            state[path] = (st.st_size, st.st_mtime_ns)
+    return state
+
+
+def reset_peak_rss():
+    """Restart the peak RSS count (Linux 4.0+: VmHWM); elsewhere it covers the whole worker."""
+    with contextlib.suppress(OSError):
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+
+
+def peak_rss_mb():
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def measure(results, name, fn, **extra):
+    """Run fn() with its output silenced; append its timings to results and return its value."""
+    before = tree_state(SCRIPT_DIR)
+    reset_peak_rss()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        value = fn()
+        wall = time.perf_counter() - start
+    after = tree_state(SCRIPT_DIR)
+    written = sum(size for path, (size, mtime) in after.items() if before.get(path) != (size, mtime))
+    results.append(dict({'name': name, 'wall_s': round(wall, 4), 'peak_rss_mb': peak_rss_mb(),
+                         'bytes_written': written}, **extra))
+    return value
+
+
+def clear_caches(module):
+    """Empty every functools cache of a module (the cold start of a fresh build)."""
+    for value in vars(module).values():
+        if callable(getattr(value, 'cache_clear', None)):
+            value.cache_clear()
+
+
+def worker_catalog(results, args):
+    import image_catalog
+
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(image_catalog.CATALOG_PATH)
+    measure(results, 'refresh_catalog (cold)', image_catalog.refresh_catalog)
+    measure(results, 'refresh_catalog (warm)', image_catalog.refresh_catalog)
+
+
+def worker_optimize(results, args):
+    import optimize_images
+    from image_catalog import refresh_catalog
+
+    catalog = refresh_catalog()
+    sample = list(catalog)[:args.optimize_sample]
+
+    def run(entries):
+        return {key: optimize_images.optimize_image(os.path.join(optimize_images.PICTURES_DIR, key),
+                                                    key, catalog[key], entries.get(key))
+                for key in sample}
+
+    entries = measure(results, 'optimize_image (cold)', lambda: run({}), images=len(sample))
+    measure(results, 'optimize_image (warm)', lambda: run(entries), images=len(sample))
+
+    # The rest of the corpus gets entries without encoded files: images.json then
+    # lists every photo (with unhashed paths) for write_metadata and build_site
+    manifest = optimize_images.load_manifest()
+    for i, (key, record) in enumerate(catalog.items()):
+        template = entries[sample[i % len(sample)]]
+        manifest['images'][key] = entries.get(key) or {
+            'sha256': record['sha256'], 'width': record['width'], 'height': record['height'],
+            'variants': {}, 'files': {}, 'placeholder': template.get('placeholder'),
+        }
+    optimize_images.save_manifest(manifest)
+    measure(results, 'write_metadata', lambda: optimize_images.write_metadata(manifest))
+
+
+def worker_sections(results, args):
+    import build_site
+    from image_catalog import refresh_catalog
+
+    data = build_site.load_json()
+    catalog = refresh_catalog()
+    images = build_site.discover_images(catalog)
+    albums = build_site.discover_albums(catalog, data)
+    with open(build_site.TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+        template = f.read()
+    with open(build_site.ALBUM_TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+        album_template = f.read()
+
+    def cold_warm(name, fn, reset=None):
+        clear_caches(build_site)
+        if reset:
+            reset()
+        measure(results, f'{name} (cold)', fn)
+        measure(results, f'{name} (warm)', fn)
+
+    cache = {}
+    cold_warm('replace_sections',
+              lambda: build_site.replace_sections(template, data, images, albums, cache),
+              reset=lambda: cache.update(sections={}))
+    for name, builder in build_site.section_builders(data, images, albums).items():
+        cold_warm(f'build_{name}', builder)
+    cold_warm('build_gallery_shards', lambda: build_site.build_gallery_shards(data, images))
+    cold_warm('build_album_page', lambda: [
+        (build_site.build_album_page(album_template, album, data),
+         build_site.build_gallery_shards(data, album['images'], build_site.album_shard_dir(album)))
+        for album in albums])
+
+
+WORKERS = {'catalog': worker_catalog, 'optimize': worker_optimize, 'sections': worker_sections}
+
+
+def run_worker(task, args):
+    results = []
+    WORKERS[task](results, args)
+    print(json.dumps(results))
+    return 0
+
+
+# ============================================
+# Results
+# ============================================
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=SCRIPT_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out + ('-dirty' if dirty else '')
+
+
+def environment():
+    from PIL import __version__ as pillow_version
+
+    return {
+        'python': platform.python_version(),
+        'pillow': pillow_version,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def format_bytes(n):
+    return f'{n / 1024 / 1024:.1f} MB' if n >= 1024 * 1024 else f'{n / 1024:.0f} KB'
+
+
+def print_results(corpus):
+    print(f'  {"step":<32} {"wall":>9} {"peak RSS":>9} {"written":>9}')
+    for r in corpus['steps']:
+        rss = f'{r["peak_rss_mb"]:.0f} MB' if r['peak_rss_mb'] is not None else '-'
+        print(f'  {r["name"]:<32} {r["wall_s"]:>8.3f}s {rss:>9} {format_bytes(r["bytes_written"]):>9}')
+
+
+def compare(old, new):
+    """Print wall time changes of every step present in both result files."""
+    old_steps = {(c['photos'], s['name']): s for c in old['corpora'] for s in c['steps']}
+    print(f'📊 Compared with {old.get("commit") or "?"} ({old.get("date", "?")}):')
+    matched = 0
+    for corpus in new['corpora']:
+        for step in corpus['steps']:
+            before = old_steps.get((corpus['photos'], step['name']))
+            # optimize_image timings only compare over the same sample size
+            if not before or not before['wall_s'] or before.get('images') != step.get('images'):
+                continue
+            matched += 1
+            change = step['wall_s'] / before['wall_s'] - 1
+            slower = change > REGRESSION_RATIO and step['wall_s'] - before['wall_s'] > REGRESSION_MIN_S
+            flag = ' ⚠️' if slower else ''
+            print(f'  {corpus["photos"]:>5} photos  {step["name"]:<32} '
+                  f'{before["wall_s"]:>8.3f}s → {step["wall_s"]:>8.3f}s ({change:+.0%}){flag}')
+    if not matched:
+        print('  ⚠️  No step in common (different corpora or --optimize-sample)')
+
+
+def parse_size(value):
+    w, _, h = value.lower().partition('x')
+    return int(w), int(h)
+
+
+def positive_int(value):
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f'must be at least 1, got {n}')
+    return n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the build pipeline on synthetic corpora.')
+    parser.add_argument('--corpora', default=','.join(map(str, DEFAULT_CORPORA)),
+                        help='comma-separated photo counts (default: %(default)s)')
+    parser.add_argument('--photo-size', type=parse_size, default=DEFAULT_PHOTO_SIZE,
+                        help=f'WxH of the synthetic photos (default: {DEFAULT_PHOTO_SIZE[0]}x{DEFAULT_PHOTO_SIZE[1]})')
+    parser.add_argument('--optimize-sample', type=positive_int, default=DEFAULT_OPTIMIZE_SAMPLE,
+                        help=f'photos per corpus run through optimize_image (default: {DEFAULT_OPTIMIZE_SAMPLE})')
+    parser.add_argument('--achievements', type=int, default=DEFAULT_ACHIEVEMENTS,
+                        help=f'achievement results in the synthetic content.json (default: {DEFAULT_ACHIEVEMENTS})')
+    parser.add_argument('--compare', metavar='RESULTS_JSON', help='earlier result file to compare with')
+    parser.add_argument('--worker', choices=sorted(WORKERS), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return run_worker(args.worker, args)
+
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print('❌ Pillow is required. Install with: pip install Pillow>=10.0.0')
+        return 1
+
+    counts = [int(c) for c in args.corpora.split(',') if c.strip()]
+    result = {
+        'commit': git_commit(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'settings': {'photo_size': list(args.photo_size), 'optimize_sample': args.optimize_sample,
+                     'achievements': args.achievements},
+        'corpora': [],
+    }
+
+    print('⏱️  Benchmarking the build pipeline...')
+    for count in counts:
+        print(f'\n📸 {count} photos ({args.photo_size[0]}x{args.photo_size[1]})')
+        ensure_corpus(count, args.photo_size)
+        site = prepare_site(count, args.photo_size, args.achievements)
+        steps = []
+        for task in ['catalog', 'optimize', 'sections']:
+            cmd = [sys.executable, os.path.join(site, 'bench_pipeline.py'), '--worker', task,
+                   '--optimize-sample', str(min(args.optimize_sample, count))]
+            proc = subprocess.run(cmd, cwd=site, capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(proc.stdout + proc.stderr)
+                print(f'  ❌ {task} benchmark failed')
+                return 1
+            steps.extend(json.loads(proc.stdout.strip().splitlines()[-1]))
+        corpus = {'photos': count, 'steps': steps}
+        result['corpora'].append(corpus)
+        print_results(corpus)
+    shutil.rmtree(RUN_DIR, ignore_errors=True)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(RESULTS_DIR, f'{stamp}-{result["commit"] or "nogit"}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+        f.write('\n')
+    print()
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), result)
+    print(f'  ✅ Results → {os.path.relpath(path, SCRIPT_DIR)}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
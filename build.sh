@@ -3,6 +3,8 @@
 # SITE BUILDER - Nagy Botond Cycling Website
 # ============================================
 # Használat: bash build.sh
+# Fejlesztéshez: python3 watch_site.py (újraépítés mentéskor, élő
+# frissítéssel a http://127.0.0.1:8000/ címen)
 #
 # Ez a script beolvassa a data/content.json tartalmát
 # és a Pictures/ mappa képeit, majd frissíti az index.html-t.
@@ -11,6 +13,13 @@
 SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 cd "$SCRIPT_DIR"
 
-pip install Pillow 2>/dev/null || pip3 install Pillow 2>/dev/null
+# Pillow csak akkor települ, ha még nincs meg (nem minden futáskor)
+python3 -c "import PIL" 2>/dev/null || pip3 install "Pillow>=10.0.0"
 python3 optimize_images.py
 python3 build_site.py
+python3 build_css.py
+python3 package_site.py
+python3 minify_site.py
+# Oldalsúly-ellenőrzés: ha az első betöltés túllépi a budgets.json
+# kereteit, a build hibával áll le
+python3 audit_site.py
@@ -0,0 +1,790 @@
+#!/usr/bin/env python3
+"""
+build_css.py - Build-time Tailwind-compatible stylesheet for the site pages
+Replaces the Tailwind Play CDN (a JIT compiler shipped to every visitor):
+scans the generated index.html, the pages it links to (album pages) and
+their local scripts for class names, resolves the Tailwind utilities they
+use against THEME (incl. the neon-* colors) and writes one purged
+stylesheet to css/tailwind.css, shared by every page.
+Run AFTER build_site.py in the build pipeline.
+
+Only the utility families this site uses are implemented (layout, flex/grid,
+spacing, sizing, typography, colors with /opacity, borders, shadows,
+gradients, transforms, transitions, animations) with the sm/md/lg/xl/2xl,
+hover, focus and group-hover variants. Anything else is reported as
+unresolved rather than silently dropped.
+--profile / --report OUT.json: stage timings (build_profile.py).
+"""
+
+import argparse
+import os
+import posixpath
+import re
+import sys
+from urllib.parse import unquote
+
+from build_profile import BuildReport, add_arguments
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_PATH = os.path.join(SCRIPT_DIR, 'index.html')
+CSS_PATH = os.path.join(SCRIPT_DIR, 'css', 'tailwind.css')
+
+# ============================================
+# THEME (formerly tailwind.config in index.html)
+# ============================================
+
+def _hex(value):
+    value = value.lstrip('#')
+    return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def _palette(**shades):
+    return {shade.lstrip('_'): _hex(v) for shade, v in shades.items()}
+
+
+THEME = {
+    'colors': {
+        'white': _hex('#ffffff'),
+        'black': _hex('#000000'),
+        'neon-blue': _hex('#00D4FF'),
+        'neon-green': _hex('#39FF14'),
+        'dark-bg': _hex('#0a0a1a'),
+        'dark-card': _hex('#1a1a3e'),
+        'gray': _palette(_50='#f9fafb', _100='#f3f4f6', _200='#e5e7eb', _300='#d1d5db',
+                         _400='#9ca3af', _500='#6b7280', _600='#4b5563', _700='#374151',
+                         _800='#1f2937', _900='#111827', _950='#030712'),
+        'red': _palette(_50='#fef2f2', _100='#fee2e2', _200='#fecaca', _300='#fca5a5',
+                        _400='#f87171', _500='#ef4444', _600='#dc2626', _700='#b91c1c',
+                        _800='#991b1b', _900='#7f1d1d', _950='#450a0a'),
+        'orange': _palette(_50='#fff7ed', _100='#ffedd5', _200='#fed7aa', _300='#fdba74',
+                           _400='#fb923c', _500='#f97316', _600='#ea580c', _700='#c2410c',
+                           _800='#9a3412', _900='#7c2d12', _950='#431407'),
+        'amber': _palette(_50='#fffbeb', _100='#fef3c7', _200='#fde68a', _300='#fcd34d',
+                          _400='#fbbf24', _500='#f59e0b', _600='#d97706', _700='#b45309',
+                          _800='#92400e', _900='#78350f', _950='#451a03'),
+        'yellow': _palette(_50='#fefce8', _100='#fef9c3', _200='#fef08a', _300='#fde047',
+                           _400='#facc15', _500='#eab308', _600='#ca8a04', _700='#a16207',
+                           _800='#854d0e', _900='#713f12', _950='#422006'),
+        'green': _palette(_50='#f0fdf4', _100='#dcfce7', _200='#bbf7d0', _300='#86efac',
+                          _400='#4ade80', _500='#22c55e', _600='#16a34a', _700='#15803d',
+                          _800='#166534', _900='#14532d', _950='#052e16'),
+        'blue': _palette(_50='#eff6ff', _100='#dbeafe', _200='#bfdbfe', _300='#93c5fd',
+                         _400='#60a5fa', _500='#3b82f6', _600='#2563eb', _700='#1d4ed8',
+                         _800='#1e40af', _900='#1e3a8a', _950='#172554'),
+        'purple': _palette(_50='#faf5ff', _100='#f3e8ff', _200='#e9d5ff', _300='#d8b4fe',
+                           _400='#c084fc', _500='#a855f7', _600='#9333ea', _700='#7e22ce',
+                           _800='#6b21a8', _900='#581c87', _950='#3b0764'),
+    },
+    'fontFamily': {
+        'sans': 'ui-sans-serif, system-ui, sans-serif, "Apple Color Emoji", "Segoe UI Emoji"',
+        'orbitron': 'Orbitron, sans-serif',
+        'mono': '"Space Mono", monospace',
+        'body': 'Outfit, sans-serif',
+    },
+    'screens': [('sm', 640), ('md', 768), ('lg', 1024), ('xl', 1280), ('2xl', 1536)],
+}
+
+SPACING_STEPS = ['0', '0.5', '1', '1.5', '2', '2.5', '3', '3.5', '4', '5', '6', '7', '8', '9',
+                 '10', '11', '12', '14', '16', '20', '24', '28', '32', '36', '40', '44', '48',
+                 '52', '56', '60', '64', '72', '80', '96']
+SPACING = {step: ('0px' if step == '0' else f'{float(step) * 0.25:g}rem') for step in SPACING_STEPS}
+SPACING['px'] = '1px'
+
+FRACTIONS = {f'{n}/{d}': f'{n / d * 100:g}%' for d in (2, 3, 4, 5, 6, 12) for n in range(1, d)}
+
+FONT_SIZES = {
+    'xs': ('0.75rem', '1rem'), 'sm': ('0.875rem', '1.25rem'), 'base': ('1rem', '1.5rem'),
+    'lg': ('1.125rem', '1.75rem'), 'xl': ('1.25rem', '1.75rem'), '2xl': ('1.5rem', '2rem'),
+    '3xl': ('1.875rem', '2.25rem'), '4xl': ('2.25rem', '2.5rem'), '5xl': ('3rem', '1'),
+    '6xl': ('3.75rem', '1'), '7xl': ('4.5rem', '1'), '8xl': ('6rem', '1'), '9xl': ('8rem', '1'),
+}
+FONT_WEIGHTS = {'thin': 100, 'extralight': 200, 'light': 300, 'normal': 400, 'medium': 500,
+                'semibold': 600, 'bold': 700, 'extrabold': 800, 'black': 900}
+MAX_WIDTHS = {'xs': '20rem', 'sm': '24rem', 'md': '28rem', 'lg': '32rem', 'xl': '36rem',
+              '2xl': '42rem', '3xl': '48rem', '4xl': '56rem', '5xl': '64rem', '6xl': '72rem',
+              '7xl': '80rem', 'full': '100%', 'none': 'none', 'prose': '65ch'}
+TRACKING = {'tighter': '-0.05em', 'tight': '-0.025em', 'normal': '0em', 'wide': '0.025em',
+            'wider': '0.05em', 'widest': '0.1em'}
+LEADING = {'none': '1', 'tight': '1.25', 'snug': '1.375', 'normal': '1.5', 'relaxed': '1.625',
+           'loose': '2', **{str(n): f'{n * 0.25:g}rem' for n in range(3, 11)}}
+RADII = {'none': '0px', 'sm': '0.125rem', '': '0.25rem', 'md': '0.375rem', 'lg': '0.5rem',
+         'xl': '0.75rem', '2xl': '1rem', '3xl': '1.5rem', 'full': '9999px'}
+BLURS = {'none': '0', 'sm': '4px', '': '8px', 'md': '12px', 'lg': '16px', 'xl': '24px',
+         '2xl': '40px', '3xl': '64px'}
+SHADOWS = {
+    'sm': '0 1px 2px 0 {c05}',
+    '': '0 1px 3px 0 {c10}, 0 1px 2px -1px {c10}',
+    'md': '0 4px 6px -1px {c10}, 0 2px 4px -2px {c10}',
+    'lg': '0 10px 15px -3px {c10}, 0 4px 6px -4px {c10}',
+    'xl': '0 20px 25px -5px {c10}, 0 8px 10px -6px {c10}',
+    '2xl': '0 25px 50px -12px {c25}',
+    'inner': 'inset 0 2px 4px 0 {c05}',
+}
+GRADIENT_DIRECTIONS = {'t': 'top', 'tr': 'top right', 'r': 'right', 'br': 'bottom right',
+                       'b': 'bottom', 'bl': 'bottom left', 'l': 'left', 'tl': 'top left'}
+EASINGS = {'linear': 'linear', 'in': 'cubic-bezier(0.4, 0, 1, 1)',
+           'out': 'cubic-bezier(0, 0, 0.2, 1)', 'in-out': 'cubic-bezier(0.4, 0, 0.2, 1)'}
+TRANSITIONS = {
+    '': 'color, background-color, border-color, text-decoration-color, fill, stroke, '
+        'opacity, box-shadow, transform, filter, backdrop-filter',
+    'all': 'all',
+    'colors': 'color, background-color, border-color, text-decoration-color, fill, stroke',
+    'opacity': 'opacity',
+    'shadow': 'box-shadow',
+    'transform': 'transform',
+}
+ANIMATIONS = {
+    'spin': ('spin 1s linear infinite', '@keyframes spin{to{transform:rotate(360deg)}}'),
+    'ping': ('ping 1s cubic-bezier(0, 0, 0.2, 1) infinite',
+             '@keyframes ping{75%,100%{transform:scale(2);opacity:0}}'),
+    'pulse': ('pulse 2s cubic-bezier(0.4, 0, 0.6, 1) infinite',
+              '@keyframes pulse{50%{opacity:.5}}'),
+    'bounce': ('bounce 1s infinite',
+               '@keyframes bounce{0%,100%{transform:translateY(-25%);'
+               'animation-timing-function:cubic-bezier(0.8,0,1,1)}50%{transform:none;'
+               'animation-timing-function:cubic-bezier(0,0,0.2,1)}}'),
+}
+
+TRANSFORM = ('transform: translate(var(--tw-translate-x), var(--tw-translate-y)) '
+             'rotate(var(--tw-rotate)) skewX(var(--tw-skew-x)) skewY(var(--tw-skew-y)) '
+             'scaleX(var(--tw-scale-x)) scaleY(var(--tw-scale-y))')
+BOX_SHADOW = ('box-shadow: var(--tw-ring-offset-shadow, 0 0 #0000), '
+              'var(--tw-ring-shadow, 0 0 #0000), var(--tw-shadow)')
+
+# Tailwind v3 preflight (base reset) plus the default custom properties the
+# transform/shadow/gradient utilities rely on
+PREFLIGHT = '''*,::before,::after{box-sizing:border-box;border-width:0;border-style:solid;border-color:#e5e7eb}
+::before,::after{--tw-content:''}
+html,:host{line-height:1.5;-webkit-text-size-adjust:100%;-moz-tab-size:4;tab-size:4;font-family:ui-sans-serif,system-ui,sans-serif,"Apple Color Emoji","Segoe UI Emoji","Segoe UI Symbol","Noto Color Emoji";font-feature-settings:normal;font-variation-settings:normal;-webkit-tap-highlight-color:transparent}
+body{margin:0;line-height:inherit}
+hr{height:0;color:inherit;border-top-width:1px}
+abbr:where([title]){text-decoration:underline dotted}
+h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit}
+a{color:inherit;text-decoration:inherit}
+b,strong{font-weight:bolder}
+code,kbd,samp,pre{font-family:ui-monospace,SFMono-Regular,Menlo,Monaco,Consolas,"Liberation Mono","Courier New",monospace;font-size:1em}
+small{font-size:80%}
+sub,sup{font-size:75%;line-height:0;position:relative;vertical-align:baseline}
+sub{bottom:-.25em}
+sup{top:-.5em}
+table{text-indent:0;border-color:inherit;border-collapse:collapse}
+button,input,optgroup,select,textarea{font-family:inherit;font-feature-settings:inherit;font-variation-settings:inherit;font-size:100%;font-weight:inherit;line-height:inherit;letter-spacing:inherit;color:inherit;margin:0;padding:0}
+button,select{text-transform:none}
+button,input:where([type='button']),input:where([type='reset']),input:where([type='submit']){-webkit-appearance:button;background-color:transparent;background-image:none}
+:-moz-focusring{outline:auto}
+:-moz-ui-invalid{box-shadow:none}
+progress{vertical-align:baseline}
+::-webkit-inner-spin-button,::-webkit-outer-spin-button{height:auto}
+[type='search']{-webkit-appearance:textfield;outline-offset:-2px}
+::-webkit-search-decoration{-webkit-appearance:none}
+::-webkit-file-upload-button{-webkit-appearance:button;font:inherit}
+summary{display:list-item}
+blockquote,dl,dd,h1,h2,h3,h4,h5,h6,hr,figure,p,pre{margin:0}
+fieldset{margin:0;padding:0}
+legend{padding:0}
+ol,ul,menu{list-style:none;margin:0;padding:0}
+dialog{padding:0}
+textarea{resize:vertical}
+input::placeholder,textarea::placeholder{opacity:1;color:#9ca3af}
+button,[role="button"]{cursor:pointer}
+:disabled{cursor:default}
+img,svg,video,canvas,audio,iframe,embed,object{display:block;vertical-align:middle}
+img,video{max-width:100%;height:auto}
+[hidden]:where(:not([hidden="until-found"])){display:none}
+*,::before,::after{--tw-translate-x:0;--tw-translate-y:0;--tw-rotate:0;--tw-skew-x:0;--tw-skew-y:0;--tw-scale-x:1;--tw-scale-y:1;--tw-ring-offset-shadow:0 0 #0000;--tw-ring-shadow:0 0 #0000;--tw-shadow:0 0 #0000;--tw-shadow-colored:0 0 #0000}
+'''
+
+# Marker / JS hook classes that intentionally carry no styles
+HOOK_CLASSES = {'group', 'mobile-link'}
+
+CLASS_ATTR_RE = re.compile(r'class\s*=\s*["\']([^"\']*)["\']')
+# classList.add('a', 'b') / .remove / .toggle and className = '...' in inline JS
+JS_CLASS_RE = re.compile(r'classList\.(?:add|remove|toggle)\(([^)]*)\)|className\s*=\s*[\'"]([^\'"]*)[\'"]')
+JS_STRING_RE = re.compile(r'[\'"]([^\'"]+)[\'"]')
+STYLE_BLOCK_RE = re.compile(r'<style[^>]*>(.*?)</style>', re.DOTALL)
+CSS_CLASS_RE = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+# Local pages, scripts and stylesheets a page links to
+LOCAL_LINK_RE = re.compile(r'(?:href|src)\s*=\s*["\']([^"\':#?]+\.(?:html|js|css))["\']')
+
+
+# ============================================
+# VALUE PARSING
+# ============================================
+
+def arbitrary(value):
+    """'[88px]' -> '88px' (underscores become spaces), else None."""
+    if value.startswith('[') and value.endswith(']'):
+        return value[1:-1].replace('_', ' ')
+    return None
+
+
+def color(value):
+    """Resolve 'neon-blue', 'gray-300', 'dark-card/30' or '[#123]' to a CSS color."""
+    raw = arbitrary(value)
+    if raw is not None:
+        return raw if raw.startswith(('#', 'rgb', 'hsl')) else None
+
+    name, _, alpha = value.partition('/')
+    if name in ('transparent', 'current', 'inherit'):
+        return {'transparent': 'transparent', 'current': 'currentColor', 'inherit': 'inherit'}[name]
+
+    colors = THEME['colors']
+    rgb = colors.get(name)
+    if not isinstance(rgb, tuple):
+        family, _, shade = name.rpartition('-')
+        rgb = colors.get(family, {}).get(shade) if isinstance(colors.get(family), dict) else None
+    if rgb is None:
+        return None
+
+    if not alpha:
+        return '#%02x%02x%02x' % rgb
+    a = arbitrary(alpha)
+    if a is None:
+        if not alpha.isdigit() or int(alpha) > 100:
+            return None
+        a = f'{int(alpha) / 100:g}'
+    return f'rgb({rgb[0]} {rgb[1]} {rgb[2]} / {a})'
+
+
+def transparent(css_color):
+    """The same color at alpha 0, for gradient fade-outs."""
+    m = re.match(r'rgb\((\d+) (\d+) (\d+)', css_color)
+    if m:
+        return f'rgb({m.group(1)} {m.group(2)} {m.group(3)} / 0)'
+    if css_color.startswith('#') and len(css_color) == 7:
+        r, g, b = _hex(css_color)
+        return f'rgb({r} {g} {b} / 0)'
+    return 'transparent'
+
+
+def spacing(value, negative=False, fractions=False, extra=None):
+    """Spacing-scale value ('4' -> '1rem'), optional fractions / keywords / [arbitrary]."""
+    result = arbitrary(value)
+    if result is None:
+        result = (extra or {}).get(value) or SPACING.get(value)
+        if result is None and fractions:
+            result = FRACTIONS.get(value)
+    if result is None:
+        return None
+    if negative:
+        result = '0px' if result in ('0px', '0') else f'calc({result} * -1)'
+    return result
+
+
+def length(value):
+    """Arbitrary values that look like lengths (for text-[..] / border-[..])."""
+    raw = arbitrary(value)
+    if raw and re.match(r'^-?[\d.]+(px|rem|em|%|vw|vh|ch)$', raw):
+        return raw
+    return None
+
+
+# ============================================
+# UTILITIES
+# ============================================
+
+DISPLAY = {'block': 'block', 'inline-block': 'inline-block', 'inline': 'inline', 'flex': 'flex',
+           'inline-flex': 'inline-flex', 'grid': 'grid', 'inline-grid': 'inline-grid',
+           'contents': 'contents', 'hidden': 'none', 'table': 'table'}
+STATIC = {
+    # position
+    'static': ['position: static'], 'fixed': ['position: fixed'], 'absolute': ['position: absolute'],
+    'relative': ['position: relative'], 'sticky': ['position: sticky'],
+    # flexbox / grid
+    'flex-row': ['flex-direction: row'], 'flex-col': ['flex-direction: column'],
+    'flex-wrap': ['flex-wrap: wrap'], 'flex-nowrap': ['flex-wrap: nowrap'],
+    'flex-1': ['flex: 1 1 0%'], 'flex-auto': ['flex: 1 1 auto'], 'flex-none': ['flex: none'],
+    'shrink-0': ['flex-shrink: 0'], 'grow': ['flex-grow: 1'],
+    'items-start': ['align-items: flex-start'], 'items-end': ['align-items: flex-end'],
+    'items-center': ['align-items: center'], 'items-baseline': ['align-items: baseline'],
+    'items-stretch': ['align-items: stretch'],
+    'justify-start': ['justify-content: flex-start'], 'justify-end': ['justify-content: flex-end'],
+    'justify-center': ['justify-content: center'], 'justify-between': ['justify-content: space-between'],
+    'justify-around': ['justify-content: space-around'], 'justify-evenly': ['justify-content: space-evenly'],
+    'self-center': ['align-self: center'], 'self-start': ['align-self: flex-start'],
+    # typography
+    'italic': ['font-style: italic'], 'not-italic': ['font-style: normal'],
+    'uppercase': ['text-transform: uppercase'], 'lowercase': ['text-transform: lowercase'],
+    'capitalize': ['text-transform: capitalize'], 'underline': ['text-decoration-line: underline'],
+    'no-underline': ['text-decoration-line: none'],
+    'text-left': ['text-align: left'], 'text-center': ['text-align: center'],
+    'text-right': ['text-align: right'], 'text-justify': ['text-align: justify'],
+    'whitespace-nowrap': ['white-space: nowrap'], 'whitespace-pre-line': ['white-space: pre-line'],
+    'truncate': ['overflow: hidden', 'text-overflow: ellipsis', 'white-space: nowrap'],
+    'antialiased': ['-webkit-font-smoothing: antialiased', '-moz-osx-font-smoothing: grayscale'],
+    # misc
+    'overflow-hidden': ['overflow: hidden'], 'overflow-auto': ['overflow: auto'],
+    'overflow-x-hidden': ['overflow-x: hidden'], 'overflow-y-auto': ['overflow-y: auto'],
+    'cursor-pointer': ['cursor: pointer'], 'cursor-default': ['cursor: default'],
+    'pointer-events-none': ['pointer-events: none'], 'pointer-events-auto': ['pointer-events: auto'],
+    'select-none': ['user-select: none'],
+    'object-cover': ['object-fit: cover'], 'object-contain': ['object-fit: contain'],
+    'aspect-square': ['aspect-ratio: 1 / 1'], 'aspect-video': ['aspect-ratio: 16 / 9'],
+    'sr-only': ['position: absolute', 'width: 1px', 'height: 1px', 'padding: 0', 'margin: -1px',
+                'overflow: hidden', 'clip: rect(0, 0, 0, 0)', 'white-space: nowrap', 'border-width: 0'],
+}
+
+# Sides for margin/padding/inset/border utilities
+SIDES = {'': [''], 'x': ['-left', '-right'], 'y': ['-top', '-bottom'], 't': ['-top'],
+         'r': ['-right'], 'b': ['-bottom'], 'l': ['-left']}
+
+# Declaration order in the stylesheet follows Tailwind's plugin order, so e.g.
+# p-4 is emitted before px-6 and a later, more specific utility wins
+ORDER = ['container', 'position', 'inset', 'z', 'margin', 'display', 'aspect', 'size', 'flex',
+         'transform', 'animation', 'cursor', 'misc', 'grid', 'space', 'overflow', 'radius',
+         'border-width', 'border-color', 'background', 'gradient', 'padding', 'typography',
+         'color', 'opacity', 'shadow', 'filter', 'transition']
+
+
+def _margin_padding(kind, rest, negative):
+    sides, _, value = rest.partition('-') if rest[:1] in SIDES and rest[1:2] == '-' else ('', '', rest)
+    v = spacing(value, negative, extra={'auto': 'auto'} if kind == 'margin' else None)
+    if v is None:
+        return None
+    return [f'{kind}{side}: {v}' for side in SIDES[sides]]
+
+
+def resolve(util):
+    """Return (group, declarations, selector_suffix) for one utility, or None."""
+    negative = util.startswith('-')
+    name = util[1:] if negative else util
+
+    if not negative:
+        if name in DISPLAY:
+            return 'display', [f'display: {DISPLAY[name]}'], ''
+        if name in STATIC:
+            group = 'position' if name in ('static', 'fixed', 'absolute', 'relative', 'sticky') else \
+                'flex' if name.startswith(('flex', 'shrink', 'grow', 'items', 'justify', 'self')) else \
+                'typography' if name.startswith(('text', 'italic', 'not-italic', 'upper', 'lower',
+                                                 'capital', 'underline', 'no-under', 'white',
+                                                 'truncate', 'antialiased')) else 'misc'
+            return group, STATIC[name], ''
+
+    prefix, _, value = name.partition('-')
+
+    # inset / top / right / bottom / left
+    if prefix in ('inset', 'top', 'right', 'bottom', 'left'):
+        if name.startswith(('inset-x-', 'inset-y-')):
+            axis, value = name[6], name[8:]
+            props = ['left', 'right'] if axis == 'x' else ['top', 'bottom']
+        else:
+            props = ['inset'] if prefix == 'inset' else [prefix]
+        v = spacing(value, negative, fractions=True, extra={'auto': 'auto', 'full': '100%'})
+        return ('inset', [f'{p}: {v}' for p in props], '') if v else None
+
+    if prefix == 'z' and not negative:
+        v = arbitrary(value) or (value if value in ('0', '10', '20', '30', '40', '50', 'auto') else None)
+        return ('z', [f'z-index: {v}'], '') if v else None
+
+    if prefix in ('m', 'mx', 'my', 'mt', 'mr', 'mb', 'ml'):
+        decls = _margin_padding('margin', prefix[1:] + '-' + value if len(prefix) > 1 else value, negative)
+        return ('margin', decls, '') if decls else None
+
+    if prefix in ('p', 'px', 'py', 'pt', 'pr', 'pb', 'pl') and not negative:
+        decls = _margin_padding('padding', prefix[1:] + '-' + value if len(prefix) > 1 else value, False)
+        return ('padding', decls, '') if decls else None
+
+    if negative and prefix not in ('translate', 'rotate', 'tracking'):
+        return None
+
+    if prefix == 'aspect':
+        v = arbitrary(value) or {'auto': 'auto'}.get(value)
+        return ('aspect', [f'aspect-ratio: {v}'], '') if v else None
+
+    if prefix in ('w', 'h'):
+        prop = 'width' if prefix == 'w' else 'height'
+        extra = {'auto': 'auto', 'full': '100%', 'screen': '100vw' if prefix == 'w' else '100vh',
+                 'fit': 'fit-content', 'min': 'min-content', 'max': 'max-content'}
+        v = spacing(value, fractions=True, extra=extra)
+        return ('size', [f'{prop}: {v}'], '') if v else None
+
+    if name.startswith(('max-w-', 'max-h-', 'min-w-', 'min-h-')):
+        prop = {'max-w': 'max-width', 'max-h': 'max-height',
+                'min-w': 'min-width', 'min-h': 'min-height'}[name[:5]]
+        value = name[6:]
+        if prop == 'max-width':
+            v = arbitrary(value) or MAX_WIDTHS.get(value)
+        else:
+            v = spacing(value, extra={'full': '100%', 'screen': '100vh' if 'h' in name[:5] else '100vw',
+                                      'none': 'none'})
+        return ('size', [f'{prop}: {v}'], '') if v else None
+
+    if prefix == 'translate':
+        axis, _, value = value.partition('-')
+        v = spacing(value, negative, fractions=True, extra={'full': '100%'})
+        if axis not in ('x', 'y') or not v:
+            return None
+        return 'transform', [f'--tw-translate-{axis}: {v}', TRANSFORM], ''
+
+    if prefix == 'rotate':
+        v = arbitrary(value) or (f'{value}deg' if value.isdigit() else None)
+        if not v:
+            return None
+        return 'transform', [f'--tw-rotate: {"-" if negative else ""}{v}', TRANSFORM], ''
+
+    if prefix == 'scale':
+        v = arbitrary(value) or (f'{int(value) / 100:g}' if value.isdigit() else None)
+        return ('transform', [f'--tw-scale-x: {v}', f'--tw-scale-y: {v}', TRANSFORM], '') if v else None
+
+    if prefix == 'animate':
+        if value == 'none':
+            return 'animation', ['animation: none'], ''
+        return ('animation', [f'animation: {ANIMATIONS[value][0]}'], '') if value in ANIMATIONS else None
+
+    if prefix == 'grid' and name.startswith('grid-cols-'):
+        n = name[10:]
+        v = arbitrary(n) or (f'repeat({n}, minmax(0, 1fr))' if n.isdigit() else None)
+        return ('grid', [f'grid-template-columns: {v}'], '') if v else None
+
+    if prefix == 'col' and name.startswith('col-span-'):
+        n = name[9:]
+        v = 'grid-column: 1 / -1' if n == 'full' else f'grid-column: span {n} / span {n}'
+        return ('grid', [v], '') if n.isdigit() or n == 'full' else None
+
+    if prefix == 'gap':
+        axis = ''
+        if value[:2] in ('x-', 'y-'):
+            axis, value = value[0], value[2:]
+        v = spacing(value)
+        prop = {'': 'gap', 'x': 'column-gap', 'y': 'row-gap'}[axis]
+        return ('grid', [f'{prop}: {v}'], '') if v else None
+
+    if prefix == 'space':
+        axis, _, value = value.partition('-')
+        v = spacing(value)
+        if axis not in ('x', 'y') or not v:
+            return None
+        prop = 'margin-top' if axis == 'y' else 'margin-left'
+        return 'space', [f'{prop}: {v}'], ' > :not([hidden]) ~ :not([hidden])'
+
+    if prefix == 'rounded':
+        v = arbitrary(value) or RADII.get(value)
+        return ('radius', [f'border-radius: {v}'], '') if v else None
+
+    if prefix == 'border':
+        if value in ('', '0', '2', '4', '8'):
+            return 'border-width', [f'border-width: {value or 1}px'], ''
+        side, _, width = value.partition('-')
+        if side in ('t', 'r', 'b', 'l', 'x', 'y') and width in ('', '0', '2', '4', '8'):
+            return 'border-width', [f'border{s}-width: {width or 1}px' for s in SIDES[side]], ''
+        if value in ('solid', 'dashed', 'dotted', 'none'):
+            return 'border-width', [f'border-style: {value}'], ''
+        c = color(value)
+        return ('border-color', [f'border-color: {c}'], '') if c else None
+
+    if prefix == 'bg':
+        if value.startswith('gradient-to-'):
+            direction = GRADIENT_DIRECTIONS.get(value[12:])
+            if not direction:
+                return None
+            return 'gradient', [f'background-image: linear-gradient(to {direction}, var(--tw-gradient-stops))'], ''
+        if value in ('cover', 'contain'):
+            return 'background', [f'background-size: {value}'], ''
+        if value == 'none':
+            return 'background', ['background-image: none'], ''
+        c = color(value)
+        return ('background', [f'background-color: {c}'], '') if c else None
+
+    if prefix in ('from', 'via', 'to'):
+        c = color(value)
+        if not c:
+            return None
+        if prefix == 'from':
+            decls = [f'--tw-gradient-from: {c}', f'--tw-gradient-to: {transparent(c)}',
+                     '--tw-gradient-stops: var(--tw-gradient-from), var(--tw-gradient-to)']
+        elif prefix == 'via':
+            decls = [f'--tw-gradient-to: {transparent(c)}',
+                     f'--tw-gradient-stops: var(--tw-gradient-from), {c}, var(--tw-gradient-to)']
+        else:
+            decls = [f'--tw-gradient-to: {c}']
+        return 'gradient', decls, ''
+
+    if prefix == 'font':
+        if value in FONT_WEIGHTS:
+            return 'typography', [f'font-weight: {FONT_WEIGHTS[value]}'], ''
+        if value in THEME['fontFamily']:
+            return 'typography', [f'font-family: {THEME["fontFamily"][value]}'], ''
+        return None
+
+    if prefix == 'text':
+        if value in FONT_SIZES:
+            size, line = FONT_SIZES[value]
+            return 'typography', [f'font-size: {size}', f'line-height: {line}'], ''
+        v = length(value)
+        if v:
+            return 'typography', [f'font-size: {v}'], ''
+        c = color(value)
+        return ('color', [f'color: {c}'], '') if c else None
+
+    if prefix == 'tracking':
+        v = arbitrary(value) or TRACKING.get(value)
+        if not v:
+            return None
+        return 'typography', [f'letter-spacing: {"-" if negative else ""}{v}'], ''
+
+    if prefix == 'leading':
+        v = arbitrary(value) or LEADING.get(value)
+        return ('typography', [f'line-height: {v}'], '') if v else None
+
+    if prefix in ('fill', 'stroke'):
+        c = color(value)
+        return ('color', [f'{prefix}: {c}'], '') if c else None
+
+    if prefix == 'opacity':
+        v = arbitrary(value) or (f'{int(value) / 100:g}' if value.isdigit() and int(value) <= 100 else None)
+        return ('opacity', [f'opacity: {v}'], '') if v else None
+
+    if prefix == 'shadow':
+        if value == 'none':
+            return 'shadow', ['--tw-shadow: 0 0 #0000', '--tw-shadow-colored: 0 0 #0000', BOX_SHADOW], ''
+        if value in SHADOWS:
+            template = SHADOWS[value]
+            plain = template.format(c05='rgb(0 0 0 / 0.05)', c10='rgb(0 0 0 / 0.1)', c25='rgb(0 0 0 / 0.25)')
+            colored = template.format(c05='var(--tw-shadow-color)', c10='var(--tw-shadow-color)',
+                                      c25='var(--tw-shadow-color)')
+            return 'shadow', [f'--tw-shadow: {plain}', f'--tw-shadow-colored: {colored}', BOX_SHADOW], ''
+        c = color(value)
+        # Emitted after the size utilities (see ORDER_SUB) so the color applies
+        return ('shadow-color', [f'--tw-shadow-color: {c}', '--tw-shadow: var(--tw-shadow-colored)'], '') \
+            if c else None
+
+    if prefix == 'backdrop' and value.startswith('blur'):
+        v = BLURS.get(value[5:]) if value != 'blur' else BLURS['']
+        if v is None:
+            return None
+        return 'filter', [f'-webkit-backdrop-filter: blur({v})', f'backdrop-filter: blur({v})'], ''
+
+    if prefix == 'blur' or name == 'blur':
+        v = BLURS.get(value)
+        return ('filter', [f'filter: blur({v})'], '') if v is not None else None
+
+    if prefix == 'transition' or name == 'transition':
+        props = TRANSITIONS.get(value)
+        if props is None:
+            return None
+        return 'transition', [f'transition-property: {props}',
+                              'transition-timing-function: cubic-bezier(0.4, 0, 0.2, 1)',
+                              'transition-duration: 150ms'], ''
+
+    if prefix == 'duration':
+        v = arbitrary(value) or (f'{value}ms' if value.isdigit() else None)
+        return ('transition-timing', [f'transition-duration: {v}'], '') if v else None
+
+    if prefix == 'delay':
+        v = arbitrary(value) or (f'{value}ms' if value.isdigit() else None)
+        return ('transition-timing', [f'transition-delay: {v}'], '') if v else None
+
+    if prefix == 'ease':
+        v = EASINGS.get(value)
+        return ('transition-timing', [f'transition-timing-function: {v}'], '') if v else None
+
+    return None
+
+
+# Sub-groups that must come after their parent group
+ORDER_SUB = {'shadow-color': ('shadow', 1), 'transition-timing': ('transition', 1)}
+
+
+def group_rank(group, util):
+    """Sort key reproducing Tailwind's ordering within one variant layer."""
+    base, sub = ORDER_SUB.get(group, (group, 0))
+    # Shorthands before side-specific forms: p-4 < px-6 < pt-2, border < border-b
+    specificity = 0
+    if group in ('margin', 'padding'):
+        head = util.lstrip('-').split('-')[0]
+        specificity = 0 if len(head) == 1 else 1 if head[1] in 'xy' else 2
+    elif group == 'border-width':
+        specificity = 0 if util.count('-') == 0 or util.split('-')[1].isdigit() else 1
+    return ORDER.index(base), sub, specificity
+
+
+# ============================================
+# VARIANTS / OUTPUT
+# ============================================
+
+PSEUDO_VARIANTS = {'hover': ':hover', 'focus': ':focus', 'focus-visible': ':focus-visible',
+                   'active': ':active', 'disabled': ':disabled', 'first': ':first-child',
+                   'last': ':last-child'}
+STATE_ORDER = ['', 'first', 'last', 'hover', 'focus', 'focus-visible', 'active', 'disabled', 'group-hover']
+
+
+def split_variants(cls):
+    """'md:hover:text-[0.3em]' -> (['md', 'hover'], 'text-[0.3em]'), ignoring ':' inside []."""
+    parts, depth, current = [], 0, ''
+    for ch in cls:
+        if ch == '[':
+            depth += 1
+        elif ch == ']':
+            depth -= 1
+        if ch == ':' and depth == 0:
+            parts.append(current)
+            current = ''
+        else:
+            current += ch
+    parts.append(current)
+    return parts[:-1], parts[-1]
+
+
+def escape_class(cls):
+    """CSS-escape a class name for use in a selector."""
+    out = []
+    for i, ch in enumerate(cls):
+        if ch.isalnum() and ch.isascii() or ch in '-_':
+            if i == 0 and ch.isdigit():
+                out.append(f'\\{ord(ch):x} ')
+            else:
+                out.append(ch)
+        else:
+            out.append('\\' + ch)
+    return ''.join(out)
+
+
+def compile_class(cls):
+    """Return (sort_key, css_rule, keyframes) for a class, or None if unresolved."""
+    variants, util = split_variants(cls)
+    resolved = resolve(util)
+    if resolved is None:
+        return None
+    group, decls, suffix = resolved
+
+    screens = dict(THEME['screens'])
+    screen = None
+    state = ''
+    selector = '.' + escape_class(cls)
+    for variant in variants:
+        if variant in screens and screen is None:
+            screen = variant
+        elif variant in PSEUDO_VARIANTS and not state:
+            state = variant
+            selector += PSEUDO_VARIANTS[variant]
+        elif variant == 'group-hover' and not state:
+            state = variant
+            selector = '.group:hover ' + selector
+        else:
+            return None
+    selector += suffix
+
+    rule = f'{selector}{{{";".join(d.replace(": ", ":", 1) for d in decls)}}}'
+    screen_rank = 0 if screen is None else [s for s, _ in THEME['screens']].index(screen) + 1
+    key = (screen_rank, STATE_ORDER.index(state), group_rank(group, util), cls)
+    keyframes = ANIMATIONS[util[8:]][1] if util.startswith('animate-') and util[8:] in ANIMATIONS else None
+    return key, rule, keyframes, screen
+
+
+def collect_classes(html):
+    """Every class name used in markup (incl. JS template strings) and JS class toggles."""
+    classes = set()
+    for m in CLASS_ATTR_RE.finditer(html):
+        classes.update(m.group(1).split())
+    for m in JS_CLASS_RE.finditer(html):
+        if m.group(1):
+            classes.update(s for s in JS_STRING_RE.findall(m.group(1)))
+        elif m.group(2):
+            classes.update(m.group(2).split())
+    return {c for c in classes if '${' not in c}
+
+
+def stylesheet_classes(css):
+    """Class names defined by a stylesheet."""
+    return set(CSS_CLASS_RE.findall(re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)))
+
+
+def custom_classes(html):
+    """Class names defined by the page's own <style> blocks."""
+    names = set()
+    for block in STYLE_BLOCK_RE.findall(html):
+        names.update(stylesheet_classes(block))
+    return names
+
+
+def site_sources():
+    """Return {repo-relative path: text} of index.html, every local page it
+    links to (transitively) and their local scripts and stylesheets, except
+    the stylesheet written here.
+    """
+    sources = {}
+    queue = ['index.html']
+    while queue:
+        rel_path = queue.pop(0)
+        path = os.path.join(SCRIPT_DIR, rel_path)
+        if rel_path in sources or rel_path == os.path.relpath(CSS_PATH, SCRIPT_DIR) or not os.path.isfile(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            sources[rel_path] = f.read()
+        if rel_path.endswith('.html'):
+            queue.extend(posixpath.normpath(unquote(m)).lstrip('/')
+                         for m in LOCAL_LINK_RE.findall(sources[rel_path]))
+    return sources
+
+
+def build_stylesheet(classes):
+    """Return (css, unresolved_classes)."""
+    compiled, unresolved = [], []
+    for cls in sorted(classes):
+        result = compile_class(cls)
+        if result is None:
+            unresolved.append(cls)
+        else:
+            compiled.append(result)
+    compiled.sort(key=lambda r: r[0])
+
+    parts = [PREFLIGHT]
+    keyframes = sorted({r[2] for r in compiled if r[2]})
+    current_screen = None
+    for _, rule, _, screen in compiled:
+        if screen != current_screen:
+            if current_screen is not None:
+                parts.append('}\n')
+            if screen is not None:
+                parts.append(f'@media (min-width:{dict(THEME["screens"])[screen]}px){{\n')
+            current_screen = screen
+        parts.append(rule + '\n')
+    if current_screen is not None:
+        parts.append('}\n')
+    parts.extend(k + '\n' for k in keyframes)
+    return ''.join(parts), unresolved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build css/tailwind.css from the classes the site uses.')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    with BuildReport('build_css', args) as report:
+        return build(report)
+
+
+def build(report):
+    print('🎨 Building CSS from used classes...')
+    if not os.path.exists(INDEX_PATH):
+        print(f'  ❌ Error: {INDEX_PATH} not found! Run build_site.py first.')
+        return 1
+
+    with report.stage('scan'):
+        sources = site_sources()
+        classes, custom = set(), set()
+        for rel_path, text in sources.items():
+            if rel_path.endswith('.css'):
+                custom |= stylesheet_classes(text)
+                continue
+            classes |= collect_classes(text)
+            custom |= custom_classes(text)
+    with report.stage('generate'):
+        css, unresolved = build_stylesheet(classes - custom - HOOK_CLASSES)
+
+    with report.stage('write'):
+        os.makedirs(os.path.dirname(CSS_PATH), exist_ok=True)
+        with open(CSS_PATH, 'w', encoding='utf-8') as f:
+            f.write(css)
+    report.output('css', len(css.encode('utf-8')))
+
+    pages = sum(p.endswith('.html') for p in sources)
+    print(f'  🔍 {len(classes)} classes used in {pages} page(s) + {len(sources) - pages} linked file(s) '
+          f'({len(classes & custom)} defined in the site\'s own CSS)')
+    if unresolved:
+        print(f'  ⚠️  {len(unresolved)} unresolved: {" ".join(unresolved)}')
+    print(f'  ✅ Done! css/tailwind.css written ({len(css.encode("utf-8")) / 1024:.1f} KB)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,27 +9,25 @@ Használat: python3 build_gallery.py
 """
 
 import os
+import posixpath
 import re
 import sys
 
+from image_catalog import PICTURES_DIR as CATALOG_DIR, refresh_catalog
+
 PICTURES_DIR = "Pictures"
 HTML_FILE = "index.html"
 FIRST_ROW_COUNT = 5  # Az első sorban ennyi kép lesz (photo-grid)
-IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
 
 
 def find_images(directory):
-    """Képfájlok keresése a megadott mappában."""
-    images = []
-    if not os.path.isdir(directory):
-        return images
-
-    for filename in sorted(os.listdir(directory)):
-        ext = os.path.splitext(filename)[1].lower()
-        if ext in IMAGE_EXTENSIONS:
-            images.append(os.path.join(directory, filename))
-
-    return images
+    """A directory mappa képfájljainak listája a közös képkatalógusból
+    (image_catalog.py). A Pictures/ mappánál csak a közvetlen képek; az album
+    almappákat a build_site.py kezeli. A Pictures/-on kívüli mappa üres listát ad."""
+    folder = os.path.relpath(os.path.abspath(directory), CATALOG_DIR)
+    folder = '' if folder == '.' else folder.replace(os.sep, '/')
+    return [os.path.join(directory, posixpath.basename(key)) for key in refresh_catalog()
+            if posixpath.dirname(key) == folder]
 
 
 def generate_gallery_html(images):
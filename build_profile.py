@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+build_profile.py - Timing report shared by the build entry points.
+optimize_images.py, build_site.py, build_css.py, package_site.py and
+minify_site.py accept:
+
+  --profile          print the report below when done, plus the hottest
+                     functions under cProfile
+  --report OUT.json  write the report as JSON (with --profile: including
+                     the hottest functions)
+
+The report holds per-stage wall times, per-image timings (optimize_images.py:
+decode, resize, encode per format, write), encoder output sizes per format,
+cache hit/miss counts (image catalog, variant manifest, section cache, ...)
+and the peak memory of the process (and, separately, of its largest worker
+process). Without either flag nothing is printed
+or written, and the bookkeeping costs a few perf_counter() calls.
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+# Functions listed by --profile, by cumulative time
+PROFILE_TOP = 20
+# Slowest images listed by --profile
+SLOWEST_IMAGES = 5
+
+
+def add_arguments(parser):
+    """Add --profile and --report to an entry point's argument parser."""
+    parser.add_argument('--profile', action='store_true',
+                        help='print per-stage timings, cache hits and the hottest functions (cProfile)')
+    parser.add_argument('--report', metavar='OUT.json',
+                        help='write per-stage/per-image timings, output sizes, cache hits and peak memory as JSON')
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process and its finished children (MB), or None."""
+    if resource is None:
+        return None
+    # kilobytes on Linux, bytes on macOS
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(own / unit, 1), round(children / unit, 1)
+
+
+class BuildReport:
+    """Collects timings of one entry point run; used as a context manager
+    around its work, which prints/writes the report on exit.
+    """
+
+    def __init__(self, tool, args=None):
+        self.tool = tool
+        self.profile = bool(args and args.profile)
+        self.path = args.report if args else None
+        self.stages = {}
+        self.images = {}
+        self.outputs = {}
+        self.cache = {}
+        self._profiler = None
+        self._start = None
+
+    @property
+    def enabled(self):
+        return self.profile or bool(self.path)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time a block; repeated stages add up."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, hits=0, misses=0):
+        """Add cache hits/misses under name."""
+        counts = self.cache.setdefault(name, {'hit': 0, 'miss': 0})
+        counts['hit'] += hits
+        counts['miss'] += misses
+
+    def output(self, kind, size):
+        """Add one written file of kind (e.g. an encoder format) and its size in bytes."""
+        totals = self.outputs.setdefault(kind, {'files': 0, 'bytes': 0})
+        totals['files'] += 1
+        totals['bytes'] += size
+
+    def add_image(self, key, timings, sizes=None):
+        """Per-image timings {step: seconds} and output sizes {format: bytes}."""
+        self.images[key] = {'seconds': {k: round(v, 4) for k, v in timings.items()},
+                            'total': round(sum(timings.values()), 4)}
+        if sizes:
+            self.images[key]['bytes'] = sizes
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self._profiler:
+            self._profiler.disable()
+        if self.enabled:
+            self.finish(time.perf_counter() - self._start)
+        return False
+
+    def hottest(self):
+        """[(function, calls, own seconds, cumulative seconds)] of the cProfile run."""
+        stats = pstats.Stats(self._profiler, stream=io.StringIO()).sort_stats('cumulative')
+        rows = []
+        for func in stats.fcn_list[:PROFILE_TOP]:
+            calls, _, own, cumulative, _ = stats.stats[func]
+            filename, line, name = func
+            where = f'{os.path.basename(filename)}:{line}' if line else filename
+            rows.append((f'{where}({name})', calls, round(own, 4), round(cumulative, 4)))
+        return rows
+
+    def as_dict(self, total):
+        own, children = peak_rss_mb() or (None, None)
+        report = {
+            'tool': self.tool,
+            'seconds': round(total, 4),
+            'stages': {k: round(v, 4) for k, v in self.stages.items()},
+            'cache': self.cache,
+            'outputs': self.outputs,
+            'peak_rss_mb': own,
+            'peak_rss_children_mb': children,
+            'images': self.images,
+        }
+        if self._profiler:
+            report['hottest'] = [dict(zip(('function', 'calls', 'own_s', 'cumulative_s'), row))
+                                 for row in self.hottest()]
+        return report
+
+    def finish(self, total):
+        report = self.as_dict(total)
+        if self.profile:
+            self.print_report(report)
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+                f.write('\n')
+            print(f'  🧾 Build report → {self.path}')
+
+    def print_report(self, report):
+        print(f'  ⏱️  {self.tool}: {report["seconds"]:.2f}s')
+        for name, seconds in sorted(report['stages'].items(), key=lambda s: -s[1]):
+            print(f'     {name:<28} {seconds:>8.3f}s')
+        for name, counts in report['cache'].items():
+            if counts['hit'] or counts['miss']:
+                print(f'     cache {name:<22} {counts["hit"]:>5} hit / {counts["miss"]} miss')
+        for kind, totals in report['outputs'].items():
+            print(f'     {kind:<28} {totals["files"]:>5} files, {totals["bytes"] / 1024:.0f} KB')
+        worked = [i for i in report['images'].items() if i[1]['total']]
+        slowest = sorted(worked, key=lambda i: -i[1]['total'])[:SLOWEST_IMAGES]
+        for key, image in slowest:
+            steps = ', '.join(f'{k} {v:.2f}s' for k, v in image['seconds'].items())
+            print(f'     🐢 {key}: {image["total"]:.2f}s ({steps})')
+        if report['peak_rss_mb'] is not None:
+            print(f'     peak memory {report["peak_rss_mb"]:.0f} MB')
+        for row in report.get('hottest', []):
+            print(f'     🔥 {row["cumulative_s"]:>8.3f}s cum {row["own_s"]:>8.3f}s own '
+                  f'{row["calls"]:>7}x {row["function"]}')
@@ -1,19 +1,89 @@
 #!/usr/bin/env python3
 """
 build_site.py - JSON → HTML generator for Nagy Botond Cycling Website
-Reads data/content.json and replaces SECTION markers in index.html
-Also auto-discovers gallery images from Pictures/ folder
+Reads data/content.json, fills the SECTION markers of templates/index.html
+and writes the result to index.html (the template is never modified, so
+repeated builds are idempotent).
+Sections whose inputs (their content.json slice, image metadata and the
+builder code) are unchanged are reused from .build-cache/sections.json.
+Also auto-discovers gallery images from Pictures/ folder: the first page is
+inlined, the rest goes to JSON shards in gallery/ that the page loads on
+demand. Each subfolder of Pictures/ is an album: the main gallery shows one
+cover tile per album, linking to album-<slug>.html (rendered from
+templates/album.html, paged the same way). Near-duplicate photos
+(image_dedupe.py) are reported, and with gallery.hideDuplicates only the best
+frame of each cluster is shown. Finally writes sw.js (from templates/sw.js)
+with a precache list of what the page references.
+--profile / --report OUT.json (build_profile.py) time each stage and count
+catalog, section cache and output file hits.
 """
 
+import argparse
+import functools
+import hashlib
 import json
+import math
 import os
 import re
 import sys
+import unicodedata
+from urllib.parse import quote
+
+from build_profile import BuildReport, add_arguments
+from image_catalog import refresh_catalog
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_PATH = os.path.join(SCRIPT_DIR, 'templates', 'index.html')
 INDEX_PATH = os.path.join(SCRIPT_DIR, 'index.html')
+SW_TEMPLATE_PATH = os.path.join(SCRIPT_DIR, 'templates', 'sw.js')
+SW_PATH = os.path.join(SCRIPT_DIR, 'sw.js')
+ALBUM_TEMPLATE_PATH = os.path.join(SCRIPT_DIR, 'templates', 'album.html')
+ALBUM_PAGE_PREFIX = 'album-'
+GALLERY_SHARD_DIR = 'gallery'
 JSON_PATH = os.path.join(SCRIPT_DIR, 'data', 'content.json')
 PICTURES_DIR = os.path.join(SCRIPT_DIR, 'Pictures')
+IMAGES_META_PATH = os.path.join(PICTURES_DIR, 'optimized', 'images.json')
+BUILD_CACHE_PATH = os.path.join(SCRIPT_DIR, '.build-cache', 'sections.json')
+
+# Largest ladder width offered in srcset, and the width used for the plain
+# <img src> fallback, per display tier (widths come from optimize_images.WIDTHS)
+TIER_MAX_WIDTH = {'thumb': 800, 'medium': 1600, 'full': 2048}
+TIER_FALLBACK_WIDTH = {'thumb': 800, 'medium': 1200, 'full': 1200}
+
+# Smallest width the lightbox is offered: it fills most of the screen, so
+# even a phone needs about this many device pixels
+LIGHTBOX_MIN_WIDTH = 1200
+
+# <source> formats in order of preference; the JPEG <img> is the fallback
+SOURCE_FORMATS = ['avif', 'webp']
+
+# <img sizes> per layout slot, matching the CSS widths in index.html
+IMAGE_SIZES = {
+    'hero': '(min-width: 480px) 448px, calc(100vw - 2rem)',
+    'gallery-wide': '(min-width: 1152px) 732px, (min-width: 769px) 66vw, calc(100vw - 2rem)',
+    'gallery': '(min-width: 1152px) 360px, (min-width: 769px) 33vw, 50vw',
+    'gallery-rest': '(min-width: 1152px) 270px, (min-width: 768px) 25vw, 50vw',
+    'bike': '(min-width: 544px) 448px, calc(100vw - 5rem)',
+    'motivation': '(min-width: 896px) 416px, calc(50vw - 1.5rem)',
+}
+
+# Gallery paging defaults; overridden by gallery.pageSize / gallery.shardSize
+# in content.json. The first page (incl. the 5-tile photo grid) is inlined.
+GALLERY_PAGE_SIZE = 13
+GALLERY_SHARD_SIZE = 12
+GALLERY_GRID_COUNT = 5
+
+# Album cover tiles on the main page (3 per row on desktop)
+ALBUM_COVER_SIZES = '(min-width: 1152px) 360px, (min-width: 768px) 33vw, 50vw'
+
+SITE_URL = 'https://botondnagy.eu/'
+
+# Local stylesheets / scripts / logos the page links to: the precached shell
+SHELL_ASSET_RE = re.compile(r'(?:href|src)="([^":#?]+\.(?:css|js|svg))"')
+
+# The hero box is 448 x 420 CSS px with object-fit: cover, so a landscape
+# photo is rendered wider than the box
+HERO_BOX = (448, 420)
 
 
 def load_json():
@@ -21,57 +91,224 @@ def load_json():
         return json.load(f)
 
 
-def discover_images():
-    """Auto-discover images from Pictures/ folder (top-level files only)"""
-    if not os.path.isdir(PICTURES_DIR):
+def discover_images(catalog):
+    """Loose gallery images (top-level files of Pictures/), from the shared image catalog"""
+    return [fname for fname in catalog if '/' not in fname]
+
+
+def find_duplicates(catalog):
+    """Near-duplicate clusters of the catalog (image_dedupe.py), reported as
+    they are found; [] when NumPy is not installed.
+    """
+    try:
+        from image_dedupe import duplicate_clusters, print_clusters
+    except ImportError:
+        print('  ⚠️  NumPy not installed - skipping the near-duplicate check')
         return []
-    exts = {'.jpg', '.jpeg', '.png', '.webp'}
-    images = []
-    for fname in sorted(os.listdir(PICTURES_DIR)):
-        fpath = os.path.join(PICTURES_DIR, fname)
-        if os.path.isfile(fpath) and os.path.splitext(fname)[1].lower() in exts:
-            images.append(fname)
-    return images
-
-
-def get_optimized_path(original_path, size, fmt):
-    """Convert 'Pictures/IMG_1952.jpeg' to optimized path.
-    size: 'thumb' or 'medium'
-    fmt: 'jpeg' or 'webp'
+    clusters = duplicate_clusters(catalog)
+    print_clusters(clusters)
+    return clusters
+
+
+def visible_catalog(catalog, data):
+    """The catalog without the near-duplicates gallery.hideDuplicates leaves
+    out (all of it when the setting is off); clusters are reported either way.
     """
-    fname = os.path.basename(original_path)
-    stem = os.path.splitext(fname)[0]
-    if fmt == 'webp':
-        return f'Pictures/optimized/{size}-webp/{stem}.webp'
+    clusters = find_duplicates(catalog)
+    if clusters and data.get('gallery', {}).get('hideDuplicates'):
+        hidden = {key for cluster in clusters for key in cluster['images'][1:]}
+        catalog = {key: record for key, record in catalog.items() if key not in hidden}
+        print(f'  🙈 {len(hidden)} near-duplicate(s) left out of the gallery (gallery.hideDuplicates)')
+    return catalog
+
+
+def album_slug(name):
+    """'2025 Pilis-kupa' -> '2025-pilis-kupa' (ASCII, safe in a file name and URL)."""
+    ascii_name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', ascii_name.lower()).strip('-') or 'album'
+
+
+def discover_albums(catalog, data):
+    """Albums (subfolders of Pictures/), newest first, from the shared image catalog.
+    Photos are ordered by EXIF capture date, then name. Title and cover can be
+    set per folder in content.json (gallery.albums.<folder>.title / .cover);
+    the defaults are the folder name and the first photo.
+    """
+    settings = data.get('gallery', {}).get('albums', {})
+    folders = {}
+    for key, record in catalog.items():
+        folder, sep, _ = key.partition('/')
+        if sep:
+            folders.setdefault(folder, []).append((record.get('taken') or '', key))
+
+    albums, slugs = [], set()
+    for folder, photos in folders.items():
+        photos.sort()
+        images = [key for _, key in photos]
+        dates = [taken for taken, _ in photos if taken]
+        options = settings.get(folder, {})
+        cover = options.get('cover')
+        cover = f'{folder}/{cover}' if cover and f'{folder}/{cover}' in images else images[0]
+        slug = base = album_slug(folder)
+        n = 2
+        while slug in slugs:  # 'Pilis kupa' and 'pilis-kupa'
+            slug, n = f'{base}-{n}', n + 1
+        slugs.add(slug)
+        albums.append({
+            'folder': folder,
+            'slug': slug,
+            'title': options.get('title') or re.sub(r'[-_]+', ' ', folder).strip(),
+            'page': f'{ALBUM_PAGE_PREFIX}{slug}.html',
+            'images': images,
+            'cover': cover,
+            'dates': [dates[0][:10], dates[-1][:10]] if dates else None,
+        })
+    # Newest album first; undated ones last, by name
+    albums.sort(key=lambda a: a['folder'])
+    albums.sort(key=lambda a: (a['dates'] or [''])[-1], reverse=True)
+    return albums
+
+
+@functools.lru_cache(maxsize=None)
+def load_images_json():
+    """Load images.json written by optimize_images.py ({} if it has not run)."""
+    try:
+        with open(IMAGES_META_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_image_meta():
+    """Per-source entries of images.json."""
+    return load_images_json().get('images', {})
+
+
+def load_asset_map():
+    """Logical variant path -> content-hashed path, from images.json."""
+    return load_images_json().get('assets', {})
+
+
+def image_info(original_path):
+    """Return the images.json entry for 'Pictures/...' or None."""
+    return load_image_meta().get(os.path.relpath(original_path, 'Pictures').replace(os.sep, '/'))
+
+
+def get_optimized_path(original_path, width, fmt):
+    """Convert 'Pictures/IMG_1952.jpeg' to the optimized path of one ladder width.
+    fmt: 'jpeg', 'webp' or 'avif'
+    """
+    # Album photos keep their folder: Pictures/album/IMG.jpeg -> 800/album/IMG.jpeg
+    stem = os.path.splitext(os.path.relpath(original_path, 'Pictures').replace(os.sep, '/'))[0]
+    if fmt == 'jpeg':
+        logical = f'Pictures/optimized/{width}/{stem}.jpeg'
     else:
-        return f'Pictures/optimized/{size}/{stem}.jpeg'
+        logical = f'Pictures/optimized/{width}-{fmt}/{stem}.{fmt}'
+    return load_asset_map().get(logical, logical)
+
+
+def tier_candidates(info, fmt, size):
+    """Variants of one format that belong in the srcset of a display tier."""
+    variants = info['variants'].get(fmt, [])
+    return [v for v in variants if v['width'] <= TIER_MAX_WIDTH[size]] or variants[:1]
 
 
-def picture_element(original_path, size, alt, extra_attrs='', indent=20, data_full=False):
-    """Generate a <picture> element with WebP source and JPEG fallback.
-    size: 'thumb' or 'medium'
-    data_full: if True, adds data-full-jpeg attr pointing to medium version (for lightbox)
+def fallback_variant(candidates, size):
+    """Largest candidate not wider than the tier's fallback width."""
+    fitting = [v for v in candidates if v['width'] <= TIER_FALLBACK_WIDTH[size]]
+    return (fitting or candidates)[-1]
+
+
+def srcset(candidates):
+    # srcset is whitespace/comma separated, so paths like 'XVIII. Pilis kupa' must be escaped
+    return ', '.join(f'{quote(v["path"])} {v["width"]}w' for v in candidates)
+
+
+def lightbox_candidates(info, fmt):
+    """Variants of one format the lightbox chooses from ('full' tier, LIGHTBOX_MIN_WIDTH and up)."""
+    candidates = tier_candidates(info, fmt, 'full')
+    return [v for v in candidates if v['width'] >= LIGHTBOX_MIN_WIDTH] or candidates[-1:]
+
+
+def lightbox_sources(info):
+    """Return ({fmt: srcset}, (width, height)) for the lightbox: per-format
+    candidates plus the pixel size of the largest one (for its aspect ratio).
+    """
+    largest = lightbox_candidates(info, 'jpeg')[-1]
+    return ({fmt: srcset(lightbox_candidates(info, fmt)) for fmt in info['variants']},
+            (largest['width'], largest['height']))
+
+
+def cover_sizes(original_path, box_w, box_h, default):
+    """sizes for an object-fit: cover box: wider-than-box photos are scaled to
+    the box height, so they need box_h * aspect CSS px rather than box_w.
+    """
+    info = image_info(original_path)
+    if not info:
+        return default
+    needed = math.ceil(box_h * info['width'] / info['height'])
+    return f'{needed}px' if needed > box_w else default
+
+
+def picture_element(original_path, size, alt, extra_attrs='', indent=20, data_full=False, sizes='100vw',
+                    placeholder=False):
+    """Generate a responsive <picture>: AVIF/WebP sources plus a JPEG <img>, all with
+    w-descriptor srcsets. Formats missing from images.json are skipped.
+    size: 'thumb' or 'medium' (caps the srcset and picks the src fallback)
+    sizes: the <img sizes> attribute, usually one of IMAGE_SIZES
+    data_full: if True, adds the lightbox attributes: data-full-jpeg (the 1200px
+        JPEG fallback), data-full-srcset-<fmt> per format and data-full-width/-height
+    placeholder: if True, inlines the tiny blurred preview as the <img> background
     """
     pad = ' ' * indent
-    webp_src = get_optimized_path(original_path, size, 'webp')
-    jpeg_src = get_optimized_path(original_path, size, 'jpeg')
+    info = image_info(original_path)
 
     data_attr = ''
     if data_full:
-        medium_jpeg = get_optimized_path(original_path, 'medium', 'jpeg')
+        medium_jpeg = get_optimized_path(original_path, TIER_FALLBACK_WIDTH['medium'], 'jpeg')
+        if info:
+            medium_jpeg = fallback_variant(info['variants']['jpeg'], 'medium')['path']
         data_attr = f' data-full-jpeg="{medium_jpeg}"'
+        if info:
+            full_srcsets, (full_w, full_h) = lightbox_sources(info)
+            data_attr += ''.join(f' data-full-srcset-{fmt}="{value}"' for fmt, value in full_srcsets.items())
+            data_attr += f' data-full-width="{full_w}" data-full-height="{full_h}"'
 
     extra = f' {extra_attrs}' if extra_attrs else ''
+
+    if not info:
+        # optimize_images.py has not seen this file: single-width markup
+        print(f'  ⚠️  No optimized variants for {original_path} - run optimize_images.py')
+        width = TIER_FALLBACK_WIDTH[size]
+        return (
+            f'{pad}<picture>\n'
+            f'{pad}    <source srcset="{get_optimized_path(original_path, width, "webp")}" type="image/webp">\n'
+            f'{pad}    <img src="{get_optimized_path(original_path, width, "jpeg")}" alt="{alt}"{extra}{data_attr}>\n'
+            f'{pad}</picture>'
+        )
+
+    if placeholder and info.get('placeholder'):
+        # Painted until the real image decodes on top of it; no extra request
+        extra += f' style="background: url({info["placeholder"]}) center / cover no-repeat"'
+
+    sources = ''.join(
+        f'{pad}    <source type="image/{fmt}" srcset="{srcset(tier_candidates(info, fmt, size))}" sizes="{sizes}">\n'
+        for fmt in SOURCE_FORMATS if fmt in info['variants']
+    )
+    jpeg = tier_candidates(info, 'jpeg', size)
+    fallback = fallback_variant(jpeg, size)
     return (
         f'{pad}<picture>\n'
-        f'{pad}    <source srcset="{webp_src}" type="image/webp">\n'
-        f'{pad}    <img src="{jpeg_src}" alt="{alt}"{extra}{data_attr}>\n'
+        f'{sources}'
+        f'{pad}    <img src="{fallback["path"]}" srcset="{srcset(jpeg)}" sizes="{sizes}" '
+        f'width="{fallback["width"]}" height="{fallback["height"]}" alt="{alt}"{extra}{data_attr}>\n'
         f'{pad}</picture>'
     )
 
 
 def build_hero(data):
     hero = data['hero']
+    hero_sizes = cover_sizes(hero['heroImage'], *HERO_BOX, IMAGE_SIZES['hero'])
     return f'''            <!-- Fő név -->
             <h1 class="hero-content font-orbitron text-5xl sm:text-7xl md:text-8xl lg:text-9xl font-black tracking-tight leading-none mb-4 neon-text neon-glow-pulse text-white">
                 {hero['name']}
@@ -95,7 +332,7 @@ def build_hero(data):
             <!-- Fő fotó -->
             <div class="hero-content-delay mt-10 mx-auto max-w-md">
                 <div class="hero-image aspect-[3/4] max-h-[420px] mx-auto shadow-2xl shadow-neon-blue/10">
-{picture_element(hero['heroImage'], 'medium', f"{hero['name']} verseny közben", 'loading="eager"', indent=20)}
+{picture_element(hero['heroImage'], 'medium', f"{hero['name']} verseny közben", 'loading="eager"', indent=20, sizes=hero_sizes, placeholder=True)}
                 </div>
             </div>'''
 
@@ -229,28 +466,106 @@ def build_achievements(data):
     return '\n'.join(parts)
 
 
-def build_gallery(images):
-    """Build gallery HTML from image list"""
-    if not images:
+def gallery_paging(data):
+    """Return (page_size, shard_size) from content.json's gallery settings."""
+    settings = data.get('gallery', {})
+    page_size = max(GALLERY_GRID_COUNT, int(settings.get('pageSize', GALLERY_PAGE_SIZE)))
+    return page_size, max(1, int(settings.get('shardSize', GALLERY_SHARD_SIZE)))
+
+
+def gallery_shard_paths(data, images, shard_dir=GALLERY_SHARD_DIR):
+    """Repo-relative paths of the JSON shards holding images beyond the first page."""
+    page_size, shard_size = gallery_paging(data)
+    count = math.ceil(max(0, len(images) - page_size) / shard_size)
+    return [f'{shard_dir}/page-{n + 2}.json' for n in range(count)]
+
+
+def gallery_shard_entry(fname):
+    """One lazily loaded gallery tile: everything the page script needs to
+    render the same <picture> as picture_element(..., 'thumb', data_full=True).
+    """
+    original_path = f'Pictures/{fname}'
+    info = image_info(original_path)
+    if not info:
+        print(f'  ⚠️  No optimized variants for {original_path} - left out of the gallery shards')
+        return None
+    jpeg = tier_candidates(info, 'jpeg', 'thumb')
+    fallback = fallback_variant(jpeg, 'thumb')
+    full_srcsets, (full_w, full_h) = lightbox_sources(info)
+    return {
+        'src': fallback['path'],
+        'width': fallback['width'],
+        'height': fallback['height'],
+        'srcset': {fmt: srcset(tier_candidates(info, fmt, 'thumb')) for fmt in info['variants']},
+        'full': fallback_variant(info['variants']['jpeg'], 'medium')['path'],
+        'fullSrcset': full_srcsets,
+        'fullWidth': full_w,
+        'fullHeight': full_h,
+        'placeholder': info.get('placeholder'),
+        'alt': 'Nagy Botond',
+    }
+
+
+def build_gallery_shards(data, images, shard_dir=GALLERY_SHARD_DIR):
+    """Return {shard path: shard JSON} for every image past the first page."""
+    page_size, shard_size = gallery_paging(data)
+    shards = {}
+    for n, path in enumerate(gallery_shard_paths(data, images, shard_dir)):
+        start = page_size + n * shard_size
+        entries = [gallery_shard_entry(fname) for fname in images[start:start + shard_size]]
+        shards[path] = json.dumps({'images': [e for e in entries if e]}, indent=2, ensure_ascii=False)
+    return shards
+
+
+def build_album_tiles(albums):
+    """One cover tile per album, linking to its page"""
+    lines = ['            <div class="grid grid-cols-2 md:grid-cols-3 gap-3 mb-3 reveal">']
+    for album in albums:
+        count = len(album['images'])
+        lines.append(f'                <a href="{quote(album["page"])}" class="album-tile">')
+        lines.append(picture_element(f'Pictures/{album["cover"]}', 'thumb', album['title'], 'loading="lazy"', indent=20, sizes=ALBUM_COVER_SIZES, placeholder=True))
+        lines.append(f'                    <span class="album-caption"><span class="album-title">{album["title"]}</span>'
+                     f'<span class="album-count">{count} fotó</span></span>')
+        lines.append('                </a>')
+    lines.append('            </div>')
+    return '\n'.join(lines)
+
+
+def build_gallery(images, data, albums=(), shard_dir=GALLERY_SHARD_DIR):
+    """Build gallery HTML: album cover tiles, then the first page of loose
+    images; later pages load from JSON shards"""
+    if not images and not albums:
         return '            <p class="text-gray-400 text-center">Nincs kép a galériában.</p>'
 
-    grid_images = images[:5]
-    rest_images = images[5:]
+    page_size, _ = gallery_paging(data)
+    shard_paths = gallery_shard_paths(data, images, shard_dir)
+    grid_images = images[:GALLERY_GRID_COUNT]
+    rest_images = images[GALLERY_GRID_COUNT:page_size]
 
-    lines = ['            <div class="photo-grid reveal">']
-    for fname in grid_images:
+    lines = [build_album_tiles(albums)] if albums else []
+    if not images:
+        return '\n'.join(lines)
+    lines.append('            <div class="photo-grid reveal">')
+    for i, fname in enumerate(grid_images):
+        # Tiles 1 and 5 span two grid columns (see .photo-grid in index.html)
+        slot = 'gallery-wide' if i in (0, 4) else 'gallery'
         lines.append(f'                <div class="gallery-img">')
-        lines.append(picture_element(f'Pictures/{fname}', 'thumb', 'Nagy Botond', 'loading="lazy"', indent=20, data_full=True))
+        lines.append(picture_element(f'Pictures/{fname}', 'thumb', 'Nagy Botond', 'loading="lazy"', indent=20, data_full=True, sizes=IMAGE_SIZES[slot], placeholder=True))
         lines.append(f'                </div>')
     lines.append('            </div>')
 
-    if rest_images:
-        lines.append('            <div class="grid grid-cols-2 md:grid-cols-4 gap-3 mt-3 reveal" style="transition-delay: 0.2s;">')
+    if rest_images or shard_paths:
+        # Tiles from the shards are appended to this grid by the page script
+        shard_attrs = (f' data-shards="{" ".join(shard_paths)}" data-sizes="{IMAGE_SIZES["gallery-rest"]}"'
+                       if shard_paths else '')
+        lines.append(f'            <div id="gallery-rest" class="grid grid-cols-2 md:grid-cols-4 gap-3 mt-3 reveal" style="transition-delay: 0.2s;"{shard_attrs}>')
         for fname in rest_images:
             lines.append(f'                <div class="gallery-img h-48 sm:h-56">')
-            lines.append(picture_element(f'Pictures/{fname}', 'thumb', 'Nagy Botond', 'loading="lazy"', indent=20, data_full=True))
+            lines.append(picture_element(f'Pictures/{fname}', 'thumb', 'Nagy Botond', 'loading="lazy"', indent=20, data_full=True, sizes=IMAGE_SIZES['gallery-rest'], placeholder=True))
             lines.append(f'                </div>')
         lines.append('            </div>')
+        if shard_paths:
+            lines.append('            <div id="gallery-sentinel" aria-hidden="true"></div>')
 
     return '\n'.join(lines)
 
@@ -288,7 +603,7 @@ def build_bike(data):
 
                     <!-- Kép -->
                     <div class="gallery-img h-48 mb-6">
-{picture_element(bike['image'], 'medium', 'Botond országúti kerékpárja', 'loading="lazy"', indent=24)}
+{picture_element(bike['image'], 'medium', 'Botond országúti kerékpárja', 'loading="lazy"', indent=24, sizes=IMAGE_SIZES['bike'])}
                     </div>
 
                     <div class="space-y-3">
@@ -314,8 +629,11 @@ def build_motivation(data):
 
     photos_lines = []
     for photo in mot.get('photos', []):
+        if not os.path.isfile(os.path.join(SCRIPT_DIR, photo)):
+            print(f'  ⚠️  motivation photo {photo} not found - skipping')
+            continue
         photos_lines.append(f'''                <div class="gallery-img h-48 sm:h-64">
-{picture_element(photo, 'medium', 'Nagy Botond', 'loading="lazy"', indent=20)}
+{picture_element(photo, 'medium', 'Nagy Botond', 'loading="lazy"', indent=20, sizes=IMAGE_SIZES['motivation'])}
                 </div>''')
 
     photos_html = '\n'.join(photos_lines)
@@ -384,68 +702,398 @@ def build_footer(data):
             </p>'''
 
 
-def replace_sections(html, data, images):
-    """Replace all SECTION-START/SECTION-END blocks"""
+SECTION_MARKER_RE = re.compile(r'<!-- SECTION-(START|END):([\w-]+) -->')
 
-    builders = {
+
+@functools.lru_cache(maxsize=8)
+def tokenize_template(html):
+    """Split a template into segments, scanning it once.
+    Plain text segments are strings; each SECTION-START/SECTION-END block
+    becomes a (name, original_content) tuple. The START marker line ends the
+    preceding text segment and the END marker line starts the next one.
+    """
+    segments = []
+    pos = 0
+    open_name = None
+    content_start = 0
+    for m in SECTION_MARKER_RE.finditer(html):
+        kind, name = m.groups()
+        if kind == 'START':
+            if open_name is not None:
+                raise ValueError(f'SECTION-START:{name} inside unclosed section {open_name}')
+            segments.append(html[pos:m.end()])
+            open_name = name
+            content_start = m.end() + 1 if html.startswith('\n', m.end()) else m.end()
+        else:
+            if name != open_name:
+                raise ValueError(f'SECTION-END:{name} does not close {open_name}')
+            # The END marker's line (indentation included) belongs to the next segment
+            content_end = max(html.rfind('\n', content_start - 1, m.start()), content_start - 1)
+            segments.append((name, html[content_start:content_end]))
+            pos = content_end + 1
+            open_name = None
+    if open_name is not None:
+        raise ValueError(f'SECTION-START:{open_name} is never closed')
+    segments.append(html[pos:])
+    return tuple(segments)
+
+
+def render_template(segments, builders):
+    """Render tokenized segments in one pass; returns a list of string fragments.
+    Sections without a builder keep the template's original content.
+    """
+    fragments = []
+    for segment in segments:
+        if isinstance(segment, str):
+            fragments.append(segment)
+            continue
+        name, original = segment
+        builder = builders.get(name)
+        content = builder() if builder else original
+        fragments.extend(('\n', content, '\n'))
+    return fragments
+
+
+def section_builders(data, images, albums):
+    """Map each section name to a zero-argument function returning its HTML."""
+    return {
         'hero': lambda: build_hero(data),
         'stats': lambda: build_stats(data),
         'achievements': lambda: build_achievements(data),
-        'gallery': lambda: build_gallery(images),
+        'gallery': lambda: build_gallery(images, data, albums),
         'bike': lambda: build_bike(data),
         'motivation': lambda: build_motivation(data),
         'footer': lambda: build_footer(data),
     }
 
-    for section_name, builder in builders.items():
-        pattern = re.compile(
-            r'(<!-- SECTION-START:' + re.escape(section_name) + r' -->)\n.*?\n(\s*<!-- SECTION-END:' + re.escape(section_name) + r' -->)',
-            re.DOTALL
-        )
-        match = pattern.search(html)
-        if match:
-            new_content = builder()
-            html = pattern.sub(
-                lambda m: m.group(1) + '\n' + new_content + '\n' + m.group(2),
-                html
-            )
+
+def section_inputs(data, images, albums):
+    """Everything each section's HTML depends on, as JSON-serializable values."""
+    motivation_photos = data['motivation'].get('photos', [])
+    return {
+        'hero': [data['hero'], image_info(data['hero']['heroImage'])],
+        'stats': data['stats'],
+        'achievements': data['achievements'],
+        'gallery': [gallery_paging(data),
+                    [[fname, image_info(f'Pictures/{fname}')] for fname in images[:gallery_paging(data)[0]]],
+                    len(images),
+                    [[a['page'], a['title'], len(a['images']), image_info(f'Pictures/{a["cover"]}')]
+                     for a in albums]],
+        'bike': [data['bike'], image_info(data['bike']['image'])],
+        'motivation': [data['motivation'],
+                       [[p, os.path.isfile(os.path.join(SCRIPT_DIR, p)), image_info(p)]
+                        for p in motivation_photos]],
+        'footer': data['footer'],
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def code_digest():
+    """Digest of this file: any change to a builder invalidates every cached section."""
+    with open(os.path.abspath(__file__), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def section_digest(value):
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256((code_digest() + payload).encode('utf-8')).hexdigest()
+
+
+def load_build_cache():
+    """Load cached section HTML; start empty if missing or unreadable."""
+    try:
+        with open(BUILD_CACHE_PATH, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    cache.setdefault('sections', {})
+    return cache
+
+
+def save_build_cache(cache):
+    os.makedirs(os.path.dirname(BUILD_CACHE_PATH), exist_ok=True)
+    tmp_path = BUILD_CACHE_PATH + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, BUILD_CACHE_PATH)
+
+
+def cached_builders(builders, inputs, cache, rebuilt):
+    """Wrap builders so a section is only rebuilt when its input digest changed.
+    Names of rebuilt sections are appended to rebuilt.
+    """
+    def wrap(name, builder):
+        digest = section_digest(inputs.get(name))
+
+        def build():
+            hit = cache['sections'].get(name)
+            if hit and hit['digest'] == digest:
+                return hit['html']
+            html = builder()
+            cache['sections'][name] = {'digest': digest, 'html': html}
+            rebuilt.append(name)
+            return html
+        return build
+
+    return {name: wrap(name, builder) for name, builder in builders.items()}
+
+
+def replace_sections(html, data, images, albums=(), cache=None, rebuilt=None):
+    """Replace all SECTION-START/SECTION-END blocks.
+    cache: a load_build_cache() dict to reuse unchanged sections from (and
+    update), or None to rebuild everything; rebuilt: a list to append the
+    names of the sections not taken from the cache to.
+    """
+    builders = section_builders(data, images, albums)
+    rebuilt = [] if rebuilt is None else rebuilt
+    if cache is not None:
+        builders = cached_builders(builders, section_inputs(data, images, albums), cache, rebuilt)
+    segments = tokenize_template(html)
+    output = ''.join(render_template(segments, builders))
+
+    found = {seg[0] for seg in segments if isinstance(seg, tuple)}
+    for section_name in builders:
+        if section_name not in found:
+            print(f'  ⚠️  {section_name} section markers not found - skipping')
+        elif cache is None or section_name in rebuilt:
             print(f'  ✅ {section_name} section replaced')
         else:
-            print(f'  ⚠️  {section_name} section markers not found - skipping')
+            print(f'  ♻️  {section_name} section unchanged (cached)')
+
+    if cache is not None:
+        print(f'  🔁 Rebuilt {len(rebuilt)}/{len(found)} sections: {", ".join(rebuilt) or "none"}')
+    return output
+
+
+# ============================================
+# ALBUM PAGES
+# ============================================
+
+def album_date_range(album):
+    """'2025-08-30 – 2025-08-31', a single date, or '' without EXIF dates."""
+    if not album['dates']:
+        return ''
+    first, last = album['dates']
+    return first if first == last else f'{first} – {last}'
+
+
+def build_album_meta(album, data):
+    title = f'{album["title"]} | Nagy Botond'
+    description = f'{album["title"]} - {len(album["images"])} fotó. Nagy Botond, Kőbánya Cycling Team.'
+    page_url = SITE_URL + quote(album['page'])
+    cover = quote(get_optimized_path(f'Pictures/{album["cover"]}', TIER_FALLBACK_WIDTH['medium'], 'jpeg'))
+    return f'''    <title>{title}</title>
+    <meta name="description" content="{description}">
+    <link rel="canonical" href="{page_url}">
+    <meta property="og:title" content="{title}">
+    <meta property="og:description" content="{description}">
+    <meta property="og:image" content="{SITE_URL}{cover}">
+    <meta property="og:url" content="{page_url}">
+    <meta property="og:type" content="website">
+    <meta property="og:locale" content="hu_HU">'''
+
+
+def build_album_title(album):
+    dates = album_date_range(album)
+    dates = f'{dates} · ' if dates else ''
+    return f'''            <div class="text-center mb-14">
+                <span class="font-mono text-xs text-neon-green tracking-[0.3em] uppercase">// Album</span>
+                <h1 class="font-orbitron text-3xl sm:text-4xl md:text-5xl font-bold text-white mt-2 neon-text">{album['title']}</h1>
+                <p class="font-mono text-xs text-gray-400 mt-4">{dates}{len(album['images'])} fotó</p>
+            </div>'''
+
+
+def album_shard_dir(album):
+    return f'{GALLERY_SHARD_DIR}/{album["slug"]}'
+
+
+def build_album_page(template, album, data):
+    """Render templates/album.html for one album; its photos are paged into
+    gallery/<slug>/ shards exactly like the main gallery.
+    """
+    builders = {
+        'album-meta': lambda: build_album_meta(album, data),
+        'album-title': lambda: build_album_title(album),
+        'album': lambda: build_gallery(album['images'], data, shard_dir=album_shard_dir(album)),
+        'album-footer': lambda: f'        <p class="text-gray-600 text-xs font-mono">&copy; {data["footer"]["copyright"]}</p>',
+    }
+    return ''.join(render_template(tokenize_template(template), builders))
 
-    return html
+
+def render_albums(album_template, albums, data, images):
+    """Return (pages, shards): {page: html} of every album page and
+    {path: json} of every gallery shard, the main gallery's and the albums'.
+    """
+    shards = build_gallery_shards(data, images)
+    pages = {}
+    for album in albums:
+        pages[album['page']] = build_album_page(album_template, album, data)
+        shards.update(build_gallery_shards(data, album['images'], album_shard_dir(album)))
+    return pages, shards
 
 
-def main():
+def write_album_pages(pages):
+    """Write the album pages and delete those of albums that no longer exist.
+    Returns the number of pages whose content changed.
+    """
+    written = sum(write_if_changed(os.path.join(SCRIPT_DIR, rel_path), content)
+                  for rel_path, content in pages.items())
+    for fname in os.listdir(SCRIPT_DIR):
+        if fname.startswith(ALBUM_PAGE_PREFIX) and fname.endswith('.html') and fname not in pages:
+            os.remove(os.path.join(SCRIPT_DIR, fname))
+    if pages:
+        print(f'  📚 {len(pages)} album page(s) written: {", ".join(pages)}')
+    return written
+
+
+# ============================================
+# SERVICE WORKER
+# ============================================
+
+def precache_manifest(html, data, images):
+    """Assets a repeat visitor needs: the shell (stylesheets, scripts, logos)
+    plus the hero at its medium and the inlined gallery page at its thumb
+    fallback width, per format (the service worker picks the best format the
+    browser decodes).
+    """
+    shell = sorted(set(SHELL_ASSET_RE.findall(html)))
+    by_format = {}
+    first_page = images[:gallery_paging(data)[0]]
+    targets = [(data['hero']['heroImage'], 'medium')] + [(f'Pictures/{f}', 'thumb') for f in first_page]
+    for original_path, size in targets:
+        info = image_info(original_path)
+        if not info:
+            continue
+        for fmt in info['variants']:
+            variant = fallback_variant(tier_candidates(info, fmt, size), size)
+            by_format.setdefault(fmt, []).append(quote(variant['path']))
+    return {'shell': shell, 'images': by_format}
+
+
+def build_service_worker(html, data, images):
+    """Render templates/sw.js; the cache version is a hash of the page and its
+    precache list, so any rebuild that changes either ships a new worker.
+    package_site.py replaces it with a hash over the hashed asset names, which
+    also changes when only a precached asset does.
+    """
+    with open(SW_TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+        template = f.read()
+    manifest = json.dumps(precache_manifest(html, data, images), indent=4, sort_keys=True)
+    version = hashlib.sha256((html + manifest).encode('utf-8')).hexdigest()[:10]
+    return (template.replace('__BUILD_VERSION__', version)
+                    .replace('__PRECACHE_MANIFEST__', manifest))
+
+
+def write_if_changed(path, content):
+    """Write content to path unless it already holds exactly that. Returns True if written."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def write_gallery_shards(shards):
+    """Write the gallery shards (main gallery and albums) and delete pages and
+    album folders that no longer exist. Returns the number of shards whose
+    content changed.
+    """
+    shard_dir = os.path.join(SCRIPT_DIR, GALLERY_SHARD_DIR)
+    written = 0
+    for rel_path, content in shards.items():
+        os.makedirs(os.path.dirname(os.path.join(SCRIPT_DIR, rel_path)), exist_ok=True)
+        written += write_if_changed(os.path.join(SCRIPT_DIR, rel_path), content + '\n')
+    os.makedirs(shard_dir, exist_ok=True)
+    for root, _, files in os.walk(shard_dir, topdown=False):
+        for fname in files:
+            rel_path = os.path.relpath(os.path.join(root, fname), SCRIPT_DIR).replace(os.sep, '/')
+            if rel_path not in shards:
+                os.remove(os.path.join(root, fname))
+        if root != shard_dir and not os.listdir(root):
+            os.rmdir(root)
+    if shards:
+        print(f'  🗂️  {len(shards)} gallery shard(s) written to {GALLERY_SHARD_DIR}/')
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build index.html, the album pages and sw.js from content.json.')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    with BuildReport('build_site', args) as report:
+        build(report)
+
+
+def build(report):
     print('🔧 Building site from JSON...')
-    print(f'  📄 Template: {INDEX_PATH}')
+    print(f'  📄 Template: {TEMPLATE_PATH}')
     print(f'  📦 Data: {JSON_PATH}')
 
     if not os.path.exists(JSON_PATH):
         print(f'  ❌ Error: {JSON_PATH} not found!')
         sys.exit(1)
 
-    if not os.path.exists(INDEX_PATH):
-        print(f'  ❌ Error: {INDEX_PATH} not found!')
+    if not os.path.exists(TEMPLATE_PATH):
+        print(f'  ❌ Error: {TEMPLATE_PATH} not found!')
         sys.exit(1)
 
     # Load data
     data = load_json()
-    images = discover_images()
+    catalog_counts = {'hit': 0, 'miss': 0}
+    with report.stage('catalog'):
+        catalog = refresh_catalog(stats=catalog_counts)
+    report.count('catalog', catalog_counts['hit'], catalog_counts['miss'])
+    with report.stage('duplicates'):
+        catalog = visible_catalog(catalog, data)
+    images = discover_images(catalog)
+    albums = discover_albums(catalog, data)
     print(f'  📸 Found {len(images)} images in Pictures/')
+    if albums:
+        print(f'  📚 Found {len(albums)} albums: '
+              + ', '.join(f'{a["folder"]} ({len(a["images"])})' for a in albums))
 
     # Read template
-    with open(INDEX_PATH, 'r', encoding='utf-8') as f:
-        html = f.read()
+    with open(TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+        template = f.read()
 
     # Replace sections
-    html = replace_sections(html, data, images)
-
-    # Write output
-    with open(INDEX_PATH, 'w', encoding='utf-8') as f:
-        f.write(html)
-
-    print(f'  ✅ Done! index.html updated ({len(html)} chars)')
+    with report.stage('sections'):
+        cache = load_build_cache()
+        rebuilt = []
+        html = replace_sections(template, data, images, albums, cache, rebuilt)
+        save_build_cache(cache)
+    report.count('sections', len(cache['sections']) - len(rebuilt), len(rebuilt))
+
+    # Album pages, each with its own gallery shards
+    with report.stage('album pages + shards'):
+        album_template = None
+        if albums:
+            with open(ALBUM_TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+                album_template = f.read()
+        pages, shards = render_albums(album_template, albums, data, images)
+
+    # Write output (left untouched when nothing changed)
+    with report.stage('service worker'):
+        sw = build_service_worker(html, data, images)
+    with report.stage('write'):
+        # hit: already up to date on disk
+        written = write_gallery_shards(shards)
+        report.count('gallery shards', len(shards) - written, written)
+        written = write_album_pages(pages)
+        report.count('album pages', len(pages) - written, written)
+        if write_if_changed(SW_PATH, sw):
+            print('  👷 sw.js written')
+        index_written = write_if_changed(INDEX_PATH, html)
+
+    if not index_written:
+        print(f'  ✅ Done! index.html already up to date ({len(html)} chars)')
+        return
+
+    print(f'  ✅ Done! index.html written ({len(html)} chars)')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+image_catalog.py - Shared index of the source photos in Pictures/.
+Every build stage lists its images through refresh_catalog() instead of
+scanning Pictures/ and opening files on its own. The catalog is persisted to
+Pictures/optimized/catalog.json and holds, per photo: byte size, mtime,
+SHA-256 of the contents, pixel dimensions, EXIF capture date, EXIF
+orientation, a 64-bit perceptual difference hash (dHash) and a sharpness
+score (both for image_dedupe.py; the score needs NumPy and is null without
+it). Photos directly in Pictures/ are keyed by filename, album photos (one
+subfolder deep, e.g. Pictures/2025-pilis-kupa/) by 'album/filename'.
+
+Masters written by ingest_images.py carry no EXIF; their capture date is
+recorded in Pictures/captures.json (committed, unlike the catalog, which is a
+rebuildable cache) and used when the file itself has none.
+
+Updates are incremental: a file whose size and mtime are unchanged is not
+read at all; otherwise it is re-hashed, and its header/EXIF (and the
+reduced decodes for the dHash and sharpness) is only re-read if the hash
+changed (a fresh CI checkout resets every mtime).
+
+Usage: python3 image_catalog.py   (refreshes the catalog and lists it)
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PICTURES_DIR = os.path.join(SCRIPT_DIR, 'Pictures')
+CATALOG_PATH = os.path.join(PICTURES_DIR, 'optimized', 'catalog.json')
+CATALOG_VERSION = 3
+CAPTURES_PATH = os.path.join(PICTURES_DIR, 'captures.json')
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+
+# Subfolder of Pictures/ that holds build output, not an album
+ALBUM_EXCLUDE = 'optimized'
+
+# dHash grid: DHASH_SIZE x DHASH_SIZE bits (8 -> a 64-bit hash)
+DHASH_SIZE = 8
+
+# Long side (px) of the decode the sharpness score is computed on
+SHARPNESS_SIZE = 512
+
+# EXIF tags (see the EXIF 2.3 spec)
+EXIF_IFD = 0x8769
+TAG_ORIENTATION = 0x0112
+TAG_DATETIME = 0x0132
+TAG_DATETIME_ORIGINAL = 0x9003
+
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def list_images(directory):
+    """Return the sorted image filenames directly in directory."""
+    return [fname for fname in sorted(os.listdir(directory))
+            if os.path.splitext(fname)[1].lower() in IMAGE_EXTENSIONS
+            and os.path.isfile(os.path.join(directory, fname))]
+
+
+def list_sources():
+    """Return the sorted source keys: 'IMG.jpeg' for photos directly in
+    Pictures/, 'album/IMG.jpeg' for photos in an album subfolder. optimized/
+    (build output) and hidden folders are not albums.
+    """
+    if not os.path.isdir(PICTURES_DIR):
+        return []
+    sources = list_images(PICTURES_DIR)
+    for album in sorted(os.listdir(PICTURES_DIR)):
+        album_dir = os.path.join(PICTURES_DIR, album)
+        if album == ALBUM_EXCLUDE or album.startswith('.') or not os.path.isdir(album_dir):
+            continue
+        sources.extend(f'{album}/{fname}' for fname in list_images(album_dir))
+    return sources
+
+
+def exif_datetime(value):
+    """'2024:05:18 10:42:07' -> '2024-05-18T10:42:07' (None if malformed)."""
+    if not isinstance(value, str) or len(value) < 19:
+        return None
+    date, _, clock = value.strip('\x00 ').partition(' ')
+    parts = date.split(':')
+    if len(parts) != 3 or not all(p.isdigit() for p in parts) or parts[0] == '0000':
+        return None
+    return f'{"-".join(parts)}T{clock[:8]}'
+
+
+def read_header(path):
+    """Return (width, height, taken, orientation) from the file header and EXIF.
+    Only the header is parsed; pixel data is never decoded.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        print('❌ Pillow is required. Install with: pip install Pillow>=10.0.0')
+        sys.exit(1)
+
+    with Image.open(path) as img:
+        exif = img.getexif()
+        taken = exif_datetime(exif.get_ifd(EXIF_IFD).get(TAG_DATETIME_ORIGINAL)) or \
+            exif_datetime(exif.get(TAG_DATETIME))
+        return img.width, img.height, taken, exif.get(TAG_ORIENTATION, 1)
+
+
+def difference_hash(path):
+    """64-bit dHash as 16 hex digits: the upright image shrunk to 9x8 grey
+    pixels, one bit per horizontally adjacent pair (is the left one brighter?).
+    JPEGs are decoded at reduced scale, so this costs a fraction of a full decode.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as img:
+        img.draft('L', (DHASH_SIZE * 8, DHASH_SIZE * 8))
+        small = ImageOps.exif_transpose(img).convert('L').resize(
+            (DHASH_SIZE + 1, DHASH_SIZE), Image.BILINEAR)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(DHASH_SIZE):
+        for col in range(DHASH_SIZE):
+            left = pixels[row * (DHASH_SIZE + 1) + col]
+            bits = (bits << 1) | (left > pixels[row * (DHASH_SIZE + 1) + col + 1])
+    return f'{bits:0{DHASH_SIZE * DHASH_SIZE // 4}x}'
+
+
+def sharpness(path):
+    """Variance of the Laplacian of the upright luma at SHARPNESS_SIZE px:
+    higher is sharper (motion blur and missed focus flatten the edges).
+    None if NumPy is not installed.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as img:
+        img.draft('L', (SHARPNESS_SIZE, SHARPNESS_SIZE))
+        img = ImageOps.exif_transpose(img).convert('L')
+        img.thumbnail((SHARPNESS_SIZE, SHARPNESS_SIZE), Image.BILINEAR)
+        a = np.asarray(img, dtype=np.float64)
+    lap = 4 * a[1:-1, 1:-1] - a[:-2, 1:-1] - a[2:, 1:-1] - a[1:-1, :-2] - a[1:-1, 2:]
+    return round(float(lap.var()), 2)
+
+
+def load_catalog():
+    """Load catalog.json; start empty if it is missing or outdated."""
+    try:
+        with open(CATALOG_PATH, 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+    except (OSError, ValueError):
+        catalog = {}
+    if catalog.get('version') != CATALOG_VERSION:
+        catalog = {'version': CATALOG_VERSION, 'images': {}}
+    return catalog
+
+
+def save_catalog(catalog):
+    """Write catalog.json atomically."""
+    os.makedirs(os.path.dirname(CATALOG_PATH), exist_ok=True)
+    tmp_path = CATALOG_PATH + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, CATALOG_PATH)
+
+
+def load_captures():
+    """Load captures.json: {key: {'sha256', 'taken'}} ({} if missing)."""
+    try:
+        with open(CAPTURES_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_captures(captures):
+    """Write captures.json atomically (sorted, so diffs stay small)."""
+    tmp_path = CAPTURES_PATH + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(captures, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write('\n')
+    os.replace(tmp_path, CAPTURES_PATH)
+
+
+def catalog_record(fname, previous=None, capture=None):
+    """Return the catalog record of one source, reusing previous where valid.
+    capture: its captures.json entry, the capture date of an EXIF-less master.
+    """
+    path = os.path.join(PICTURES_DIR, fname)
+    st = os.stat(path)
+    if previous and previous.get('size') == st.st_size and previous.get('mtime_ns') == st.st_mtime_ns:
+        return previous
+    sha256 = file_digest(path)
+    if previous and previous.get('sha256') == sha256:
+        return dict(previous, size=st.st_size, mtime_ns=st.st_mtime_ns)
+    width, height, taken, orientation = read_header(path)
+    if taken is None and capture and capture.get('sha256') == sha256:
+        taken = capture.get('taken')
+    return {
+        'sha256': sha256,
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'width': width,
+        'height': height,
+        'taken': taken,
+        'orientation': orientation,
+        'dhash': difference_hash(path),
+        'sharpness': sharpness(path),
+    }
+
+
+def refresh_catalog(save=True, stats=None):
+    """Bring the catalog in line with Pictures/ and return {key: record},
+    top-level photos first, then each album, sorted by name. Only written
+    back when something changed (and save).
+    stats: a {'hit': n, 'miss': n} dict to add the reused / re-read records to.
+    """
+    catalog = load_catalog()
+    previous = catalog['images']
+    captures = load_captures()
+    images = {fname: catalog_record(fname, previous.get(fname), captures.get(fname))
+              for fname in list_sources()}
+    if stats is not None:
+        for fname, record in images.items():
+            reused = previous.get(fname, {}).get('sha256') == record['sha256']
+            stats['hit' if reused else 'miss'] += 1
+    if save and images != previous:
+        catalog['images'] = images
+        save_catalog(catalog)
+    return images
+
+
+def main():
+    print('🗂️  Refreshing image catalog...')
+    images = refresh_catalog()
+    for fname, record in images.items():
+        taken = record['taken'] or 'no EXIF date'
+        print(f'  {fname:<40} {record["width"]:>5}x{record["height"]:<5} {taken}')
+    print(f'  ✅ {len(images)} images → {os.path.relpath(CATALOG_PATH, SCRIPT_DIR)}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
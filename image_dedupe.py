@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+image_dedupe.py - Near-duplicate detection across the photo library.
+Burst shots and re-exported copies of the same scene end up next to each
+other in the gallery. Every source photo has a 64-bit difference hash (dHash)
+in the image catalog (image_catalog.py, computed on a 9x8 downscale, so it
+survives resizing and recompression); two photos whose hashes differ in at
+most --max-distance bits are near-duplicates.
+
+- The hashes go into one uint64 array; the Hamming distances of all pairs
+  are computed in row blocks with NumPy (XOR, then a popcount through a
+  256-entry byte table), so a few thousand photos take milliseconds.
+- Near-duplicate pairs are joined into clusters (union-find).
+- The best frame of a cluster is the sharpest (variance of the Laplacian of
+  a 512px luma decode, stored in the catalog record when the photo changes);
+  frames within SHARPNESS_TIE of the sharpest count as equally sharp and the
+  largest of them wins, so a full-size original beats its downscaled or
+  recompressed copies. Nothing is decoded unless a record has no score (a
+  catalog written without NumPy).
+
+build_site.py reports the clusters on every build and, with
+"hideDuplicates": true under gallery in content.json, leaves all but the
+best frame of each cluster out of the gallery and album pages.
+
+Usage: python3 image_dedupe.py [--max-distance 10]
+"""
+
+import argparse
+import os
+import sys
+
+from image_catalog import PICTURES_DIR, refresh_catalog, sharpness
+
+try:
+    import numpy as np
+except ImportError:
+    if __name__ != '__main__':
+        raise  # build_site.py reports the missing dependency itself
+    print('❌ NumPy and Pillow are required. Install with: pip install numpy Pillow>=10.0.0')
+    sys.exit(1)
+
+# Differing bits (of 64) up to which two photos count as near-duplicates:
+# recompressed/resized copies differ in 0-4, burst frames in roughly 3-10
+DUPLICATE_MAX_DISTANCE = 10
+
+# Sharpness scores within this fraction of the best are a tie
+SHARPNESS_TIE = 0.1
+
+# Rows of the distance matrix computed at once (bounds memory to ~BLOCK x n x 8 bytes)
+DISTANCE_BLOCK = 1024
+
+# Set bits of every byte value
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def hash_array(hashes):
+    """Hex dHashes -> uint64 array."""
+    return np.array([int(h, 16) for h in hashes], dtype=np.uint64)
+
+
+def hamming_distances(hashes, others=None):
+    """Bit distances between every hash of one uint64 array and every hash
+    of another (default: itself), as a (len(hashes), len(others)) uint8 matrix.
+    """
+    others = hashes if others is None else others
+    xor = hashes[:, None] ^ others[None, :]
+    return POPCOUNT[xor.view(np.uint8)].reshape(*xor.shape, 8).sum(axis=2, dtype=np.uint8)
+
+
+def near_pairs(hashes, max_distance=DUPLICATE_MAX_DISTANCE):
+    """Return [(i, j, distance)] for every pair i < j within max_distance bits."""
+    pairs = []
+    for start in range(0, len(hashes), DISTANCE_BLOCK):
+        block = hamming_distances(hashes[start:start + DISTANCE_BLOCK], hashes)
+        rows, cols = np.nonzero(block <= max_distance)
+        for r, c in zip(rows.tolist(), cols.tolist()):
+            if start + r < c:
+                pairs.append((start + r, c, int(block[r, c])))
+    return pairs
+
+
+def clusters_from_pairs(count, pairs):
+    """Union-find over pairs of indices; returns the groups of two or more, sorted."""
+    parent = list(range(count))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j, _ in pairs:
+        parent[find(i)] = find(j)
+    groups = {}
+    for i in range(count):
+        groups.setdefault(find(i), []).append(i)
+    return sorted(g for g in groups.values() if len(g) > 1)
+
+
+def sharpness_score(catalog, key):
+    """The catalog's sharpness score of a photo, computed if it has none."""
+    score = catalog[key].get('sharpness')
+    return score if score is not None else sharpness(os.path.join(PICTURES_DIR, key))
+
+
+def duplicate_clusters(catalog, max_distance=DUPLICATE_MAX_DISTANCE):
+    """Near-duplicate clusters of the catalog, best frame first:
+    [{'images': [key, ...], 'distance': largest pairwise distance, 'sharpness': {key: score}}].
+    """
+    keys = [key for key, record in catalog.items() if record.get('dhash')]
+    if len(keys) < 2:
+        return []
+    hashes = hash_array(catalog[key]['dhash'] for key in keys)
+    pairs = near_pairs(hashes, max_distance)
+
+    clusters = []
+    for group in clusters_from_pairs(len(keys), pairs):
+        members = [keys[i] for i in group]
+        scores = {key: sharpness_score(catalog, key) for key in members}
+        members.sort(key=lambda k: (-scores[k], k))
+        sharp = [k for k in members if scores[k] >= (1 - SHARPNESS_TIE) * scores[members[0]]]
+        # Largest frame; at equal size the larger file (the less compressed copy)
+        best = max(sharp, key=lambda k: (catalog[k]['width'] * catalog[k]['height'], catalog[k]['size']))
+        members.remove(best)
+        members.insert(0, best)
+        distances = hamming_distances(hashes[group])
+        clusters.append({'images': members, 'distance': int(distances.max()), 'sharpness': scores})
+    return clusters
+
+
+def print_clusters(clusters):
+    for cluster in clusters:
+        best, *rest = cluster['images']
+        scores = cluster['sharpness']
+        print(f'  🔁 {len(cluster["images"])} near-duplicates (≤{cluster["distance"]} bits): '
+              f'keeping {best} (sharpness {scores[best]:.0f})')
+        for key in rest:
+            print(f'       {key} (sharpness {scores[key]:.0f})')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Report near-duplicate photos in Pictures/.')
+    parser.add_argument('--max-distance', type=int, default=DUPLICATE_MAX_DISTANCE,
+                        help=f'differing dHash bits (of 64) that still count as a duplicate '
+                             f'(default: {DUPLICATE_MAX_DISTANCE})')
+    args = parser.parse_args(argv)
+
+    print('🔍 Looking for near-duplicate photos...')
+    catalog = refresh_catalog()
+    clusters = duplicate_clusters(catalog, args.max_distance)
+    print_clusters(clusters)
+    redundant = sum(len(c['images']) - 1 for c in clusters)
+    print(f'  ✅ {len(catalog)} photos, {len(clusters)} cluster(s), {redundant} redundant frame(s)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
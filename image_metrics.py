@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+image_metrics.py - Perceptual quality metrics for the image pipeline.
+Computes PSNR and SSIM with NumPy, and compares two optimized/ trees so a
+change to the resize or encode steps can be checked against earlier output.
+
+Usage: python3 image_metrics.py BEFORE_DIR AFTER_DIR [--min-ssim 0.95]
+
+Variants carry content-hashed names (800/IMG_1952.<hash>.jpeg), so files
+are paired by logical name: through the tree's images.json asset map where
+there is one, else by dropping the hash from the filename.
+
+Both trees are lossy, so SSIM here also counts re-encoding noise: two
+visually identical WebP thumbs typically score 0.97-0.99 against each other.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    if __name__ != '__main__':
+        raise  # optimize_images.py --tune reports the missing dependency itself
+    print('❌ NumPy and Pillow are required. Install with: pip install numpy Pillow>=10.0.0')
+    sys.exit(1)
+
+SSIM_WINDOW = 7
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.avif'}
+
+# Same scheme as optimize_images.HASH_LENGTH: name.<hash>.ext
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{10}(?=\.[^.]+$)')
+# images.json "assets" paths are repo-relative (optimize_images.write_metadata)
+ASSET_PREFIX = 'Pictures/optimized/'
+
+
+def to_array(img):
+    """Return an RGB image as a float64 array of shape (h, w, 3)."""
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    return np.asarray(img, dtype=np.float64)
+
+
+def luma(rgb):
+    """ITU-R BT.601 luma of an (h, w, 3) array."""
+    return rgb @ np.array([0.299, 0.587, 0.114])
+
+
+def _box_mean(a, size):
+    """Mean over every size x size window (valid region), via an integral image."""
+    c = np.pad(a.cumsum(axis=0).cumsum(axis=1), ((1, 0), (1, 0)))
+    s = c[size:, size:] - c[:-size, size:] - c[size:, :-size] + c[:-size, :-size]
+    return s / (size * size)
+
+
+def psnr(a, b):
+    """Peak signal-to-noise ratio in dB between two equally sized RGB arrays."""
+    mse = np.mean((a - b) ** 2)
+    if mse == 0:
+        return float('inf')
+    return float(10 * np.log10(255 ** 2 / mse))
+
+
+def ssim(a, b, window=SSIM_WINDOW):
+    """Mean structural similarity of the luma of two equally sized RGB arrays."""
+    x, y = luma(a), luma(b)
+    mx, my = _box_mean(x, window), _box_mean(y, window)
+    vx = _box_mean(x * x, window) - mx * mx
+    vy = _box_mean(y * y, window) - my * my
+    cov = _box_mean(x * y, window) - mx * my
+    s = ((2 * mx * my + SSIM_C1) * (2 * cov + SSIM_C2)) / \
+        ((mx * mx + my * my + SSIM_C1) * (vx + vy + SSIM_C2))
+    return float(s.mean())
+
+
+def compare_files(path_a, path_b):
+    """Return (psnr, ssim) of two image files, cropped to their common size."""
+    with Image.open(path_a) as ia, Image.open(path_b) as ib:
+        a, b = to_array(ia), to_array(ib)
+    h, w = min(a.shape[0], b.shape[0]), min(a.shape[1], b.shape[1])
+    a, b = a[:h, :w], b[:h, :w]
+    return psnr(a, b), ssim(a, b)
+
+
+def tree_images(directory):
+    """{logical relative path: file path} of the images in an optimized/ tree."""
+    images = {}
+    for root, _, files in os.walk(directory):
+        for fname in files:
+            if os.path.splitext(fname)[1].lower() in IMAGE_EXTENSIONS:
+                path = os.path.join(root, fname)
+                rel_path = os.path.relpath(path, directory).replace(os.sep, '/')
+                images[rel_path] = path
+    try:
+        with open(os.path.join(directory, 'images.json'), 'r', encoding='utf-8') as f:
+            assets = json.load(f).get('assets', {})
+    except (OSError, ValueError):
+        assets = {}
+    logical = {}
+    if assets:
+        for name, hashed in assets.items():
+            path = images.get(hashed[len(ASSET_PREFIX):])
+            if path:
+                logical[name[len(ASSET_PREFIX):]] = path
+    else:
+        for rel_path, path in images.items():
+            logical[HASHED_NAME_RE.sub('', rel_path)] = path
+    return logical
+
+
+def compare_trees(before_dir, after_dir):
+    """Yield (logical rel_path, psnr, ssim) for every image present in both trees."""
+    before, after = tree_images(before_dir), tree_images(after_dir)
+    for rel_path in sorted(before.keys() & after.keys()):
+        yield (rel_path, *compare_files(before[rel_path], after[rel_path]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two optimized image trees.')
+    parser.add_argument('before', help='reference tree, e.g. a copy of Pictures/optimized')
+    parser.add_argument('after', help='tree to check against the reference')
+    parser.add_argument('--min-ssim', type=float, default=0.95,
+                        help='fail if any image scores below this SSIM (default: 0.95)')
+    args = parser.parse_args(argv)
+
+    print(f'🔍 Comparing {args.after} against {args.before}')
+    results = list(compare_trees(args.before, args.after))
+    if not results:
+        print('  ⚠️  No common images found')
+        return 1
+
+    for rel_path, p, s in results:
+        flag = '✓' if s >= args.min_ssim else '❌'
+        print(f'  {flag} {rel_path:<50} PSNR {p:6.2f} dB  SSIM {s:.4f}')
+
+    worst = min(results, key=lambda r: r[2])
+    mean_psnr = np.mean([min(r[1], 99.0) for r in results])
+    print(f'  📊 {len(results)} images, mean PSNR {mean_psnr:.2f} dB, '
+          f'worst SSIM {worst[2]:.4f} ({worst[0]})')
+
+    if worst[2] < args.min_ssim:
+        print(f'  ❌ SSIM below {args.min_ssim}')
+        return 1
+    print('  ✅ Quality within threshold')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
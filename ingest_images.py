@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+ingest_images.py - Bring new photos into Pictures/ as bounded-size masters.
+Phone originals are 3-4 MB each; every one of them lands in the git history,
+every CI checkout and every optimizer run. Ingesting a photo:
+
+- applies its EXIF orientation to the pixels,
+- caps the long side at --max-side (default MASTER_MAX_SIDE, above the
+  largest optimize_images.py width),
+- re-encodes it as a high-quality JPEG (4:4:4, no EXIF); sources with
+  transparency stay lossless PNG,
+- gives it a URL-safe name: 'XVIII. Pilis kupa I (538)_vj.jpeg' ->
+  'XVIII-Pilis-kupa-I-538_vj.jpeg' (the --album folder name likewise),
+- records its EXIF capture date in Pictures/captures.json, which the image
+  catalog (image_catalog.py) reads for files without EXIF.
+
+A photo that is already upright, within the cap and a JPEG/PNG is copied
+byte for byte instead, so ingesting a master again never re-compresses it.
+Run BEFORE optimize_images.py, when adding photos.
+
+Usage: python3 ingest_images.py PHOTO_OR_DIR... [--album 2025-pilis-kupa]
+       python3 ingest_images.py --in-place [--dry-run]   (normalize Pictures/ itself)
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import unicodedata
+
+from image_catalog import (CAPTURES_PATH, EXIF_IFD, IMAGE_EXTENSIONS, PICTURES_DIR, TAG_DATETIME,
+                           TAG_DATETIME_ORIGINAL, TAG_ORIENTATION, exif_datetime, file_digest,
+                           list_sources, load_captures, save_captures)
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    print('❌ Pillow is required. Install with: pip install Pillow>=10.0.0')
+    sys.exit(1)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+JSON_PATH = os.path.join(SCRIPT_DIR, 'data', 'content.json')
+
+# Long side of a master (px): optimize_images.py's largest width is 2048, and
+# a 3:4 portrait needs 2731px of height for that
+MASTER_MAX_SIDE = 3072
+MASTER_QUALITY = 92
+
+# Formats kept as-is when nothing else needs changing
+PASSTHROUGH_FORMATS = {'JPEG', 'PNG'}
+
+
+def sanitize_stem(stem):
+    """'XVIII. Pilis kupa I (538)_vj' -> 'XVIII-Pilis-kupa-I-538_vj'.
+    ASCII letters, digits, '_' and '-' only; '' if nothing is left.
+    """
+    ascii_stem = unicodedata.normalize('NFKD', stem).encode('ascii', 'ignore').decode('ascii')
+    stem = re.sub(r'[^A-Za-z0-9_-]+', '-', ascii_stem)
+    return re.sub(r'-*_-*', '_', stem).strip('-_')
+
+
+def sanitize_name(fname):
+    """'XVIII. Pilis kupa I (538)_vj.JPG' -> 'XVIII-Pilis-kupa-I-538_vj.jpeg'.
+    The stem as sanitize_stem(); the extension follows the output format.
+    """
+    stem, ext = os.path.splitext(fname)
+    stem = sanitize_stem(stem) or 'photo'
+    ext = ext.lower()
+    return stem + ('.jpeg' if ext == '.jpg' else ext)
+
+
+def unique_name(directory, fname, claimed):
+    """fname, or fname with -2, -3, ... if directory already has another file by that name.
+    claimed: paths already written in this run.
+    """
+    stem, ext = os.path.splitext(fname)
+    candidate, n = fname, 2
+    while (os.path.join(directory, candidate) in claimed
+           or os.path.exists(os.path.join(directory, candidate))):
+        candidate, n = f'{stem}-{n}{ext}', n + 1
+    return candidate
+
+
+def capture_date(img):
+    """EXIF capture date as '2024-05-18T10:42:07', or None."""
+    exif = img.getexif()
+    return exif_datetime(exif.get_ifd(EXIF_IFD).get(TAG_DATETIME_ORIGINAL)) or \
+        exif_datetime(exif.get(TAG_DATETIME))
+
+
+def normalize(src_path, max_side, quality):
+    """Return (data, ext, taken, changes): the master's bytes (None to copy
+    the source unchanged), its extension, the EXIF capture date and a list of
+    what was done.
+    """
+    with Image.open(src_path) as img:
+        taken = capture_date(img)
+        fmt = img.format
+        orientation = img.getexif().get(TAG_ORIENTATION, 1)
+        changes = []
+        if orientation not in (None, 1):
+            changes.append(f'rotated (EXIF orientation {orientation})')
+        if max(img.size) > max_side:
+            changes.append(f'{img.width}x{img.height} capped at {max_side}px')
+        if fmt not in PASSTHROUGH_FORMATS:
+            changes.append(f'{fmt} re-encoded')
+        if not changes:
+            return None, '.png' if fmt == 'PNG' else '.jpeg', taken, []
+
+        img = ImageOps.exif_transpose(img)
+        if max(img.size) > max_side:
+            img.thumbnail((max_side, max_side), Image.LANCZOS)
+        buf = io.BytesIO()
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            img.save(buf, 'PNG', optimize=True)
+            ext = '.png'
+        else:
+            # New image: no EXIF/XMP/GPS carried over from the original
+            clean = Image.new('RGB', img.size)
+            clean.paste(img.convert('RGB'))
+            clean.save(buf, 'JPEG', quality=quality, subsampling=0, optimize=True)
+            ext = '.jpeg'
+        return buf.getvalue(), ext, taken, changes
+
+
+def collect_inputs(paths):
+    """Expand the command-line paths to image files (directories: top level only)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, f) for f in sorted(os.listdir(path))
+                         if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS)
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f'  ⚠️  Not found: {path}')
+    return files
+
+
+def update_content_refs(renames):
+    """Point data/content.json at renamed photos: 'Pictures/old' -> 'Pictures/new'
+    references, and the cover of an album (gallery.albums.<folder>.cover, a bare
+    filename) whose cover was renamed. Returns the number of references changed.
+    """
+    try:
+        with open(JSON_PATH, 'r', encoding='utf-8') as f:
+            text = f.read()
+    except OSError:
+        return 0
+    count = 0
+    for old, new in renames.items():
+        old_ref, new_ref = f'"Pictures/{old}"', f'"Pictures/{new}"'
+        count += text.count(old_ref)
+        text = text.replace(old_ref, new_ref)
+
+    covers = 0
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = {}  # not valid JSON: leave the covers to the user
+    albums = (data.get('gallery') or {}).get('albums') or {}
+    for old, new in renames.items():
+        folder, _, old_name = old.rpartition('/')
+        options = albums.get(folder) if folder else None
+        if isinstance(options, dict) and options.get('cover') == old_name:
+            options['cover'] = new.rpartition('/')[2]
+            covers += 1
+    if covers:
+        # content.json is kept as json.dumps(indent=2) output, so this only changes the covers
+        text = json.dumps(data, indent=2, ensure_ascii=False) + ('\n' if text.endswith('\n') else '')
+
+    if count or covers:
+        with open(JSON_PATH, 'w', encoding='utf-8') as f:
+            f.write(text)
+    return count + covers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ingest photos into Pictures/ as bounded-size masters.')
+    parser.add_argument('paths', nargs='*', help='photos or folders of photos to ingest')
+    parser.add_argument('--album', help='Pictures/ subfolder to ingest into (an album page)')
+    parser.add_argument('--in-place', action='store_true',
+                        help='normalize the photos already in Pictures/ (and content.json references)')
+    parser.add_argument('--max-side', type=int, default=MASTER_MAX_SIDE,
+                        help=f'longest side of a master in px (default: {MASTER_MAX_SIDE})')
+    parser.add_argument('--quality', type=int, default=MASTER_QUALITY,
+                        help=f'JPEG quality of re-encoded masters (default: {MASTER_QUALITY})')
+    parser.add_argument('--dry-run', action='store_true', help='report what would change, write nothing')
+    args = parser.parse_args(argv)
+
+    if args.in_place == bool(args.paths):
+        parser.error('give photos/folders to ingest, or --in-place (not both)')
+    album = ''
+    if args.album:
+        # The folder name ends up in page and image URLs, like the filenames
+        album = sanitize_stem(args.album)
+        if not album:
+            parser.error(f'--album {args.album!r} has no letters or digits to name a folder with')
+
+    print('📥 Ingesting photos...')
+    if album != (args.album or ''):
+        print(f'  ✏️  Album folder: {args.album!r} → {album}')
+    if args.in_place:
+        inputs = [os.path.join(PICTURES_DIR, key) for key in list_sources()]
+    else:
+        inputs = collect_inputs(args.paths)
+    if not inputs:
+        print('  ⚠️  No photos to ingest')
+        return 0
+
+    captures = load_captures()
+    renames = {}
+    claimed = set()
+    before = after = 0
+    for src_path in inputs:
+        if args.in_place:
+            key = os.path.relpath(src_path, PICTURES_DIR).replace(os.sep, '/')
+            folder, fname = os.path.split(key)
+        else:
+            folder, fname = album, os.path.basename(src_path)
+        dst_dir = os.path.join(PICTURES_DIR, folder)
+
+        try:
+            data, ext, taken, changes = normalize(src_path, args.max_side, args.quality)
+        except (OSError, ValueError) as e:
+            print(f'  ❌ {src_path}: {type(e).__name__}: {e}')
+            continue
+        if taken is None and args.in_place:
+            # An EXIF-less master re-normalized: keep the date captures.json has for it
+            known = captures.get(key, {})
+            if known.get('taken') and known.get('sha256') == file_digest(src_path):
+                taken = known['taken']
+
+        clean = os.path.splitext(sanitize_name(fname))[0] + ext
+        digest = hashlib.sha256(data).hexdigest() if data is not None else file_digest(src_path)
+        existing = os.path.join(dst_dir, clean)
+        if (args.in_place and clean == fname) or \
+                (os.path.isfile(existing) and file_digest(existing) == digest):
+            dst_name = clean  # the file itself, or the same photo ingested before
+        else:
+            dst_name = unique_name(dst_dir, clean, claimed)
+        dst_path = os.path.join(dst_dir, dst_name)
+        claimed.add(dst_path)
+        if dst_name != fname:
+            changes.append(f'renamed to {dst_name}')
+
+        size = os.path.getsize(src_path)
+        new_size = len(data) if data is not None else size
+        before, after = before + size, after + new_size
+        label = os.path.join(folder, fname) if folder else fname
+        if not changes and args.in_place:
+            print(f'  ✓ {label} (already a master)')
+        else:
+            print(f'  ✓ {label} → {"; ".join(changes) or "copied"} '
+                  f'({size / 1024 / 1024:.1f} → {new_size / 1024 / 1024:.1f} MB)')
+        if args.dry_run:
+            continue
+
+        os.makedirs(dst_dir, exist_ok=True)
+        if data is not None:
+            with open(dst_path, 'wb') as f:
+                f.write(data)
+            if args.in_place and dst_path != src_path:
+                os.remove(src_path)
+        elif args.in_place:
+            if dst_path != src_path:
+                os.replace(src_path, dst_path)
+        else:
+            shutil.copy2(src_path, dst_path)
+
+        dst_key = f'{folder}/{dst_name}' if folder else dst_name
+        if args.in_place and dst_path != src_path:
+            renames[key] = dst_key
+            captures.pop(key, None)
+        if taken:
+            captures[dst_key] = {'sha256': digest, 'taken': taken}
+
+    if args.dry_run:
+        print(f'  📏 {before / 1024 / 1024:.1f} MB → {after / 1024 / 1024:.1f} MB (dry run, nothing written)')
+        return 0
+
+    save_captures(captures)
+    if renames:
+        print(f'  ✏️  {update_content_refs(renames)} reference(s) in content.json updated')
+    print(f'  📏 {before / 1024 / 1024:.1f} MB → {after / 1024 / 1024:.1f} MB')
+    print(f'  ✅ Done! Capture dates → {os.path.relpath(CAPTURES_PATH, SCRIPT_DIR)}; '
+          f'run optimize_images.py next')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
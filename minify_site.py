@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+minify_site.py - Minify and precompress the packaged site in dist/.
+Minifies the pages (markup, inline <style>, inline <script>, JSON-LD) and
+the other unhashed text files (sw.js, ...), then writes .gz and .br siblings
+of every text asset for hosts that serve precompressed files.
+Content-hashed assets (stylesheets, scripts, logos, gallery shards) were
+already minified by package_site.py before their name was hashed, and are
+never rewritten here: their name must keep matching their bytes. Their
+"original" size in the table is that of the source file, as package_site.py
+recorded it in .build-cache/source-sizes.json.
+Prints a before/after size table per asset.
+Run AFTER package_site.py in the build pipeline.
+
+Only dist/ is touched; the committed index.html stays readable.
+The minifiers are conservative: whitespace inside <pre>/<textarea>, string
+literals and template literals is never changed, and JS keeps its line
+breaks so automatic semicolon insertion behaves exactly as before.
+--profile / --report OUT.json: stage timings and sizes (build_profile.py).
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+
+from build_profile import BuildReport, add_arguments
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DIST_DIR = os.path.join(SCRIPT_DIR, 'dist')
+# Written by package_site.py: {hashed dist path: bytes of its unminified source}
+SOURCE_SIZES_PATH = os.path.join(SCRIPT_DIR, '.build-cache', 'source-sizes.json')
+
+# Text assets worth precompressing; images/fonts are already compressed
+COMPRESS_EXTENSIONS = {'.html', '.css', '.js', '.json', '.svg', '.xml', '.txt', '.webmanifest'}
+# Skip tiny files: the compressed copy would not be smaller than the headers it saves
+COMPRESS_MIN_BYTES = 256
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Whitespace next to these tags never renders, so it can be dropped entirely;
+# elsewhere a whitespace run collapses to a single space
+BLOCK_TAGS = {
+    'html', 'head', 'body', 'title', 'meta', 'link', 'script', 'style', 'noscript',
+    'header', 'nav', 'main', 'section', 'article', 'aside', 'footer', 'div', 'p',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'dl', 'dt', 'dd',
+    'figure', 'figcaption', 'picture', 'source', 'table', 'thead', 'tbody', 'tr',
+    'td', 'th', 'form', 'fieldset', 'hr', 'br', 'svg', 'defs', 'g', 'path',
+    'circle', 'rect', 'line', 'polygon', 'polyline', 'ellipse', 'stop',
+    'lineargradient', 'radialgradient', 'filter', 'video', 'iframe',
+}
+
+HTML_TOKEN_RE = re.compile(
+    r'(<!--.*?-->'
+    r'|<script\b[^>]*>.*?</script\s*>'
+    r'|<style\b[^>]*>.*?</style\s*>'
+    r'|<(?:pre|textarea)\b.*?</(?:pre|textarea)\s*>'
+    r'|<[^>]+>)',
+    re.DOTALL | re.IGNORECASE)
+RAW_ELEMENT_RE = re.compile(r'(<(script|style)\b[^>]*>)(.*?)(</\2\s*>)', re.DOTALL | re.IGNORECASE)
+TAG_NAME_RE = re.compile(r'</?([a-zA-Z][\w:-]*)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+CSS_STRING_RE = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+CSS_PUNCT_RE = re.compile(r'\s*([{};,>])\s*')
+
+# A '/' after one of these (or at the start) begins a regex literal, not a division
+JS_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^') | {''}
+
+
+# ============================================
+# MINIFIERS
+# ============================================
+
+def minify_css(css):
+    """Drop comments and insignificant whitespace; strings are left alone."""
+    parts = CSS_STRING_RE.split(css)
+    out = []
+    for i, part in enumerate(parts):
+        if i % 2:
+            out.append(part)  # string literal
+            continue
+        part = CSS_COMMENT_RE.sub('', part)
+        part = WHITESPACE_RE.sub(' ', part)
+        part = CSS_PUNCT_RE.sub(r'\1', part)
+        part = re.sub(r':\s+', ':', part)
+        part = part.replace(';}', '}')
+        out.append(part)
+    return ''.join(out).strip()
+
+
+def minify_js(js):
+    """
+    Strip comments, indentation and blank lines from JavaScript.
+    Line breaks are kept (no ASI hazards); strings, template literals and
+    regex literals are copied verbatim.
+    """
+    out = []
+    i, n = 0, len(js)
+    template_depth = []  # brace depth at each open `${`
+    braces = 0
+
+    def last_significant():
+        for chunk in reversed(out):
+            stripped = chunk.rstrip()
+            if stripped:
+                return stripped[-1]
+        return ''
+
+    def copy_template(start):
+        """Copy a template literal from its opening ` up to ` or ${; return new index."""
+        j = start + 1
+        while j < n:
+            if js[j] == '\\':
+                j += 2
+                continue
+            if js[j] == '`':
+                out.append(js[start:j + 1])
+                return j + 1, False
+            if js.startswith('${', j):
+                out.append(js[start:j + 2])
+                return j + 2, True
+            j += 1
+        out.append(js[start:])
+        return n, False
+
+    while i < n:
+        ch = js[i]
+        if ch in '\'"':
+            j = i + 1
+            while j < n and js[j] != ch and js[j] != '\n':
+                j += 2 if js[j] == '\\' else 1
+            out.append(js[i:j + 1])
+            i = j + 1
+        elif ch == '`':
+            i, opened = copy_template(i)
+            if opened:
+                template_depth.append(braces)
+        elif ch == '}' and template_depth and template_depth[-1] == braces:
+            # End of a `${...}` substitution: resume the template literal
+            template_depth.pop()
+            i, opened = copy_template(i)
+            if opened:
+                template_depth.append(braces)
+        elif js.startswith('//', i):
+            while i < n and js[i] != '\n':
+                i += 1
+        elif js.startswith('/*', i):
+            end = js.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            out.append(' ')
+        elif ch == '/' and last_significant() in JS_REGEX_PRECEDERS:
+            j, in_class = i + 1, False
+            while j < n and js[j] != '\n':
+                if js[j] == '\\':
+                    j += 2
+                    continue
+                if js[j] == '[':
+                    in_class = True
+                elif js[j] == ']':
+                    in_class = False
+                elif js[j] == '/' and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and js[j].isalpha():
+                j += 1  # flags
+            out.append(js[i:j])
+            i = j
+        else:
+            if ch == '{':
+                braces += 1
+            elif ch == '}':
+                braces -= 1
+            out.append(ch)
+            i += 1
+
+    lines = (line.strip() for line in ''.join(out).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def minify_json(text):
+    """Re-serialize JSON without whitespace; returns the input if it does not parse."""
+    try:
+        return json.dumps(json.loads(text), ensure_ascii=False, separators=(',', ':'))
+    except ValueError:
+        return text.strip()
+
+
+def _tag_name(tag):
+    m = TAG_NAME_RE.match(tag)
+    return m.group(1).lower() if m else None
+
+
+def _minify_raw_element(token):
+    """Minify the body of a <script> or <style> element."""
+    m = RAW_ELEMENT_RE.match(token)
+    if not m:
+        return token
+    open_tag, name, body, close_tag = m.groups()
+    if name.lower() == 'style':
+        body = minify_css(body)
+    elif re.search(r'type\s*=\s*["\']application/(ld\+)?json["\']', open_tag, re.IGNORECASE):
+        body = minify_json(body)
+    elif not re.search(r'\bsrc\s*=', open_tag, re.IGNORECASE):
+        body = minify_js(body)
+    return open_tag + body + close_tag
+
+
+def minify_markup(html):
+    """
+    Minify HTML or SVG markup: drop comments (keeping conditional ones),
+    minify inline <style>/<script>, and collapse whitespace between tags.
+    """
+    tokens = HTML_TOKEN_RE.split(html)
+    out = []
+    for i, token in enumerate(tokens):
+        if i % 2:
+            low = token[:10].lower()
+            if token.startswith('<!--'):
+                if token.startswith('<!--[if'):
+                    out.append(token)
+            elif low.startswith(('<script', '<style')):
+                out.append(_minify_raw_element(token))
+            else:
+                out.append(token)  # tag, <pre>, <textarea>
+            continue
+        out.append(WHITESPACE_RE.sub(' ', token))
+
+    # Drop the (now single-space) text nodes that sit next to a block-level tag
+    result = []
+    for i, token in enumerate(out):
+        if token == ' ':
+            prev_tag = _tag_name(out[i - 1]) if i > 0 and out[i - 1].startswith('<') else None
+            next_tag = _tag_name(out[i + 1]) if i + 1 < len(out) and out[i + 1].startswith('<') else None
+            if i == 0 or i == len(out) - 1 or prev_tag in BLOCK_TAGS or next_tag in BLOCK_TAGS:
+                continue
+        elif token and not token.startswith('<') and token.strip() != token:
+            # Text next to a block tag loses its leading/trailing space
+            prev_tag = _tag_name(out[i - 1]) if i > 0 else None
+            next_tag = _tag_name(out[i + 1]) if i + 1 < len(out) else None
+            if prev_tag in BLOCK_TAGS:
+                token = token.lstrip()
+            if next_tag in BLOCK_TAGS:
+                token = token.rstrip()
+        result.append(token)
+    return ''.join(result).strip() + '\n'
+
+
+MINIFIERS = {
+    '.html': minify_markup,
+    '.svg': minify_markup,
+    '.css': minify_css,
+    '.js': minify_js,
+    '.json': minify_json,
+}
+
+
+# ============================================
+# OUTPUT STAGE
+# ============================================
+
+def dist_files():
+    """Every file in dist/, relative path sorted, excluding earlier .gz/.br output."""
+    for root, _, files in os.walk(DIST_DIR):
+        for fname in files:
+            if fname.endswith(('.gz', '.br')):
+                continue
+            path = os.path.join(root, fname)
+            yield os.path.relpath(path, DIST_DIR).replace(os.sep, '/')
+
+
+def precompress(path, data):
+    """Write .gz (and .br if brotli is installed) next to path; return their sizes."""
+    gz = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gz)
+    br_size = None
+    if brotli is not None:
+        br = brotli.compress(data, quality=BROTLI_QUALITY)
+        with open(path + '.br', 'wb') as f:
+            f.write(br)
+        br_size = len(br)
+    return len(gz), br_size
+
+
+def hashed_assets():
+    """The content-hashed files of dist/ (asset-manifest.json values)."""
+    try:
+        with open(os.path.join(DIST_DIR, 'asset-manifest.json'), 'r', encoding='utf-8') as f:
+            return set(json.load(f).values())
+    except (OSError, ValueError):
+        return set()
+
+
+def source_sizes():
+    """{hashed dist path: source bytes} of the assets package_site.py minified ({} if missing)."""
+    try:
+        with open(SOURCE_SIZES_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def process_asset(rel_path, minify=True, original=None):
+    """Minify (if supported and minify) and precompress one dist/ file; return a report row.
+    original: the size to report as before minification (default: the file's).
+    """
+    path = os.path.join(DIST_DIR, rel_path)
+    ext = os.path.splitext(rel_path)[1].lower()
+    with open(path, 'rb') as f:
+        data = f.read()
+    if original is None:
+        original = len(data)
+
+    minifier = MINIFIERS.get(ext) if minify else None
+    if minifier is not None:
+        minified = minifier(data.decode('utf-8')).encode('utf-8')
+        if len(minified) < original:
+            data = minified
+            with open(path, 'wb') as f:
+                f.write(data)
+
+    gz_size = br_size = None
+    if len(data) >= COMPRESS_MIN_BYTES:
+        gz_size, br_size = precompress(path, data)
+    return rel_path, original, len(data), gz_size, br_size
+
+
+def _kb(size):
+    return '-' if size is None else f'{size / 1024:.1f} KB'
+
+
+def print_table(rows):
+    print(f'  {"asset":<44} {"original":>10} {"minified":>10} {"gzip":>10} {"brotli":>10}')
+    for rel_path, original, minified, gz, br in rows:
+        print(f'  {rel_path:<44} {_kb(original):>10} {_kb(minified):>10} {_kb(gz):>10} {_kb(br):>10}')
+    total_orig = sum(r[1] for r in rows)
+    total_min = sum(r[2] for r in rows)
+    total_gz = sum(r[3] or r[2] for r in rows)
+    total_br = sum(r[4] or r[3] or r[2] for r in rows) if brotli is not None else None
+    print(f'  {"TOTAL":<44} {_kb(total_orig):>10} {_kb(total_min):>10} {_kb(total_gz):>10} {_kb(total_br):>10}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Minify and precompress dist/.')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    with BuildReport('minify_site', args) as report:
+        return minify(report)
+
+
+def minify(report):
+    print('🗜️  Minifying and precompressing dist/...')
+    if not os.path.isdir(DIST_DIR):
+        print(f'  ❌ Error: {DIST_DIR} not found! Run package_site.py first.')
+        return 1
+    if brotli is None:
+        print('  ⚠️  brotli not installed - writing .gz only (pip install brotli)')
+
+    # Remove stale siblings first so deleted/renamed assets don't leave orphans
+    for root, _, files in os.walk(DIST_DIR):
+        for fname in files:
+            if fname.endswith(('.gz', '.br')):
+                os.remove(os.path.join(root, fname))
+
+    with report.stage('minify + precompress'):
+        hashed = hashed_assets()
+        sources = source_sizes()
+        rows = [process_asset(p, minify=p not in hashed, original=sources.get(p)) for p in sorted(dist_files())
+                if os.path.splitext(p)[1].lower() in COMPRESS_EXTENSIONS]
+    for _, _, minified, gz, br in rows:
+        report.output('minified', minified)
+        if gz is not None:
+            report.output('gzip', gz)
+        if br is not None:
+            report.output('brotli', br)
+    print_table(rows)
+    print(f'  ✅ Done! {len(rows)} text assets processed')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,121 +1,652 @@
 #!/usr/bin/env python3
 """
 optimize_images.py - Generate optimized image variants for web delivery.
-Creates thumbnail and medium-resolution JPEG/WebP versions with EXIF stripped.
+Creates a ladder of JPEG/WebP/AVIF widths (see WIDTHS; the 2048px lightbox
+tier is JPEG/WebP only) with EXIF stripped, and writes
+Pictures/optimized/images.json with every variant's pixel size (for the
+srcset/width/height attributes emitted by build_site.py) and a tiny inline
+placeholder image per source.
+
+Variant files carry a hash of their bytes (800/IMG_1952.3f2a9c1b7e.jpeg), so
+they can be cached as immutable; images.json maps each logical path
+(800/IMG_1952.jpeg) to the hashed file under "assets".
 Run BEFORE build_site.py in the build pipeline.
+
+Sources come from the shared image catalog (image_catalog.py). Rebuilds are
+driven by Pictures/optimized/manifest.json, which records the content hash
+of every source and the encoder settings of every variant, so a fresh
+checkout (where all mtimes are reset) only re-encodes what changed.
+
+--tune replaces the fixed per-width qualities with per-image ones: for each
+format, the lowest quality whose 800px encode still reaches a target SSIM
+against the resized original (image_metrics.py, needs NumPy). The result is
+cached in the manifest, so the search runs once per source.
+
+--profile / --report OUT.json (build_profile.py) time every stage and every
+image's decode, resize, encode and write steps; with --profile the images
+are processed in this process, so cProfile sees the encoders.
 """
 
+import argparse
+import base64
+import contextlib
+import hashlib
+import io
+import json
 import os
 import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from build_profile import BuildReport, add_arguments
+from image_catalog import refresh_catalog
 
 try:
+    import PIL
     from PIL import Image
 except ImportError:
     print('❌ Pillow is required. Install with: pip install Pillow>=10.0.0')
     sys.exit(1)
 
+try:
+    # Registers AVIF on Pillow versions without a built-in encoder
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PICTURES_DIR = os.path.join(SCRIPT_DIR, 'Pictures')
 OUTPUT_BASE = os.path.join(PICTURES_DIR, 'optimized')
+MANIFEST_PATH = os.path.join(OUTPUT_BASE, 'manifest.json')
+MANIFEST_VERSION = 2
+META_PATH = os.path.join(OUTPUT_BASE, 'images.json')
 
-SIZES = {
-    'thumb':  800,    # Gallery grid thumbnails
-    'medium': 1200,   # Lightbox / hero / bike / motivation
-}
+# Responsive width ladder (px). Every source gets a JPEG and a WebP per width;
+# widths above the original collapse into one full-size variant.
+WIDTHS = [320, 480, 800, 1200, 1600, 2048]
+
+# Lightbox-only tier for high-DPI screens: shown one photo at a time, so AVIF
+# (by far the slowest encoder at this size) is skipped and WebP/JPEG serve it
+LIGHTBOX_WIDTH = 2048
+LIGHTBOX_FORMATS = ['jpeg', 'webp']
 
 JPEG_QUALITY = {
-    'thumb':  80,
-    'medium': 85,
+    320: 80, 480: 80, 800: 80,    # Phones / gallery tiles
+    1200: 85, 1600: 85,           # Lightbox / hero / high-DPI
+    2048: 82,                     # Lightbox on high-DPI screens
 }
 
+# Large JPEGs are saved progressive: a full-frame preview paints after the
+# first scan, and at these sizes the file is usually a few % smaller too
+JPEG_PROGRESSIVE_MIN_WIDTH = 1200
+
 WEBP_QUALITY = {
-    'thumb':  75,
-    'medium': 80,
+    320: 75, 480: 75, 800: 75,
+    1200: 80, 1600: 80,
+    2048: 78,
+}
+
+AVIF_QUALITY = {
+    320: 55, 480: 55, 800: 55,
+    1200: 60, 1600: 60,
 }
 
-IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+# libavif effort: 0 (slowest, smallest) to 10 (fastest). AVIF is by far the
+# slowest encoder here, but the manifest means each variant is encoded once.
+AVIF_SPEED = 6
+
+QUALITY = {'jpeg': JPEG_QUALITY, 'webp': WEBP_QUALITY, 'avif': AVIF_QUALITY}
+
+# AVIF is only produced when Pillow can encode it; the site then simply
+# serves WebP/JPEG (build_site.py skips formats missing from images.json)
+Image.init()
+AVIF_SUPPORTED = 'AVIF' in Image.SAVE
+FORMATS = ['jpeg', 'webp', 'avif'] if AVIF_SUPPORTED else ['jpeg', 'webp']
+
+# --tune: per-image quality search (see tune_qualities). The search runs at
+# TUNE_WIDTH, never goes above the fixed quality or below TUNE_MIN_QUALITY,
+# and the found offset is applied to every width of that format.
+TUNE_WIDTH = 800
+TUNE_TARGET_SSIM = 0.96
+TUNE_MIN_QUALITY = {'jpeg': 60, 'webp': 50, 'avif': 30}
+
+# Bumped whenever the decode/resize steps change, so existing variants rebuild
+RESIZE_PIPELINE = 'cascade-v1'
+
+# Resampling cost is capped with Pillow's reducing_gap: large factors are first
+# reduced by an integer box filter, then finished with LANCZOS
+REDUCING_GAP = 3.0
+
+# Low-quality image placeholder: a ~20px WebP inlined as a data: URI behind
+# the real image while it loads
+PLACEHOLDER_WIDTH = 20
+PLACEHOLDER_QUALITY = 40
+PLACEHOLDER_KEY = f'webp w{PLACEHOLDER_WIDTH} q{PLACEHOLDER_QUALITY} pillow-{PIL.__version__}'
+
+# Hex digits of the content hash embedded in every variant filename
+HASH_LENGTH = 10
+
+Variant = namedtuple('Variant', 'width fmt rel_path key size quality')
+
+
+def load_manifest():
+    """Load the build manifest; start empty if it is missing or outdated."""
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        manifest = {'version': MANIFEST_VERSION, 'images': {}}
+    return manifest
+
 
+def write_json(path, data):
+    """Write JSON atomically so an aborted run never leaves a corrupt file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
 
-def get_source_images():
-    """Return list of image filenames from Pictures/ (top-level only, skip optimized/)."""
-    if not os.path.isdir(PICTURES_DIR):
-        return []
-    images = []
-    for fname in sorted(os.listdir(PICTURES_DIR)):
-        fpath = os.path.join(PICTURES_DIR, fname)
-        if os.path.isfile(fpath) and os.path.splitext(fname)[1].lower() in IMAGE_EXTENSIONS:
-            images.append(fname)
-    return images
 
+def save_manifest(manifest):
+    write_json(MANIFEST_PATH, manifest)
 
-def needs_update(src_path, dst_path):
-    """Return True if dst does not exist or is older than src."""
-    if not os.path.exists(dst_path):
-        return True
-    return os.path.getmtime(src_path) > os.path.getmtime(dst_path)
 
+def variant_quality(fmt, width, tuned=None):
+    """Encoder quality of one variant: the fixed QUALITY, shifted by the
+    per-image offset found by --tune (tuned: {fmt: quality at TUNE_WIDTH}).
+    """
+    quality = QUALITY[fmt][width]
+    if tuned and fmt in tuned:
+        quality += tuned[fmt] - QUALITY[fmt][TUNE_WIDTH]
+    return max(TUNE_MIN_QUALITY[fmt], min(quality, QUALITY[fmt][width]))
 
-def optimize_image(src_path, fname):
-    """Generate all optimized variants for a single image."""
+
+def variant_key(width, fmt, quality):
+    """Describe every encoder input that affects one output variant."""
+    speed = f' s{AVIF_SPEED}' if fmt == 'avif' else ''
+    progressive = ' progressive' if fmt == 'jpeg' and width >= JPEG_PROGRESSIVE_MIN_WIDTH else ''
+    return (f'{fmt} w{width} q{quality}{speed}{progressive} '
+            f'{RESIZE_PIPELINE} pillow-{PIL.__version__}')
+
+
+def tuning_key(target):
+    """Describe every input of the --tune search; a change re-runs it."""
+    return (f'ssim>={target} w{TUNE_WIDTH} s{AVIF_SPEED} {sorted(FORMATS)} '
+            f'{RESIZE_PIPELINE} pillow-{PIL.__version__}')
+
+
+def hashed_path(rel_path, data):
+    """'800/IMG_1952.jpeg' -> '800/IMG_1952.<hash of data>.jpeg'."""
+    stem, ext = os.path.splitext(rel_path)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+
+
+def is_fresh(entry, sha256, rel_path, key):
+    """Return True if rel_path was built from this exact source with these settings."""
+    return (entry is not None
+            and entry.get('sha256') == sha256
+            and entry.get('variants', {}).get(rel_path) == key
+            and rel_path in entry.get('files', {})
+            and os.path.exists(os.path.join(OUTPUT_BASE, entry['files'][rel_path])))
+
+
+def scaled_size(orig_w, orig_h, max_width):
+    """Return (w, h) for an image capped at max_width, keeping the aspect ratio."""
+    if orig_w > max_width:
+        return max_width, int(orig_h * max_width / orig_w)
+    return orig_w, orig_h
+
+
+def placeholder_fresh(entry, sha256):
+    """Return True if the manifest holds a current placeholder for this source."""
+    return (entry is not None
+            and entry.get('sha256') == sha256
+            and entry.get('placeholder_key') == PLACEHOLDER_KEY
+            and 'placeholder' in entry)
+
+
+def make_placeholder(img):
+    """Encode a tiny WebP of img and return it as a data: URI."""
+    tiny = img.resize(scaled_size(*img.size, PLACEHOLDER_WIDTH), Image.LANCZOS,
+                      reducing_gap=REDUCING_GAP)
+    buf = io.BytesIO()
+    tiny.save(buf, 'WEBP', quality=PLACEHOLDER_QUALITY)
+    return 'data:image/webp;base64,' + base64.b64encode(buf.getvalue()).decode('ascii')
+
+
+def ladder_widths(orig_w):
+    """Return the WIDTHS to produce for a source orig_w pixels wide."""
+    widths = [w for w in WIDTHS if w < orig_w]
+    larger = [w for w in WIDTHS if w >= orig_w]
+    if larger:
+        # Stored under the next ladder slot, but never upscaled
+        widths.append(larger[0])
+    return widths
+
+
+def plan_variants(fname, orig_w, orig_h, tuned=None):
+    """Return a Variant for every output of an orig_w x orig_h source, smallest first.
+    tuned: per-image qualities from --tune, or None for the fixed QUALITY.
+    """
     stem = os.path.splitext(fname)[0]
+    plan = []
+    for width in ladder_widths(orig_w):
+        size = scaled_size(orig_w, orig_h, width)
+        for fmt in FORMATS:
+            if width >= LIGHTBOX_WIDTH and fmt not in LIGHTBOX_FORMATS:
+                continue
+            subdir = str(width) if fmt == 'jpeg' else f'{width}-{fmt}'
+            quality = variant_quality(fmt, width, tuned)
+            plan.append(Variant(width, fmt, f'{subdir}/{stem}.{fmt}', variant_key(width, fmt, quality),
+                                size, quality))
+    return plan
+
+
+def stale_variants(record, fname, entry, tuned=None):
+    """Return the plan_variants() entries that must be (re)encoded.
+    record: the source's image catalog record (hash and pixel size).
+    """
+    return [v for v in plan_variants(fname, record['width'], record['height'], tuned)
+            if not is_fresh(entry, record['sha256'], v.rel_path, v.key)]
+
+
+def cached_tuning(entry, sha256, target):
+    """Return the manifest's --tune result for this source and target, or None."""
+    tuning = (entry or {}).get('tuning')
+    if tuning and tuning.get('sha256') == sha256 and tuning.get('key') == tuning_key(target):
+        return tuning['quality']
+    return None
+
+
+def encode(img, fmt, quality, width):
+    """Encode img in one of FORMATS and return the bytes."""
+    buf = io.BytesIO()
+    if fmt == 'jpeg':
+        # Save without EXIF data by creating a clean image
+        clean = Image.new('RGB', img.size)
+        clean.paste(img)
+        clean.save(buf, 'JPEG',
+                   quality=quality,
+                   optimize=True,
+                   progressive=width >= JPEG_PROGRESSIVE_MIN_WIDTH)
+    elif fmt == 'webp':
+        img.save(buf, 'WEBP',
+                 quality=quality)
+    else:
+        img.save(buf, 'AVIF',
+                 quality=quality,
+                 speed=AVIF_SPEED)
+    return buf.getvalue()
+
+
+def tune_qualities(img, target):
+    """Return {fmt: quality}: per format, the lowest quality between
+    TUNE_MIN_QUALITY and the fixed quality whose TUNE_WIDTH encode still has
+    an SSIM of at least target against the resized original. Binary search,
+    so about five encodes per format.
+    """
+    from image_metrics import ssim, to_array  # optimize() checked NumPy up front
+
+    reference = img.resize(scaled_size(*img.size, TUNE_WIDTH), Image.LANCZOS,
+                           reducing_gap=REDUCING_GAP)
+    ref = to_array(reference)
+
+    def score(fmt, quality):
+        with Image.open(io.BytesIO(encode(reference, fmt, quality, TUNE_WIDTH))) as decoded:
+            return ssim(ref, to_array(decoded))
+
+    tuned = {}
+    for fmt in FORMATS:
+        lo, hi = TUNE_MIN_QUALITY[fmt], QUALITY[fmt][TUNE_WIDTH]
+        if score(fmt, hi) >= target:
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if score(fmt, mid) >= target:
+                    hi = mid
+                else:
+                    lo = mid + 1
+        tuned[fmt] = hi
+    return tuned
+
+
+@contextlib.contextmanager
+def timed(stats, step):
+    """Add the time spent in the block to stats['seconds'][step] (no-op if stats is None)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            seconds = stats.setdefault('seconds', {})
+            seconds[step] = seconds.get(step, 0.0) + time.perf_counter() - start
+
+
+def optimize_image(src_path, fname, record, entry=None, tune=None, stats=None):
+    """Generate the missing or outdated variants for a single image.
+    record: its image catalog record; entry: its previous manifest entry (or None);
+    tune: the target SSIM of --tune, or None for the fixed qualities;
+    stats: a dict to fill with step timings ('seconds'), (format, bytes) of
+    every file written ('files') and [hits, misses] per cache ('cache'), or None.
+    Returns the updated manifest entry. The source is only decoded when at
+    least one variant, the placeholder or the --tune search is stale.
+    """
+    sha256, orig_w, orig_h = record['sha256'], record['width'], record['height']
+    tuned = cached_tuning(entry, sha256, tune) if tune else None
+    if tune and tuned is None:
+        with timed(stats, 'tune'), Image.open(src_path) as img:
+            img.draft('RGB', scaled_size(orig_w, orig_h, TUNE_WIDTH))
+            tuned = tune_qualities(img.convert('RGB'), tune)
+    stale = stale_variants(record, fname, entry, tuned)
+    stale_paths = {v.rel_path for v in stale}
+    new_variants = {v.rel_path: v.key for v in plan_variants(fname, orig_w, orig_h, tuned)}
+    new_entry = {
+        'sha256': sha256,
+        'width': orig_w,
+        'height': orig_h,
+        'variants': new_variants,
+        # logical rel_path -> content-hashed file actually written
+        'files': {rel: hashed for rel, hashed in (entry or {}).get('files', {}).items()
+                  if rel in new_variants and rel not in stale_paths},
+        'placeholder_key': PLACEHOLDER_KEY,
+    }
+    if tune:
+        new_entry['tuning'] = {'sha256': sha256, 'key': tuning_key(tune), 'quality': tuned}
+    elif entry and entry.get('tuning', {}).get('sha256') == sha256:
+        # Kept while --tune is off, so turning it back on does not search again
+        new_entry['tuning'] = entry['tuning']
+    if stats is not None:
+        stats['cache'] = {
+            'variants': [len(new_variants) - len(stale), len(stale)],
+            'placeholder': [1, 0] if placeholder_fresh(entry, sha256) else [0, 1],
+        }
+        if tune:
+            stats['cache']['tuning'] = [0, 1] if 'tune' in stats.get('seconds', {}) else [1, 0]
+    if placeholder_fresh(entry, sha256):
+        new_entry['placeholder'] = entry['placeholder']
+        if not stale:
+            return new_entry
+
+    # Largest first, so each smaller width is derived from the previous one
+    stale_widths = sorted({v.width for v in stale}, reverse=True)
+    targets = {v.width: v.size for v in stale}
+    draft_size = targets[stale_widths[0]] if stale else scaled_size(orig_w, orig_h, PLACEHOLDER_WIDTH)
 
     with Image.open(src_path) as img:
-        # Convert RGBA/P to RGB for JPEG compatibility
-        if img.mode in ('RGBA', 'P', 'LA'):
-            img = img.convert('RGB')
-        elif img.mode != 'RGB':
-            img = img.convert('RGB')
-
-        orig_w, orig_h = img.size
-
-        for size_name, max_width in SIZES.items():
-            # Calculate new dimensions maintaining aspect ratio
-            if orig_w > max_width:
-                ratio = max_width / orig_w
-                new_w = max_width
-                new_h = int(orig_h * ratio)
-            else:
-                new_w, new_h = orig_w, orig_h
-
-            resized = img.resize((new_w, new_h), Image.LANCZOS)
-
-            # JPEG variant
-            jpeg_dir = os.path.join(OUTPUT_BASE, size_name)
-            os.makedirs(jpeg_dir, exist_ok=True)
-            jpeg_path = os.path.join(jpeg_dir, stem + '.jpeg')
-            if needs_update(src_path, jpeg_path):
-                # Save without EXIF data by creating a clean image
-                clean = Image.new('RGB', resized.size)
-                clean.paste(resized)
-                clean.save(jpeg_path, 'JPEG',
-                           quality=JPEG_QUALITY[size_name],
-                           optimize=True)
-
-            # WebP variant
-            webp_dir = os.path.join(OUTPUT_BASE, size_name + '-webp')
-            os.makedirs(webp_dir, exist_ok=True)
-            webp_path = os.path.join(webp_dir, stem + '.webp')
-            if needs_update(src_path, webp_path):
-                resized.save(webp_path, 'WEBP',
-                             quality=WEBP_QUALITY[size_name])
-
-
-def main():
+        with timed(stats, 'decode'):
+            # JPEG only: let libjpeg decode at 1/2, 1/4 or 1/8 scale, never below the
+            # largest target. A 12 MP photo bound for 1600px decodes at 2016px.
+            img.draft('RGB', draft_size)
+            img.load()
+
+            # Convert RGBA/P to RGB for JPEG compatibility
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+
+        resized_by_width = {}
+        current = img
+        with timed(stats, 'resize'):
+            for width in stale_widths:
+                if current.size != targets[width]:
+                    current = current.resize(targets[width], Image.LANCZOS,
+                                             reducing_gap=REDUCING_GAP)
+                resized_by_width[width] = current
+
+        if 'placeholder' not in new_entry:
+            # From the smallest image decoded so far
+            with timed(stats, 'placeholder'):
+                new_entry['placeholder'] = make_placeholder(current)
+
+        for v in stale:
+            # Encoded in memory first: the filename depends on the bytes
+            with timed(stats, f'encode {v.fmt}'):
+                data = encode(resized_by_width[v.width], v.fmt, v.quality, v.width)
+            with timed(stats, 'write'):
+                rel_hashed = hashed_path(v.rel_path, data)
+                dst_path = os.path.join(OUTPUT_BASE, rel_hashed)
+                os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+                with open(dst_path, 'wb') as f:
+                    f.write(data)
+            new_entry['files'][v.rel_path] = rel_hashed
+            if stats is not None:
+                stats.setdefault('files', []).append((v.fmt, len(data)))
+
+    return new_entry
+
+
+def _optimize_worker(task):
+    """Process-pool entry point: never raises, so one bad image can't abort the run.
+    Returns (fname, entry, error, stats).
+    """
+    src_path, fname, record, entry, tune = task
+    stats = {}
+    try:
+        return fname, optimize_image(src_path, fname, record, entry, tune, stats), None, stats
+    except Exception as e:
+        return fname, None, f'{type(e).__name__}: {e}', stats
+
+
+def write_metadata(manifest):
+    """Write images.json: each source's size plus every variant's (hashed) path
+    and pixel dimensions, grouped by format and sorted by width, and the
+    logical -> hashed path map of every variant under "assets".
+    """
+    images = {}
+    assets = {}
+    for fname, entry in manifest['images'].items():
+        variants = {}
+        for v in plan_variants(fname, entry['width'], entry['height']):
+            path = f'Pictures/optimized/{entry["files"].get(v.rel_path, v.rel_path)}'
+            assets[f'Pictures/optimized/{v.rel_path}'] = path
+            variants.setdefault(v.fmt, []).append({
+                'path': path,
+                'width': v.size[0],
+                'height': v.size[1],
+            })
+        images[fname] = {
+            'width': entry['width'],
+            'height': entry['height'],
+            'placeholder': entry.get('placeholder'),
+            'variants': variants,
+        }
+    write_json(META_PATH, {'images': images, 'assets': assets})
+
+
+def prune_outputs(manifest):
+    """Delete variants no manifest entry refers to (old widths, removed sources).
+    Returns the number of files removed.
+    """
+    keep = {rel for entry in manifest['images'].values() for rel in entry['files'].values()}
+    removed = 0
+    for root, _, files in os.walk(OUTPUT_BASE, topdown=False):
+        for fname in files:
+            path = os.path.join(root, fname)
+            rel_path = os.path.relpath(path, OUTPUT_BASE).replace(os.sep, '/')
+            if root != OUTPUT_BASE and rel_path not in keep:
+                os.remove(path)
+                removed += 1
+        if root != OUTPUT_BASE and not os.listdir(root):
+            os.rmdir(root)
+    return removed
+
+
+def format_report(manifest):
+    """Return {fmt: (file_count, total_bytes)} over every variant in the manifest."""
+    totals = {fmt: [0, 0] for fmt in QUALITY}
+    for entry in manifest['images'].values():
+        for rel_path in entry['files'].values():
+            path = os.path.join(OUTPUT_BASE, rel_path)
+            if os.path.exists(path):
+                fmt = os.path.splitext(rel_path)[1][1:]
+                totals[fmt][0] += 1
+                totals[fmt][1] += os.path.getsize(path)
+    return {fmt: tuple(t) for fmt, t in totals.items() if t[0]}
+
+
+def print_format_report(manifest):
+    report = format_report(manifest)
+    jpeg_bytes = report.get('jpeg', (0, 0))[1]
+    print('  📊 Output size by format:')
+    for fmt, (count, total) in report.items():
+        vs_jpeg = f'  ({total / jpeg_bytes:.0%} of JPEG)' if jpeg_bytes and fmt != 'jpeg' else ''
+        print(f'     {fmt:<5} {count:>4} files  {total / 1024 / 1024:7.2f} MB{vs_jpeg}')
+
+
+def print_tuning_report(manifest):
+    """Mean --tune quality per format, next to the fixed quality it replaces."""
+    tuned = [e['tuning']['quality'] for e in manifest['images'].values() if 'tuning' in e]
+    print(f'  🎯 Tuned quality at {TUNE_WIDTH}px (mean over {len(tuned)} images):')
+    for fmt in FORMATS:
+        values = [t[fmt] for t in tuned if fmt in t]
+        if values:
+            print(f'     {fmt:<5} {sum(values) / len(values):5.1f}  (fixed: {QUALITY[fmt][TUNE_WIDTH]})')
+
+
+def check(images, tune=None):
+    """Report stale variants without writing anything. Returns the exit code."""
+    previous = load_manifest()['images']
+    stale_count = 0
+    for fname, record in images.items():
+        entry = previous.get(fname)
+        tuned = cached_tuning(entry, record['sha256'], tune) if tune else None
+        if tune and tuned is None:
+            print(f'  ⚠️  stale: quality search of {fname}')
+            stale_count += 1
+            continue
+        stale = stale_variants(record, fname, entry, tuned)
+        for v in stale:
+            print(f'  ⚠️  stale: {v.rel_path}')
+        stale_count += len(stale)
+        if not placeholder_fresh(entry, record['sha256']):
+            print(f'  ⚠️  stale: placeholder of {fname}')
+            stale_count += 1
+
+    if stale_count:
+        print(f'  ❌ {stale_count} variant(s) out of date - run optimize_images.py')
+        return 1
+    print(f'  ✅ All variants of {len(images)} images are up to date')
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate optimized image variants.')
+    parser.add_argument('--check', action='store_true',
+                        help='exit non-zero if any variant is stale, without writing anything')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes (default: CPU count)')
+    parser.add_argument('--tune', action='store_true',
+                        help='pick each image\'s quality per format by SSIM (needs NumPy; cached)')
+    parser.add_argument('--target-ssim', type=float, default=TUNE_TARGET_SSIM,
+                        help=f'SSIM the --tune search must reach (default: {TUNE_TARGET_SSIM})')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    with BuildReport('optimize_images', args) as report:
+        return optimize(args, report)
+
+
+def record_image_stats(report, fname, stats):
+    """Add one image's optimize_image() stats to the build report."""
+    for step, seconds in stats.get('seconds', {}).items():
+        report.stages[f'image: {step}'] = report.stages.get(f'image: {step}', 0.0) + seconds
+    for name, (hits, misses) in stats.get('cache', {}).items():
+        report.count(name, hits, misses)
+    sizes = {}
+    for fmt, size in stats.get('files', []):
+        report.output(f'encoded {fmt}', size)
+        sizes[fmt] = sizes.get(fmt, 0) + size
+    report.add_image(fname, stats.get('seconds', {}), sizes)
+
+
+def optimize(args, report):
+    tune = args.target_ssim if args.tune else None
+    if tune is not None:
+        try:
+            import image_metrics  # noqa: F401 - fail once here, not in every worker
+        except ImportError:
+            print('❌ --tune needs NumPy. Install with: pip install numpy')
+            return 1
+
     print('🖼️  Optimizing images...')
-    images = get_source_images()
+    if not AVIF_SUPPORTED:
+        print('  ⚠️  AVIF encoder unavailable - serving WebP/JPEG only '
+              '(pip install "Pillow>=11.3" or pillow-avif-plugin)')
+    catalog_counts = {'hit': 0, 'miss': 0}
+    with report.stage('catalog'):
+        images = refresh_catalog(save=not args.check, stats=catalog_counts)
+    report.count('catalog', catalog_counts['hit'], catalog_counts['miss'])
     print(f'  📸 Found {len(images)} source images')
 
     if not images:
         print('  ⚠️  No images found in Pictures/')
-        return
+        return 0
+
+    if args.check:
+        return check(images, tune)
+
+    manifest = load_manifest()
+    previous = manifest['images']
+    # Sources that were deleted from Pictures/ drop out of the manifest here
+    manifest['images'] = {}
+
+    tasks = [(os.path.join(PICTURES_DIR, fname), fname, record, previous.get(fname), tune)
+             for fname, record in images.items()]
+    jobs = max(1, min(args.jobs, len(tasks)))
+    if args.profile and jobs > 1:
+        print('  ⏱️  --profile: optimizing in this process, so cProfile sees the encoders')
+        jobs = 1
+    failed = []
+
+    start = time.perf_counter()
+    pool = None
+    try:
+        if jobs == 1:
+            results = map(_optimize_worker, tasks)
+        else:
+            print(f'  ⚙️  Using {jobs} worker processes')
+            pool = ProcessPoolExecutor(max_workers=jobs)
+            # map() yields in submission order, so progress lines stay ordered
+            results = pool.map(_optimize_worker, tasks)
+
+        for i, (fname, entry, error, stats) in enumerate(results):
+            record_image_stats(report, fname, stats)
+            if error:
+                # No entry: whatever was half-written gets rebuilt next run
+                failed.append(fname)
+                print(f'  [{i+1}/{len(images)}] {fname} ❌ {error}')
+            else:
+                manifest['images'][fname] = entry
+                print(f'  [{i+1}/{len(images)}] {fname} ✓')
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        # Keep entries for images not reached yet so an aborted run loses nothing
+        for fname in images:
+            if fname not in manifest['images'] and fname not in failed and fname in previous:
+                manifest['images'][fname] = previous[fname]
+        save_manifest(manifest)
+        report.stages['optimize'] = time.perf_counter() - start
+
+    with report.stage('metadata'):
+        write_metadata(manifest)
+
+    if failed:
+        print(f'  ❌ {len(failed)} of {len(images)} images failed: {", ".join(failed)}')
+        return 1
 
-    for i, fname in enumerate(images):
-        src_path = os.path.join(PICTURES_DIR, fname)
-        optimize_image(src_path, fname)
-        print(f'  [{i+1}/{len(images)}] {fname} ✓')
+    with report.stage('prune'):
+        removed = prune_outputs(manifest)
+    if removed:
+        print(f'  🧹 Removed {removed} outdated variant(s)')
 
+    if tune:
+        print_tuning_report(manifest)
+    print_format_report(manifest)
     print(f'  ✅ All {len(images)} images optimized → Pictures/optimized/')
+    return 0
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
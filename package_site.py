@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+package_site.py - Assemble the deployable site in dist/.
+Copies index.html, the pages it links to (album pages) and only the files
+they actually reference (optimized image variants, logos, ...) plus the host
+files (robots.txt, sitemap.xml, CNAME). Original photos, admin.html, the
+build scripts and data/ stay out.
+Fails if a page references a local file that does not exist.
+Run AFTER build_site.py in the build pipeline.
+
+Every asset is shipped under a content-hashed name so it can be cached as
+immutable: image variants already are (optimize_images.py), logos and the
+stylesheets and scripts are minified (minify_site.py's minifiers) and hashed
+here, so the name is the hash of the bytes that ship, and their references
+in the pages rewritten (pages keep their names). dist/asset-manifest.json
+maps logical to hashed paths, and dist/_headers asks hosts that support it
+for a one-year immutable cache. sw.js gets the same rewrite, and its cache
+version is recomputed over the hashed names.
+--profile / --report OUT.json: stage timings and sizes (build_profile.py).
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+from html.parser import HTMLParser
+from urllib.parse import quote, unquote, urlsplit
+
+from build_profile import BuildReport, add_arguments
+from minify_site import MINIFIERS
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_PATH = os.path.join(SCRIPT_DIR, 'index.html')
+DIST_DIR = os.path.join(SCRIPT_DIR, 'dist')
+IMAGES_META_PATH = os.path.join(SCRIPT_DIR, 'Pictures', 'optimized', 'images.json')
+# Source size of every asset minified here, for minify_site.py's size table
+SOURCE_SIZES_PATH = os.path.join(SCRIPT_DIR, '.build-cache', 'source-sizes.json')
+
+SITE_URL = 'https://botondnagy.eu/'
+
+# Copied as-is when present; not referenced from the page itself
+STATIC_FILES = ['robots.txt', 'sitemap.xml', 'CNAME']
+
+# Written by build_site.py; shipped with its asset references rewritten
+SERVICE_WORKER = 'sw.js'
+
+# Attributes that hold a single URL / a srcset candidate list (incl. the
+# lightbox's per-format candidates) / a space-separated URL list (gallery shards)
+URL_ATTRS = {'src', 'href', 'poster', 'data-full-jpeg'}
+SRCSET_ATTRS = {'srcset', 'data-full-srcset-avif', 'data-full-srcset-webp', 'data-full-srcset-jpeg'}
+URL_LIST_ATTRS = {'data-shards'}
+
+# Keys of the gallery shard JSON (build_site.build_gallery_shards) holding URLs
+JSON_URL_KEYS = {'src', 'full'}
+JSON_SRCSET_KEYS = {'srcset', 'fullSrcset'}
+
+# Same scheme as optimize_images.HASH_LENGTH: name.<hash>.ext
+HASH_LENGTH = 10
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+# The cache version build_site.py wrote into sw.js
+SW_VERSION_RE = re.compile(r"(const VERSION = ')[^']*(';)")
+CSS_URL_RE = re.compile(r'url\(\s*[\'"]?([^\'")]+)[\'"]?\s*\)')
+JSON_URL_RE = re.compile(r'"(' + re.escape(SITE_URL) + r'[^"]+)"')
+
+
+def srcset_urls(value):
+    return [c.split()[0] for c in value.split(',') if c.strip()]
+
+
+class ReferenceCollector(HTMLParser):
+    """Collects every URL an HTML document points at."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.urls = []
+        self._in_json_ld = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        for name, value in attrs.items():
+            if value is None:
+                continue
+            if name in URL_ATTRS:
+                self.urls.append(value)
+            elif name in SRCSET_ATTRS:
+                self.urls.extend(srcset_urls(value))
+            elif name in URL_LIST_ATTRS:
+                self.urls.extend(value.split())
+            elif name == 'style':
+                self.urls.extend(CSS_URL_RE.findall(value))
+        # og:image / twitter:image carry absolute URLs of our own files
+        if tag == 'meta' and attrs.get('content', '').startswith(SITE_URL):
+            self.urls.append(attrs['content'])
+        self._in_json_ld = tag == 'script' and attrs.get('type') == 'application/ld+json'
+
+    def handle_endtag(self, tag):
+        self._in_json_ld = False
+
+    def handle_data(self, data):
+        if self._in_json_ld:
+            self.urls.extend(JSON_URL_RE.findall(data))
+
+
+def local_path(url):
+    """Map a URL to a repo-relative file path, or None if it is not a local file."""
+    if url.startswith(SITE_URL):
+        url = url[len(SITE_URL):]
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None  # external, data: URI, mailto:, bare #fragment
+    path = unquote(parts.path)
+    if path.endswith('/'):
+        path += 'index.html'  # './' -> the home page
+    path = posixpath.normpath(path).lstrip('/')
+    return path if path != '.' else None
+
+
+def json_urls(value, key=None):
+    """Yield the URLs in a gallery shard (nested dicts/lists)."""
+    if isinstance(value, dict):
+        for k, v in value.items():
+            # srcset is keyed by format: {"avif": "a.avif 320w, ...", ...}
+            yield from json_urls(v, key if key in JSON_SRCSET_KEYS else k)
+    elif isinstance(value, list):
+        for v in value:
+            yield from json_urls(v, key)
+    elif isinstance(value, str):
+        if key in JSON_URL_KEYS:
+            yield value
+        elif key in JSON_SRCSET_KEYS:
+            yield from srcset_urls(value)
+
+
+def collect_references(html):
+    """Return the sorted set of local files referenced by an HTML document,
+    including the files referenced by the JSON documents it points to.
+    """
+    collector = ReferenceCollector()
+    collector.feed(html)
+    collector.close()
+    referenced = {p for p in map(local_path, collector.urls) if p}
+    for rel_path in sorted(referenced):
+        json_path = os.path.join(SCRIPT_DIR, rel_path)
+        if rel_path.endswith('.json') and os.path.isfile(json_path):
+            with open(json_path, 'r', encoding='utf-8') as f:
+                referenced.update(p for p in map(local_path, json_urls(json.load(f))) if p)
+    return sorted(referenced)
+
+
+def collect_site(entry='index.html'):
+    """Return (pages, assets): entry plus every local .html page reachable
+    from it, and the sorted set of other local files they reference.
+    """
+    pages, assets = {}, set()
+    queue = [entry]
+    while queue:
+        rel_path = queue.pop(0)
+        if rel_path in pages:
+            continue
+        path = os.path.join(SCRIPT_DIR, rel_path)
+        if not os.path.isfile(path):
+            assets.add(rel_path)  # reported as missing by the caller
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            pages[rel_path] = f.read()
+        for ref in collect_references(pages[rel_path]):
+            if ref.endswith('.html'):
+                queue.append(ref)
+            else:
+                assets.add(ref)
+    return pages, sorted(assets)
+
+
+def copy_file(rel_path, dst_rel_path=None):
+    src = os.path.join(SCRIPT_DIR, rel_path)
+    dst = os.path.join(DIST_DIR, dst_rel_path or rel_path)
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    shutil.copy2(src, dst)
+    return os.path.getsize(dst)
+
+
+def load_image_assets():
+    """Logical -> hashed image variant paths from images.json ({} if missing)."""
+    try:
+        with open(IMAGES_META_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f).get('assets', {})
+    except (OSError, ValueError):
+        return {}
+
+
+@functools.lru_cache(maxsize=None)
+def shipped_bytes(rel_path):
+    """The contents an asset ships with: minified if minify_site.py has a
+    minifier for its type (and that makes it smaller), else the file as-is.
+    """
+    with open(os.path.join(SCRIPT_DIR, rel_path), 'rb') as f:
+        data = f.read()
+    minifier = MINIFIERS.get(os.path.splitext(rel_path)[1].lower())
+    if minifier is not None:
+        minified = minifier(data.decode('utf-8')).encode('utf-8')
+        if len(minified) < len(data):
+            data = minified
+    return data
+
+
+def hashed_name(rel_path):
+    """'logos/nb-favicon.svg' -> 'logos/nb-favicon.<hash of the shipped bytes>.svg'."""
+    digest = hashlib.sha256(shipped_bytes(rel_path)).hexdigest()[:HASH_LENGTH]
+    stem, ext = os.path.splitext(rel_path)
+    return f'{stem}.{digest}{ext}'
+
+
+def write_asset(rel_path, dst_rel_path):
+    """Write a hashed asset's shipped bytes to dist/; returns its size."""
+    dst = os.path.join(DIST_DIR, dst_rel_path)
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    data = shipped_bytes(rel_path)
+    with open(dst, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def plan_assets(referenced, image_assets):
+    """Return {referenced path: (source file, dist path)}.
+    Image variants referenced by their hashed name ship as-is; logical image
+    paths (e.g. og:image in the template) resolve through images.json; all
+    other assets get a hashed name here.
+    """
+    hashed_images = set(image_assets.values())
+    plan = {}
+    for rel_path in referenced:
+        if rel_path in hashed_images:
+            plan[rel_path] = (rel_path, rel_path)
+        elif rel_path in image_assets:
+            plan[rel_path] = (image_assets[rel_path], image_assets[rel_path])
+        elif os.path.isfile(os.path.join(SCRIPT_DIR, rel_path)):
+            plan[rel_path] = (rel_path, hashed_name(rel_path))
+        else:
+            plan[rel_path] = (rel_path, rel_path)  # missing; reported by the caller
+    return plan
+
+
+def rewrite_references(html, renames):
+    """Replace every reference to a renamed asset (plain or URL-quoted)."""
+    for old, new in sorted(renames.items(), key=lambda r: -len(r[0])):
+        for old_form, new_form in {(old, new), (quote(old), quote(new))}:
+            html = re.sub(r'(?<![\w.-])' + re.escape(old_form) + r'(?![\w.-])',
+                          lambda m: new_form, html)
+    return html
+
+
+def version_service_worker(sw, pages):
+    """Set the worker's cache VERSION to a hash of the shipped worker and pages.
+    Both hold the hashed asset names, so a change to any precached asset (not
+    only to a page) gives the precache a new name and retires the old one.
+    """
+    digest = hashlib.sha256(SW_VERSION_RE.sub(r'\1\2', sw).encode('utf-8'))
+    for rel_path in sorted(pages):
+        digest.update(pages[rel_path].encode('utf-8'))
+    version = digest.hexdigest()[:HASH_LENGTH]
+    return SW_VERSION_RE.sub(lambda m: m.group(1) + version + m.group(2), sw)
+
+
+def write_headers(hashed_paths):
+    """_headers (Netlify / Cloudflare Pages syntax): immutable caching for
+    every directory that only holds content-hashed files.
+    """
+    dirs = sorted({os.path.dirname(p) for p in hashed_paths})
+    # The worker must stay revalidated so updates reach visitors promptly
+    lines = [f'/{SERVICE_WORKER}', '  Cache-Control: no-cache']
+    for d in dirs:
+        lines += [f'/{d}/*', f'  Cache-Control: {IMMUTABLE_CACHE}']
+    with open(os.path.join(DIST_DIR, '_headers'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Assemble the deployable site in dist/.')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    with BuildReport('package_site', args) as report:
+        return package(report)
+
+
+def package(report):
+    print('📦 Packaging site → dist/')
+
+    if not os.path.exists(INDEX_PATH):
+        print(f'  ❌ Error: {INDEX_PATH} not found!')
+        return 1
+
+    with report.stage('collect'):
+        pages, referenced = collect_site()
+    with report.stage('hash assets'):
+        image_assets = load_image_assets()
+        plan = plan_assets(referenced, image_assets)
+    missing = [src for src, _ in plan.values() if not os.path.isfile(os.path.join(SCRIPT_DIR, src))]
+    if missing:
+        for path in missing:
+            print(f'  ❌ Missing referenced asset: {path}')
+        print(f'  ❌ {len(missing)} referenced file(s) not found - aborting')
+        return 1
+
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+
+    renames = {ref: dst for ref, (_, dst) in plan.items() if ref != dst}
+    os.makedirs(DIST_DIR)
+    total = 0
+    with report.stage('rewrite pages'):
+        shipped_pages = {}
+        for rel_path, html in pages.items():
+            dst = os.path.join(DIST_DIR, rel_path)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shipped_pages[rel_path] = rewrite_references(html, renames)
+            with open(dst, 'w', encoding='utf-8') as f:
+                f.write(shipped_pages[rel_path])
+            total += os.path.getsize(dst)
+            report.output('pages', os.path.getsize(dst))
+        sw_path = os.path.join(SCRIPT_DIR, SERVICE_WORKER)
+        if os.path.isfile(sw_path):
+            with open(sw_path, 'r', encoding='utf-8') as f:
+                sw = version_service_worker(rewrite_references(f.read(), renames), shipped_pages)
+            with open(os.path.join(DIST_DIR, SERVICE_WORKER), 'w', encoding='utf-8') as f:
+                f.write(sw)
+            total += os.path.getsize(os.path.join(DIST_DIR, SERVICE_WORKER))
+        else:
+            print(f'  ⚠️  {SERVICE_WORKER} not found - shipping without a service worker')
+    source_sizes = {}
+    with report.stage('copy assets'):
+        for src, dst in plan.values():
+            # Image variants ship as-is; other assets as hashed (minified)
+            if src != dst:
+                size = write_asset(src, dst)
+                source_sizes[dst] = os.path.getsize(os.path.join(SCRIPT_DIR, src))
+            else:
+                size = copy_file(src, dst)
+            total += size
+            report.output('assets', size)
+    os.makedirs(os.path.dirname(SOURCE_SIZES_PATH), exist_ok=True)
+    with open(SOURCE_SIZES_PATH, 'w', encoding='utf-8') as f:
+        json.dump(source_sizes, f, indent=2, sort_keys=True)
+
+    shipped = {dst for _, dst in plan.values()}
+    asset_manifest = {logical: hashed for logical, hashed in image_assets.items() if hashed in shipped}
+    asset_manifest.update(renames)
+    with open(os.path.join(DIST_DIR, 'asset-manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(asset_manifest, f, indent=2, sort_keys=True)
+    write_headers(shipped)
+
+    static = [p for p in STATIC_FILES if os.path.isfile(os.path.join(SCRIPT_DIR, p))]
+    for rel_path in static:
+        total += copy_file(rel_path)
+
+    count = len(pages) + os.path.isfile(sw_path) + len(referenced) + len(static)
+    print(f'  📄 {len(pages)} page(s), {len(referenced)} referenced assets + {len(static)} static files')
+    print(f'  🔖 {len(renames)} references rewritten to hashed names → asset-manifest.json')
+    print(f'  ✅ Done! {count} files, {total / 1024 / 1024:.2f} MB in dist/')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,181 @@
+// ============================================
+// SERVICE WORKER - Nagy Botond Cycling Website
+// ============================================
+// Generated by build_site.py from templates/sw.js - do not edit sw.js directly.
+//
+// - Precache: the page shell (stylesheets, scripts, logos) plus the hero and gallery
+//   images, in the best image format this browser decodes
+// - Images & fonts: cache-first (image URLs are content-hashed, so a cached
+//   copy is never stale)
+// - index.html: stale-while-revalidate, so a new deploy shows up on the next visit
+// - A new version takes over at once and deletes the old precache; the pages
+//   reload on controllerchange, so none keeps requesting the old hashed URLs
+// ============================================
+
+const VERSION = 'a50af93808';
+const PRECACHE = {
+    "images": {
+        "avif": [
+            "Pictures/optimized/1200-avif/IMG_1952.9d47779d55.avif",
+            "Pictures/optimized/800-avif/IMG_1799.5197950e91.avif",
+            "Pictures/optimized/800-avif/IMG_1813.f295cff8c0.avif",
+            "Pictures/optimized/800-avif/IMG_1817.5ba71dba7c.avif",
+            "Pictures/optimized/800-avif/IMG_1825.53049752ca.avif",
+            "Pictures/optimized/800-avif/IMG_1828.201e482aa1.avif",
+            "Pictures/optimized/800-avif/IMG_1843.187df01b70.avif",
+            "Pictures/optimized/800-avif/IMG_1947.826739473f.avif",
+            "Pictures/optimized/800-avif/IMG_1952.a3056091ed.avif",
+            "Pictures/optimized/800-avif/IMG_1980.896ebb42a3.avif",
+            "Pictures/optimized/800-avif/IMG_2006.c5ec94ee2b.avif",
+            "Pictures/optimized/800-avif/IMG_2007.cad5822556.avif",
+            "Pictures/optimized/800-avif/IMG_2203.adc6ef0294.avif",
+            "Pictures/optimized/800-avif/IMG_2260.5ce5c3661b.avif"
+        ],
+        "jpeg": [
+            "Pictures/optimized/1200/IMG_1952.5b918ea0e9.jpeg",
+            "Pictures/optimized/800/IMG_1799.473a2db937.jpeg",
+            "Pictures/optimized/800/IMG_1813.478f5757a6.jpeg",
+            "Pictures/optimized/800/IMG_1817.3ed63850e9.jpeg",
+            "Pictures/optimized/800/IMG_1825.facdc15420.jpeg",
+            "Pictures/optimized/800/IMG_1828.ec836f8b9e.jpeg",
+            "Pictures/optimized/800/IMG_1843.8e94e6ff93.jpeg",
+            "Pictures/optimized/800/IMG_1947.3ebbb41832.jpeg",
+            "Pictures/optimized/800/IMG_1952.7dc638bfd6.jpeg",
+            "Pictures/optimized/800/IMG_1980.896a057285.jpeg",
+            "Pictures/optimized/800/IMG_2006.9b16a1ace7.jpeg",
+            "Pictures/optimized/800/IMG_2007.ff8ecf40a7.jpeg",
+            "Pictures/optimized/800/IMG_2203.385b009c1f.jpeg",
+            "Pictures/optimized/800/IMG_2260.970d335f7d.jpeg"
+        ],
+        "webp": [
+            "Pictures/optimized/1200-webp/IMG_1952.b8a35c8fe2.webp",
+            "Pictures/optimized/800-webp/IMG_1799.2ec5f74f41.webp",
+            "Pictures/optimized/800-webp/IMG_1813.bd1030ca67.webp",
+            "Pictures/optimized/800-webp/IMG_1817.bcde4b434c.webp",
+            "Pictures/optimized/800-webp/IMG_1825.19d5520656.webp",
+            "Pictures/optimized/800-webp/IMG_1828.3aa3885747.webp",
+            "Pictures/optimized/800-webp/IMG_1843.a28fa4ca91.webp",
+            "Pictures/optimized/800-webp/IMG_1947.218d432ee7.webp",
+            "Pictures/optimized/800-webp/IMG_1952.f592e6241a.webp",
+            "Pictures/optimized/800-webp/IMG_1980.0a467595a6.webp",
+            "Pictures/optimized/800-webp/IMG_2006.417d929c56.webp",
+            "Pictures/optimized/800-webp/IMG_2007.045dd88f85.webp",
+            "Pictures/optimized/800-webp/IMG_2203.d8456ac783.webp",
+            "Pictures/optimized/800-webp/IMG_2260.6b4df9d38d.webp"
+        ]
+    },
+    "shell": [
+        "assets/gallery.css",
+        "assets/gallery.js",
+        "css/tailwind.css",
+        "logos/nb-favicon.svg",
+        "logos/nb-logo-inline-navbar.svg",
+        "logos/nb-logo-primary-dark.svg"
+    ]
+};
+
+const PRECACHE_NAME = `precache-${VERSION}`;
+const RUNTIME_NAME = 'runtime';
+const RUNTIME_MAX_ENTRIES = 200;
+
+// 1x1 images used to detect AVIF / WebP decoding support
+const FORMAT_PROBES = {
+    avif: 'data:image/avif;base64,AAAAIGZ0eXBhdmlmAAAAAGF2aWZtaWYxbWlhZk1BMUIAAADrbWV0YQAAAAAAAAAhaGRscgAAAAAAAAAAcGljdAAAAAAAAAAAAAAAAAAAAAAOcGl0bQAAAAAAAQAAAB5pbG9jAAAAAEQAAAEAAQAAAAEAAAETAAAAIAAAAChpaW5mAAAAAAABAAAAGmluZmUCAAAAAAEAAGF2MDFDb2xvcgAAAABqaXBycAAAAEtpcGNvAAAAFGlzcGUAAAAAAAAAAQAAAAEAAAAQcGl4aQAAAAADCAgIAAAADGF2MUOBAAwAAAAAE2NvbHJuY2x4AAEADQAGgAAAABdpcG1hAAAAAAAAAAEAAQQBAoMEAAAAKG1kYXQSAAoIGAAGiAhoNCAyEh7Hh4VZ3///4sAAAJA1jjx+rQ==',
+    webp: 'data:image/webp;base64,UklGRiQAAABXRUJQVlA4IBgAAAAwAQCdASoBAAEAB0CWJaQAA3AA/u+5AAA=',
+};
+
+const FONT_HOSTS = ['fonts.googleapis.com', 'fonts.gstatic.com'];
+
+async function supportedImageFormat() {
+    for (const fmt of ['avif', 'webp']) {
+        if (!PRECACHE.images[fmt]) continue;
+        try {
+            const blob = await (await fetch(FORMAT_PROBES[fmt])).blob();
+            await createImageBitmap(blob);
+            return fmt;
+        } catch (e) {
+            // Not decodable here: try the next format
+        }
+    }
+    return 'jpeg';
+}
+
+async function precacheUrls() {
+    const fmt = await supportedImageFormat();
+    return ['./', ...PRECACHE.shell, ...(PRECACHE.images[fmt] || [])]
+        .map(url => new URL(url, self.registration.scope).href);
+}
+
+self.addEventListener('install', event => {
+    event.waitUntil((async () => {
+        const cache = await caches.open(PRECACHE_NAME);
+        const home = new URL('./', self.registration.scope).href;
+        const urls = await precacheUrls();
+        // Hashed assets already cached by the previous version are copied, not refetched
+        await Promise.all(urls.map(async url => {
+            const cached = url !== home && await caches.match(url);
+            return cached ? cache.put(url, cached) : cache.add(url);
+        }));
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        const names = await caches.keys();
+        await Promise.all(names
+            .filter(name => name.startsWith('precache-') && name !== PRECACHE_NAME)
+            .map(name => caches.delete(name)));
+        await self.clients.claim();
+    })());
+});
+
+async function trimCache(cache) {
+    const keys = await cache.keys();
+    for (const request of keys.slice(0, Math.max(0, keys.length - RUNTIME_MAX_ENTRIES))) {
+        await cache.delete(request);
+    }
+}
+
+async function cacheFirst(request) {
+    const cached = await caches.match(request);
+    if (cached) return cached;
+    const response = await fetch(request);
+    // Opaque (cross-origin font) responses are cached too; status is 0 for them
+    if (response.ok || response.type === 'opaque') {
+        const cache = await caches.open(RUNTIME_NAME);
+        await cache.put(request, response.clone());
+        trimCache(cache);
+    }
+    return response;
+}
+
+async function staleWhileRevalidate(event) {
+    const cache = await caches.open(PRECACHE_NAME);
+    const cached = await cache.match(event.request, { ignoreSearch: true });
+    const network = fetch(event.request).then(async response => {
+        if (response.ok) await cache.put(event.request, response.clone());
+        return response;
+    });
+    if (cached) {
+        event.waitUntil(network.catch(() => {}));
+        return cached;
+    }
+    return network;
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+    const url = new URL(request.url);
+
+    if (request.mode === 'navigate' && url.origin === self.location.origin) {
+        event.respondWith(staleWhileRevalidate(event));
+    } else if (request.destination === 'image' && url.origin === self.location.origin) {
+        event.respondWith(cacheFirst(request));
+    } else if (FONT_HOSTS.includes(url.hostname)) {
+        event.respondWith(cacheFirst(request));
+    } else if (url.origin === self.location.origin) {
+        event.respondWith(caches.match(request).then(cached => cached || fetch(request)));
+    }
+});
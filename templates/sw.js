@@ -0,0 +1,122 @@
+// ============================================
+// SERVICE WORKER - Nagy Botond Cycling Website
+// ============================================
+// Generated by build_site.py from templates/sw.js - do not edit sw.js directly.
+//
+// - Precache: the page shell (stylesheets, scripts, logos) plus the hero and gallery
+//   images, in the best image format this browser decodes
+// - Images & fonts: cache-first (image URLs are content-hashed, so a cached
+//   copy is never stale)
+// - index.html: stale-while-revalidate, so a new deploy shows up on the next visit
+// - A new version takes over at once and deletes the old precache; the pages
+//   reload on controllerchange, so none keeps requesting the old hashed URLs
+// ============================================
+
+const VERSION = '__BUILD_VERSION__';
+const PRECACHE = __PRECACHE_MANIFEST__;
+
+const PRECACHE_NAME = `precache-${VERSION}`;
+const RUNTIME_NAME = 'runtime';
+const RUNTIME_MAX_ENTRIES = 200;
+
+// 1x1 images used to detect AVIF / WebP decoding support
+const FORMAT_PROBES = {
+    avif: 'data:image/avif;base64,AAAAIGZ0eXBhdmlmAAAAAGF2aWZtaWYxbWlhZk1BMUIAAADrbWV0YQAAAAAAAAAhaGRscgAAAAAAAAAAcGljdAAAAAAAAAAAAAAAAAAAAAAOcGl0bQAAAAAAAQAAAB5pbG9jAAAAAEQAAAEAAQAAAAEAAAETAAAAIAAAAChpaW5mAAAAAAABAAAAGmluZmUCAAAAAAEAAGF2MDFDb2xvcgAAAABqaXBycAAAAEtpcGNvAAAAFGlzcGUAAAAAAAAAAQAAAAEAAAAQcGl4aQAAAAADCAgIAAAADGF2MUOBAAwAAAAAE2NvbHJuY2x4AAEADQAGgAAAABdpcG1hAAAAAAAAAAEAAQQBAoMEAAAAKG1kYXQSAAoIGAAGiAhoNCAyEh7Hh4VZ3///4sAAAJA1jjx+rQ==',
+    webp: 'data:image/webp;base64,UklGRiQAAABXRUJQVlA4IBgAAAAwAQCdASoBAAEAB0CWJaQAA3AA/u+5AAA=',
+};
+
+const FONT_HOSTS = ['fonts.googleapis.com', 'fonts.gstatic.com'];
+
+async function supportedImageFormat() {
+    for (const fmt of ['avif', 'webp']) {
+        if (!PRECACHE.images[fmt]) continue;
+        try {
+            const blob = await (await fetch(FORMAT_PROBES[fmt])).blob();
+            await createImageBitmap(blob);
+            return fmt;
+        } catch (e) {
+            // Not decodable here: try the next format
+        }
+    }
+    return 'jpeg';
+}
+
+async function precacheUrls() {
+    const fmt = await supportedImageFormat();
+    return ['./', ...PRECACHE.shell, ...(PRECACHE.images[fmt] || [])]
+        .map(url => new URL(url, self.registration.scope).href);
+}
+
+self.addEventListener('install', event => {
+    event.waitUntil((async () => {
+        const cache = await caches.open(PRECACHE_NAME);
+        const home = new URL('./', self.registration.scope).href;
+        const urls = await precacheUrls();
+        // Hashed assets already cached by the previous version are copied, not refetched
+        await Promise.all(urls.map(async url => {
+            const cached = url !== home && await caches.match(url);
+            return cached ? cache.put(url, cached) : cache.add(url);
+        }));
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        const names = await caches.keys();
+        await Promise.all(names
+            .filter(name => name.startsWith('precache-') && name !== PRECACHE_NAME)
+            .map(name => caches.delete(name)));
+        await self.clients.claim();
+    })());
+});
+
+async function trimCache(cache) {
+    const keys = await cache.keys();
+    for (const request of keys.slice(0, Math.max(0, keys.length - RUNTIME_MAX_ENTRIES))) {
+        await cache.delete(request);
+    }
+}
+
+async function cacheFirst(request) {
+    const cached = await caches.match(request);
+    if (cached) return cached;
+    const response = await fetch(request);
+    // Opaque (cross-origin font) responses are cached too; status is 0 for them
+    if (response.ok || response.type === 'opaque') {
+        const cache = await caches.open(RUNTIME_NAME);
+        await cache.put(request, response.clone());
+        trimCache(cache);
+    }
+    return response;
+}
+
+async function staleWhileRevalidate(event) {
+    const cache = await caches.open(PRECACHE_NAME);
+    const cached = await cache.match(event.request, { ignoreSearch: true });
+    const network = fetch(event.request).then(async response => {
+        if (response.ok) await cache.put(event.request, response.clone());
+        return response;
+    });
+    if (cached) {
+        event.waitUntil(network.catch(() => {}));
+        return cached;
+    }
+    return network;
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+    const url = new URL(request.url);
+
+    if (request.mode === 'navigate' && url.origin === self.location.origin) {
+        event.respondWith(staleWhileRevalidate(event));
+    } else if (request.destination === 'image' && url.origin === self.location.origin) {
+        event.respondWith(cacheFirst(request));
+    } else if (FONT_HOSTS.includes(url.hostname)) {
+        event.respondWith(cacheFirst(request));
+    } else if (url.origin === self.location.origin) {
+        event.respondWith(caches.match(request).then(cached => cached || fetch(request)));
+    }
+});
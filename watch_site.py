@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+watch_site.py - Rebuild on change and serve the site with live reload.
+For working on content.json, the templates or the photos: instead of
+rerunning build.sh after every edit, this keeps one process running that
+
+- builds once, then polls data/content.json, templates/, assets/ and
+  Pictures/ every POLL_INTERVAL seconds,
+- on a change re-optimizes only the photos whose content changed (new,
+  edited or removed), re-renders the pages through build_site.py with the
+  section cache held in memory (so only the sections whose inputs changed
+  are rebuilt) and regenerates css/tailwind.css,
+- serves the site on http://127.0.0.1:8000/ and tells open pages to
+  reload (server-sent events; a script is injected into every served
+  page, the files on disk are not touched).
+
+The parsed content.json, the templates and the image catalog stay in memory
+between rebuilds; a rebuild after a content.json edit takes milliseconds.
+The served site is the working tree (unhashed asset names, no
+minification); the service worker is replaced by one that removes itself,
+so cached pages never hide a change. Use build.sh for the deployable dist/.
+
+Photos are encoded with optimize_images.py's settings (pass --tune if the
+committed variants were built with it, or they are re-encoded).
+
+Usage: python3 watch_site.py [--port 8000] [--no-serve] [--tune]
+"""
+
+import argparse
+import functools
+import http.server
+import os
+import sys
+import threading
+import time
+
+import build_css
+import build_site
+import optimize_images
+from build_profile import BuildReport
+from image_catalog import ALBUM_EXCLUDE, PICTURES_DIR, refresh_catalog
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+JSON_PATH = os.path.join(SCRIPT_DIR, 'data', 'content.json')
+TEMPLATES_DIR = os.path.join(SCRIPT_DIR, 'templates')
+ASSETS_DIR = os.path.join(SCRIPT_DIR, 'assets')
+
+# Seconds between two looks at the watched files; a change is built once
+# two consecutive looks agree, so a photo still being copied is not read
+POLL_INTERVAL = 0.2
+
+DEFAULT_PORT = 8000
+RELOAD_PATH = '/__reload'
+# Seconds between keep-alive comments on an idle reload stream
+RELOAD_KEEPALIVE = 15
+
+RELOAD_SCRIPT = f'''<script>
+        // Injected by watch_site.py: reload when a rebuild finishes
+        new EventSource('{RELOAD_PATH}').onmessage = () => location.reload();
+    </script>
+'''
+
+# Served instead of sw.js: unregisters itself, so no cached page outlives an edit
+DEV_SERVICE_WORKER = '''self.addEventListener('install', () => self.skipWaiting());
+self.addEventListener('activate', event => {
+    event.waitUntil(self.registration.unregister());
+});
+'''
+
+
+# ============================================
+# WATCHING
+# ============================================
+
+def snapshot():
+    """{path: (size, mtime_ns)} of every watched file."""
+    state = {}
+    roots = [TEMPLATES_DIR, ASSETS_DIR, PICTURES_DIR]
+    for root in roots:
+        for dirpath, dirnames, files in os.walk(root):
+            if dirpath == PICTURES_DIR:
+                dirnames[:] = [d for d in dirnames if d != ALBUM_EXCLUDE and not d.startswith('.')]
+            for fname in files:
+                path = os.path.join(dirpath, fname)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue  # deleted in between
+                state[path] = (st.st_size, st.st_mtime_ns)
+    try:
+        st = os.stat(JSON_PATH)
+        state[JSON_PATH] = (st.st_size, st.st_mtime_ns)
+    except OSError:
+        pass
+    return state
+
+
+def changed_paths(before, after):
+    return {path for path in before.keys() | after.keys() if before.get(path) != after.get(path)}
+
+
+class SiteWatcher:
+    """The in-memory build state: content.json, the templates, the image
+    catalog and the section cache, refreshed as their files change.
+    """
+
+    def __init__(self, tune=None):
+        self.tune = tune
+        self.data = None
+        self.templates = {}
+        self.catalog = {}
+        self.cache = build_site.load_build_cache()
+
+    def load(self, changed=None):
+        """(Re)read content.json and the templates if they are among changed (None: all)."""
+        if changed is None or JSON_PATH in changed:
+            self.data = build_site.load_json()
+        for name, path in (('index', build_site.TEMPLATE_PATH), ('album', build_site.ALBUM_TEMPLATE_PATH)):
+            if changed is None or path in changed:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.templates[name] = f.read()
+
+    def needs_update(self, key, entry):
+        """True if a photo's variants, placeholder or --tune search are out of date."""
+        record = self.catalog[key]
+        tuned = optimize_images.cached_tuning(entry, record['sha256'], self.tune) if self.tune else None
+        if self.tune and tuned is None:
+            return True
+        return (bool(optimize_images.stale_variants(record, key, entry, tuned))
+                or not optimize_images.placeholder_fresh(entry, record['sha256']))
+
+    def optimize(self):
+        """Refresh the catalog, encode the variants of the photos that were
+        added or changed and drop those of removed ones. Returns the keys touched.
+        """
+        self.catalog = refresh_catalog()
+        manifest = optimize_images.load_manifest()
+        removed = [key for key in manifest['images'] if key not in self.catalog]
+        stale = [key for key in self.catalog if self.needs_update(key, manifest['images'].get(key))]
+        for key in removed:
+            del manifest['images'][key]
+            print(f'  🗑️  {key} removed')
+        for key in stale:
+            start = time.perf_counter()
+            try:
+                manifest['images'][key] = optimize_images.optimize_image(
+                    os.path.join(PICTURES_DIR, key), key, self.catalog[key],
+                    manifest['images'].get(key), self.tune)
+            except Exception as e:
+                print(f'  ❌ {key}: {type(e).__name__}: {e}')
+                continue
+            print(f'  🖼️  {key} optimized ({time.perf_counter() - start:.1f}s)')
+        if removed or stale:
+            optimize_images.save_manifest(manifest)
+            optimize_images.write_metadata(manifest)
+            optimize_images.prune_outputs(manifest)
+            build_site.load_images_json.cache_clear()
+        return removed + stale
+
+    def render(self):
+        """Render and write the pages, shards and sw.js, then the stylesheet."""
+        catalog = build_site.visible_catalog(self.catalog, self.data)
+        images = build_site.discover_images(catalog)
+        albums = build_site.discover_albums(catalog, self.data)
+        html = build_site.replace_sections(self.templates['index'], self.data, images, albums, self.cache)
+        build_site.save_build_cache(self.cache)
+        pages, shards = build_site.render_albums(self.templates['album'], albums, self.data, images)
+        build_site.write_gallery_shards(shards)
+        build_site.write_album_pages(pages)
+        build_site.write_if_changed(build_site.SW_PATH,
+                                    build_site.build_service_worker(html, self.data, images))
+        build_site.write_if_changed(build_site.INDEX_PATH, html)
+        build_css.build(BuildReport('build_css'))
+
+    def rebuild(self, changed=None):
+        """One incremental build; returns True if it succeeded."""
+        start = time.perf_counter()
+        try:
+            self.load(changed)
+            if changed is None or any(p.startswith(PICTURES_DIR + os.sep) for p in changed):
+                self.optimize()
+            self.render()
+        except Exception as e:  # a half-saved content.json, a truncated photo, ...
+            print(f'  ❌ Rebuild failed: {type(e).__name__}: {e}')
+            return False
+        print(f'  ⚡ Rebuilt in {time.perf_counter() - start:.2f}s')
+        return True
+
+
+# ============================================
+# SERVING
+# ============================================
+
+class ReloadBroadcast:
+    """A build counter that reload streams wait on."""
+
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+class DevRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Static files from the working tree, never cached, with the reload
+    script injected into pages and the reload event stream at RELOAD_PATH.
+    """
+
+    broadcast = None
+
+    def end_headers(self):
+        self.send_header('Cache-Control', 'no-store')
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass  # the build output is what matters in this terminal
+
+    def send_text(self, body, content_type):
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == RELOAD_PATH:
+            return self.stream_reloads()
+        if path == '/' + build_site.SW_PATH.rsplit(os.sep, 1)[-1]:
+            return self.send_text(DEV_SERVICE_WORKER, 'text/javascript')
+        fs_path = self.translate_path(path)
+        if os.path.isdir(fs_path):
+            fs_path = os.path.join(fs_path, 'index.html')
+        if fs_path.endswith('.html') and os.path.isfile(fs_path):
+            with open(fs_path, 'r', encoding='utf-8') as f:
+                html = f.read()
+            head, sep, tail = html.rpartition('</body>')
+            return self.send_text(head + RELOAD_SCRIPT + sep + tail if sep else html + RELOAD_SCRIPT,
+                                  'text/html; charset=utf-8')
+        return super().do_GET()
+
+    def stream_reloads(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        version = self.broadcast.version
+        try:
+            while True:
+                new = self.broadcast.wait(version, RELOAD_KEEPALIVE)
+                self.wfile.write(b'data: reload\n\n' if new != version else b': keep-alive\n\n')
+                self.wfile.flush()
+                version = new
+        except OSError:
+            pass  # the page went away
+
+
+def serve(port, broadcast):
+    """Start the dev server in a background thread; returns it."""
+    handler = functools.partial(DevRequestHandler, directory=SCRIPT_DIR)
+    DevRequestHandler.broadcast = broadcast
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rebuild the site on change and serve it with live reload.')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'port of the local server (default: {DEFAULT_PORT})')
+    parser.add_argument('--no-serve', action='store_true', help='only rebuild on change, do not serve')
+    parser.add_argument('--tune', action='store_true',
+                        help='per-image qualities as in optimize_images.py --tune (needs NumPy)')
+    parser.add_argument('--target-ssim', type=float, default=optimize_images.TUNE_TARGET_SSIM,
+                        help=f'SSIM the --tune search must reach (default: {optimize_images.TUNE_TARGET_SSIM})')
+    args = parser.parse_args(argv)
+
+    print('👀 Watching data/content.json, templates/, assets/ and Pictures/...')
+    watcher = SiteWatcher(args.target_ssim if args.tune else None)
+    broadcast = ReloadBroadcast()
+    state = snapshot()
+    watcher.rebuild()
+    if not args.no_serve:
+        try:
+            serve(args.port, broadcast)
+        except OSError as e:
+            print(f'  ❌ Cannot listen on port {args.port}: {e}')
+            return 1
+        print(f'  🌐 Serving http://127.0.0.1:{args.port}/ (Ctrl+C to stop)')
+
+    try:
+        while True:
+            time.sleep(POLL_INTERVAL)
+            current = snapshot()
+            changed = changed_paths(state, current)
+            if not changed:
+                continue
+            # Let the writes settle: build once two looks in a row agree
+            while True:
+                time.sleep(POLL_INTERVAL)
+                settled = snapshot()
+                if settled == current:
+                    break
+                changed |= changed_paths(current, settled)
+                current = settled
+            state = current
+            names = sorted(os.path.relpath(p, SCRIPT_DIR) for p in changed)
+            print(f'\n🔄 Changed: {", ".join(names[:5])}' + (f' (+{len(names) - 5} more)' if len(names) > 5 else ''))
+            if watcher.rebuild(changed):
+                broadcast.notify()
+    except KeyboardInterrupt:
+        print('\n  👋 Stopped watching')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())